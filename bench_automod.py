@@ -0,0 +1,49 @@
+"""Benchmark automod's per-message cost against the size of the banned term list
+
+Run with: python bench_automod.py
+"""
+import random
+import re
+import string
+import time
+
+from utils.automod import build_pattern
+
+MESSAGES = 2000
+
+def random_word(rng, low=4, high=10):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(low, high)))
+
+def make_messages(rng, count):
+    return [" ".join(random_word(rng, 2, 8) for _ in range(rng.randint(5, 40))) for _ in range(count)]
+
+def per_message_us(check, messages):
+    start = time.perf_counter()
+    for content in messages:
+        check(content)
+    return (time.perf_counter() - start) / len(messages) * 1e6
+
+def main():
+    rng = random.Random(42)
+    messages = make_messages(rng, MESSAGES)
+
+    print(f"{'terms':>7} {'trie regex':>12} {'alternation':>12} {'word loop':>12}   (microseconds per message)")
+    for size in (10, 100, 1000, 10000):
+        terms = [random_word(rng) for _ in range(size)]
+
+        trie = build_pattern(terms)
+        alternation = re.compile(r"(?<!\w)(?:" + "|".join(map(re.escape, terms)) + r")(?!\w)", re.IGNORECASE)
+
+        def naive(content, terms=terms):
+            lowered = content.lower()
+            return any(term in lowered for term in terms)
+
+        print(
+            f"{size:>7} "
+            f"{per_message_us(trie.search, messages):>12.1f} "
+            f"{per_message_us(alternation.search, messages):>12.1f} "
+            f"{per_message_us(naive, messages):>12.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
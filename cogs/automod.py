@@ -0,0 +1,237 @@
+import discord
+from discord.ext import commands
+import logging
+
+from config import CONFIG
+from utils.automod import automod
+from utils.case_log import case_log
+from utils.embed_creator import EmbedCreator
+from utils.flood import flood_detector
+from utils.rest_queue import rest_queue, INTERACTIVE
+from utils.scheduler import scheduler
+
+logger = logging.getLogger('discord_bot')
+
+FLOOD_REASONS = {
+    "duplicate": "Repeated the same message",
+    "near_duplicate": "Repeated nearly the same message",
+    "flood": "Sent too many messages too quickly"
+}
+
+class AutoModeration(commands.Cog):
+    """Automatic filtering of banned terms, invite links, mass mentions and spam"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        scheduler.attach(bot)
+        scheduler.register("slowmode_reset", self.reset_slowmode)
+        logger.info("AutoModeration cog initialized")
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        """Check messages against the guild's automod rules and flood limits"""
+        if message.author.bot or not message.guild:
+            return
+
+        # Recorded for everyone so the XP engine can skip spam as well
+        verdict = flood_detector.observe(message)
+
+        if flood_detector.claim_channel_flood(message.channel.id, CONFIG['flood']['slowmode_duration']):
+            await self.slow_channel(message.channel)
+
+        # Moderators are exempt
+        if message.author.guild_permissions.manage_messages:
+            return
+
+        result = automod.check(message)
+        if result is not None:
+            rule, detail = result
+            await self.enforce(message, rule, detail)
+        elif verdict is not None:
+            await self.enforce_flood(message, verdict)
+
+    async def delete_message(self, message):
+        """Delete a message, returns False if it could not be deleted"""
+        try:
+            await rest_queue.run(message.delete, message.guild.id, INTERACTIVE, bucket=f"channel:{message.channel.id}:delete")
+        except discord.NotFound:
+            pass
+        except discord.HTTPException as e:
+            logger.error(f"Automod could not delete message {message.id}: {e}")
+            return False
+        return True
+
+    async def timeout_member(self, member, minutes, reason):
+        """Time out a member through the Timeout cog and get the case number"""
+        timeout_cog = self.bot.get_cog("Timeout")
+        if timeout_cog is None:
+            logger.warning("Automod timeouts need the timeout cog to be loaded")
+            return None
+        return await timeout_cog.timeout_member(member, minutes * 60, reason)
+
+    async def notify(self, channel, member, case_number, detail):
+        await channel.send(
+            embed=EmbedCreator.create_warning_embed(
+                f"🛡️ Message Removed (Case #{case_number})",
+                f"{member.mention}, your message was removed: {detail}."
+            ),
+            delete_after=8
+        )
+
+    async def enforce(self, message, rule, detail):
+        """Delete a message that broke a rule and record the case"""
+        member = message.author
+        if not await self.delete_message(message):
+            return
+
+        case_number = None
+        if rule == "mentions":
+            # Mass mentions also earn a timeout
+            minutes = CONFIG['automod']['timeout_minutes']
+            case_number = await self.timeout_member(member, minutes, f"Automod: {detail}")
+            if case_number is not None:
+                detail += f", timed out for {minutes} minutes"
+        if case_number is None:
+            case_number = case_log.add_case(
+                message.guild.id, "automod", member.id, self.bot.user.id, str(self.bot.user), f"Automod: {detail}"
+            )
+
+        await self.notify(message.channel, member, case_number, detail)
+
+    async def enforce_flood(self, message, verdict):
+        """Time out a member who sent duplicate messages or flooded"""
+        member = message.author
+        detail = FLOOD_REASONS[verdict]
+        minutes = CONFIG['flood']['timeout_minutes']
+
+        # Start the member over so messages already in flight don't trigger again
+        flood_detector.forget(message.guild.id, member.id)
+        await self.delete_message(message)
+
+        case_number = await self.timeout_member(member, minutes, f"Automod: {detail}")
+        if case_number is None:
+            return
+        await self.notify(message.channel, member, case_number, f"{detail}, timed out for {minutes} minutes")
+
+    async def slow_channel(self, channel):
+        """Turn on slowmode in a flooded channel until the flood is over"""
+        slowmode = CONFIG['flood']['slowmode_seconds']
+        if channel.slowmode_delay >= slowmode:
+            return
+
+        previous = channel.slowmode_delay
+        try:
+            await rest_queue.run(
+                lambda: channel.edit(slowmode_delay=slowmode, reason="Automod: channel flood"),
+                channel.guild.id,
+                INTERACTIVE,
+                bucket=f"channel:{channel.id}"
+            )
+        except discord.HTTPException as e:
+            logger.error(f"Automod could not set slowmode in {channel.id}: {e}")
+            return
+
+        scheduler.schedule(
+            "slowmode_reset",
+            {"guild_id": str(channel.guild.id), "channel_id": str(channel.id), "slowmode": previous},
+            delay=CONFIG['flood']['slowmode_duration'],
+            key=f"slowmode:{channel.id}"
+        )
+        await channel.send(embed=EmbedCreator.create_warning_embed(
+            "🐢 Slowmode On",
+            f"This channel is moving too fast, slowmode is on for {CONFIG['flood']['slowmode_duration'] // 60} minutes."
+        ))
+
+    async def reset_slowmode(self, payload):
+        """Restore a channel's slowmode when its flood slowmode is over"""
+        channel = self.bot.get_channel(int(payload["channel_id"]))
+        if channel is None:
+            return
+        try:
+            await channel.edit(slowmode_delay=payload["slowmode"], reason="Automod: flood slowmode over")
+        except discord.HTTPException as e:
+            logger.error(f"Automod could not reset slowmode in {channel.id}: {e}")
+
+    @commands.command(name="automod")
+    @commands.has_permissions(manage_guild=True)
+    async def automod_status(self, ctx):
+        """Show the automod rules of this server"""
+        settings = automod.get_settings(ctx.guild.id)
+
+        embed = discord.Embed(
+            title="🛡️ Automod",
+            color=CONFIG['colors']['info']
+        )
+        embed.add_field(name="Banned Terms", value=str(len(settings["terms"])), inline=True)
+        embed.add_field(name="Invite Links", value="Blocked" if settings["invites"] else "Allowed", inline=True)
+        embed.add_field(
+            name="Mention Limit",
+            value=str(settings["mention_limit"]) if settings["mention_limit"] else "Off",
+            inline=True
+        )
+        embed.set_footer(text=f"Use {CONFIG['prefix']}automodterms to list banned terms")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="automodterms")
+    @commands.has_permissions(manage_guild=True)
+    async def automod_terms(self, ctx):
+        """List the banned terms of this server"""
+        terms = automod.get_settings(ctx.guild.id)["terms"]
+        description = ", ".join(f"||{term}||" for term in terms) or "No banned terms."
+        await ctx.send(embed=EmbedCreator.create_info_embed("🛡️ Banned Terms", description[:4000]))
+
+    @commands.command(name="automodadd", extras={"redact_args": True})
+    @commands.has_permissions(manage_guild=True)
+    async def automod_add(self, ctx, *terms):
+        """Add banned terms, separated by spaces (quote terms with spaces)"""
+        if not terms:
+            await ctx.send(embed=EmbedCreator.create_error_embed("No Terms", "Give at least one term to ban."))
+            return
+
+        # Don't leave the terms visible in chat
+        try:
+            await ctx.message.delete()
+        except discord.HTTPException:
+            pass
+        try:
+            added = automod.add_terms(ctx.guild.id, terms)
+        except ValueError as e:
+            await ctx.send(embed=EmbedCreator.create_error_embed("Term Too Long", str(e)))
+            return
+        await ctx.send(embed=EmbedCreator.create_success_embed(
+            "Banned Terms Added",
+            f"Added {len(added)} terms ({len(automod.get_settings(ctx.guild.id)['terms'])} in total)."
+        ))
+
+    @commands.command(name="automodremove")
+    @commands.has_permissions(manage_guild=True)
+    async def automod_remove(self, ctx, *terms):
+        """Remove banned terms"""
+        removed = automod.remove_terms(ctx.guild.id, terms)
+        await ctx.send(embed=EmbedCreator.create_success_embed(
+            "Banned Terms Removed",
+            f"Removed {len(removed)} terms."
+        ))
+
+    @commands.command(name="automodinvites")
+    @commands.has_permissions(manage_guild=True)
+    async def automod_invites(self, ctx, enabled: bool):
+        """Turn invite link blocking on or off"""
+        automod.set_option(ctx.guild.id, "invites", enabled)
+        await ctx.send(embed=EmbedCreator.create_success_embed(
+            "Automod Updated",
+            f"Invite links are now {'blocked' if enabled else 'allowed'}."
+        ))
+
+    @commands.command(name="automodmentions")
+    @commands.has_permissions(manage_guild=True)
+    async def automod_mentions(self, ctx, limit: int):
+        """Set how many mentions in one message trigger a timeout, 0 to turn off"""
+        automod.set_option(ctx.guild.id, "mention_limit", max(0, limit))
+        await ctx.send(embed=EmbedCreator.create_success_embed(
+            "Automod Updated",
+            f"Mass mention limit set to {limit}." if limit > 0 else "Mass mention detection turned off."
+        ))
+
+async def setup(bot):
+    await bot.add_cog(AutoModeration(bot))
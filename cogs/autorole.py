@@ -4,6 +4,7 @@ import logging
 
 from utils.db_manager import db
 from utils.embed_creator import EmbedCreator
+from utils.raid_guard import raid_guard
 from config import CONFIG
 
 logger = logging.getLogger('discord_bot')
@@ -13,6 +14,7 @@ class Autorole(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
+        raid_guard.attach(bot)
         logger.info("Autorole cog initialized")
     
     @commands.Cog.listener()
@@ -33,6 +35,11 @@ class Autorole(commands.Cog):
             logger.warning(f"Autorole {role_id} not found in guild {member.guild.id}")
             return
         
+        # Hold the role back during a raid, it is assigned once raid mode ends
+        if raid_guard.observe(member):
+            raid_guard.defer_role(member, role)
+            return
+        
         # Add the role
         try:
             await member.add_roles(role, reason="Autorole")
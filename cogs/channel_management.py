@@ -3,6 +3,7 @@ from discord.ext import commands
 import logging
 from config import CONFIG
 from utils.embed_creator import EmbedCreator
+from utils.activity import activity
 
 logger = logging.getLogger('discord_bot')
 
@@ -12,10 +13,11 @@ class ChannelManagement(commands.Cog):
         self.bot = bot
         logger.info(f"ChannelManagement cog initialized")
     
-    @commands.command(name="unknown_method")
-    @commands.has_permissions(manage_guild=True)
-    async def unknown_method(self, ctx, *args):
-        """Auto-generated method from fixing indentation"""
+    @commands.command(name="lock")
+    @commands.has_permissions(manage_channels=True)
+    @commands.bot_has_permissions(manage_channels=True)
+    async def lock_channel(self, ctx, channel: discord.TextChannel = None, *, reason: str = "No reason provided"):
+        """Stop @everyone from sending messages in a channel"""
 
         # Default to current channel if none provided
         channel = channel or ctx.channel
@@ -325,28 +327,47 @@ class ChannelManagement(commands.Cog):
                 inline=True
             )
         
-        # Add message count if available
-        try:
-            message_count = 0
-            async for _ in channel.history(limit=None):
-                message_count += 1
-                if message_count >= 100:  # Cap at 100 for performance
-                    message_count = "100+"
-                    break
-            
-            if isinstance(message_count, int):
-                count_str = str(message_count)
-            else:
-                count_str = message_count
-                
-            embed.add_field(
-                name="💬 Message Count",
-                value=count_str,
-                inline=True
-            )
-        except:
-            pass
+        # Add message count and last activity tracked since the bot joined
+        message_count, last_message = activity.channel_stats(ctx.guild.id, channel.id)
+        embed.add_field(
+            name="💬 Message Count",
+            value=f"{message_count:,}",
+            inline=True
+        )
+        embed.add_field(
+            name="🕒 Last Activity",
+            value=f"<t:{int(last_message)}:R>" if last_message else "None tracked",
+            inline=True
+        )
+        
+        await ctx.send(embed=embed)
+    
+    @commands.command(name="busiestchannels", aliases=["topchannels"])
+    async def busiest_channels(self, ctx, limit: int = 10):
+        """Show the channels with the most messages"""
+        limit = max(1, min(limit, 25))
+        busiest = [
+            (channel, count, last)
+            for channel_id, count, last in activity.busiest_channels(ctx.guild.id, limit)
+            if (channel := ctx.guild.get_channel(channel_id))
+        ]
         
+        if not busiest:
+            await ctx.send(embed=EmbedCreator.create_info_embed(
+                "No Data",
+                "No channel activity has been tracked yet."
+            ))
+            return
+        
+        lines = [
+            f"`{i+1}.` {channel.mention} - **{count:,}** messages, last <t:{int(last)}:R>"
+            for i, (channel, count, last) in enumerate(busiest)
+        ]
+        embed = discord.Embed(
+            title="📈 Busiest Channels",
+            description="\n".join(lines),
+            color=CONFIG['colors']['info']
+        )
         await ctx.send(embed=embed)
 
 async def setup(bot):
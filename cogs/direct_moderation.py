@@ -6,48 +6,39 @@ import os
 import asyncio
 from datetime import datetime, timedelta
 from config import CONFIG
+from utils.ban_cache import ban_cache
 from utils.embed_creator import EmbedCreator
+from utils.case_log import case_log
+from utils.event_archive import event_archive
+from utils.purge import purge_engine
+from utils.raid_guard import raid_guard
+from utils.mass_action import mass_actioner
 
 logger = logging.getLogger('discord_bot')
 
+# Warnings shown per page
+CASES_PER_PAGE = 10
+
 class DirectModeration(commands.Cog):
     """Direct moderation commands without prefixes"""
     def __init__(self, bot):
         self.bot = bot
+        ban_cache.attach(bot)
+        raid_guard.attach(bot)
+        event_archive.attach(bot)
         logger.info(f"DirectModeration cog initialized")
     
-    @commands.command(name="unknown_method")
-    @commands.has_permissions(manage_guild=True)
-    async def unknown_method(self, ctx, *args):
-        """Auto-generated method from fixing indentation"""
-
-        guild_id = str(ctx.guild.id)
-        user_id = str(member.id)
-        
-        # Initialize guild and user entries if needed
-        if guild_id not in self.moderation_settings:
-            self.moderation_settings[guild_id] = {"warnings": {}}
-            
-        if "warnings" not in self.moderation_settings[guild_id]:
-            self.moderation_settings[guild_id]["warnings"] = {}
-            
-        if user_id not in self.moderation_settings[guild_id]["warnings"]:
-            self.moderation_settings[guild_id]["warnings"][user_id] = []
-        
-        # Add warning
-        warning = {
-            "reason": reason,
-            "timestamp": datetime.utcnow().isoformat(),
-            "moderator_id": str(ctx.author.id),
-            "moderator_name": str(ctx.author)
-        }
-        
-        self.moderation_settings[guild_id]["warnings"][user_id].append(warning)
-        self.save_settings()
+    @commands.command(name="warn")
+    @commands.has_permissions(manage_messages=True)
+    async def warn(self, ctx, member: discord.Member, *, reason="No reason provided"):
+        """Warn a member"""
+        # Append the warning to the case log
+        case_number = case_log.add_case(ctx.guild.id, "warn", member.id, ctx.author.id, str(ctx.author), reason)
+        warning_count = case_log.count_warnings(ctx.guild.id, member.id)
         
         # Create warning embed
         embed = discord.Embed(
-            title=f"⚠️ Warning",
+            title=f"⚠️ Warning (Case #{case_number})",
             description=f"{member.mention} has been warned.",
             color=CONFIG['colors']['warning']
         )
@@ -60,7 +51,7 @@ class DirectModeration(commands.Cog):
         
         embed.add_field(
             name="Warnings",
-            value=f"This user now has {len(self.moderation_settings[guild_id]['warnings'][user_id])} warnings",
+            value=f"This user now has {warning_count} warnings",
             inline=False
         )
         
@@ -93,17 +84,12 @@ class DirectModeration(commands.Cog):
     
     @commands.command(name="warnings")
     @commands.has_permissions(kick_members=True)
-    async def view_warnings(self, ctx, member: discord.Member):
+    async def view_warnings(self, ctx, member: discord.Member, page: int = 1):
         """View warnings for a member"""
-        guild_id = str(ctx.guild.id)
-        user_id = str(member.id)
+        warning_count = case_log.count_warnings(ctx.guild.id, member.id)
         
-        # Check if guild and user have warnings
-        if (guild_id not in self.moderation_settings or
-            "warnings" not in self.moderation_settings[guild_id] or
-            user_id not in self.moderation_settings[guild_id]["warnings"] or
-            not self.moderation_settings[guild_id]["warnings"][user_id]):
-            
+        # Check if the member has warnings
+        if warning_count == 0:
             embed = discord.Embed(
                 title=f"Warnings for {member}",
                 description=f"{member.mention} has no warnings.",
@@ -113,44 +99,37 @@ class DirectModeration(commands.Cog):
             await ctx.send(embed=embed)
             return
         
+        pages = (warning_count + CASES_PER_PAGE - 1) // CASES_PER_PAGE
+        page = max(1, min(page, pages))
+        
         # Create warnings embed
         embed = discord.Embed(
             title=f"Warnings for {member}",
-            description=f"{member.mention} has {len(self.moderation_settings[guild_id]['warnings'][user_id])} warnings.",
+            description=f"{member.mention} has {warning_count} warnings.",
             color=CONFIG['colors']['warning']
         )
         
-        # Add each warning
-        for i, warning in enumerate(self.moderation_settings[guild_id]["warnings"][user_id], 1):
-            # Parse timestamp
-            try:
-                timestamp = datetime.fromisoformat(warning["timestamp"])
-                time_str = timestamp.strftime("%Y-%m-%d %H:%M UTC")
-            except:
-                time_str = "Unknown date"
-                
-            # Add warning field
+        # Add each warning on this page
+        first = (page - 1) * CASES_PER_PAGE + 1
+        for i, warning in enumerate(case_log.get_warnings(ctx.guild.id, member.id, page, CASES_PER_PAGE), first):
+            time_str = datetime.utcfromtimestamp(warning["created_at"]).strftime("%Y-%m-%d %H:%M UTC")
             embed.add_field(
-                name=f"Warning #{i}",
-                value=f"**Reason:** {warning['reason']}\n**By:** {warning.get('moderator_name', 'Unknown')}\n**Date:** {time_str}",
+                name=f"Warning #{i} (Case #{warning['case_number']})",
+                value=f"**Reason:** {warning['reason']}\n**By:** {warning['moderator_name'] or 'Unknown'}\n**Date:** {time_str}",
                 inline=False
             )
-            
+        
+        embed.set_footer(text=f"Page {page}/{pages}")
         await ctx.send(embed=embed)
     
     @commands.command(name="clearwarnings")
     @commands.has_permissions(kick_members=True)
     async def clear_warnings(self, ctx, member: discord.Member):
         """Clear warnings for a member"""
-        guild_id = str(ctx.guild.id)
-        user_id = str(member.id)
+        warning_count = case_log.count_warnings(ctx.guild.id, member.id)
         
-        # Check if guild and user have warnings
-        if (guild_id not in self.moderation_settings or
-            "warnings" not in self.moderation_settings[guild_id] or
-            user_id not in self.moderation_settings[guild_id]["warnings"] or
-            not self.moderation_settings[guild_id]["warnings"][user_id]):
-            
+        # Check if the member has warnings
+        if warning_count == 0:
             embed = discord.Embed(
                 title=f"Warnings for {member}",
                 description=f"{member.mention} already has no warnings.",
@@ -160,22 +139,24 @@ class DirectModeration(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        # Get warning count
-        warning_count = len(self.moderation_settings[guild_id]["warnings"][user_id])
-        
-        # Clear warnings
-        self.moderation_settings[guild_id]["warnings"][user_id] = []
-        self.save_settings()
+        # Clearing is itself a case, earlier warnings stay in the log
+        case_number = case_log.add_case(ctx.guild.id, "clear_warnings", member.id, ctx.author.id, str(ctx.author))
         
         # Create embed
         embed = discord.Embed(
-            title=f"✅ Warnings Cleared",
+            title=f"✅ Warnings Cleared (Case #{case_number})",
             description=f"Cleared {warning_count} warnings for {member.mention}.",
             color=CONFIG['colors']['success']
         )
         
         await ctx.send(embed=embed)
     
+    @commands.command(name="modsearch")
+    @commands.has_permissions(kick_members=True)
+    async def mod_search(self, ctx, *, query=None):
+        """Search past cases and logs: user:@x mod:@y since:7d until:2024-01-31 type:case page:2 and free text"""
+        await event_archive.run_command(ctx, query, per_page=CASES_PER_PAGE)
+    
     @commands.command(name="kick")
     @commands.has_permissions(kick_members=True)
     @commands.bot_has_permissions(kick_members=True)
@@ -226,6 +207,7 @@ class DirectModeration(commands.Cog):
         # Kick the member
         try:
             await member.kick(reason=reason)
+            case_log.add_case(ctx.guild.id, "kick", member.id, ctx.author.id, str(ctx.author), reason)
             await ctx.send(embed=embed)
         except Exception as e:
             error_embed = discord.Embed(
@@ -285,6 +267,7 @@ class DirectModeration(commands.Cog):
         # Ban the member
         try:
             await member.ban(reason=reason)
+            case_log.add_case(ctx.guild.id, "ban", member.id, ctx.author.id, str(ctx.author), reason)
             await ctx.send(embed=embed)
         except Exception as e:
             error_embed = discord.Embed(
@@ -294,40 +277,64 @@ class DirectModeration(commands.Cog):
             )
             await ctx.send(embed=error_embed)
     
+    @commands.command(name="massban")
+    @commands.has_permissions(ban_members=True)
+    @commands.bot_has_permissions(ban_members=True)
+    async def mass_ban(self, ctx, *, args=None):
+        """Ban many users: IDs, mentions, joined:<minutes> or an attached ID list, then the reason"""
+        await mass_actioner.run_command(ctx, "ban", args)
+    
+    @commands.command(name="masskick")
+    @commands.has_permissions(kick_members=True)
+    @commands.bot_has_permissions(kick_members=True)
+    async def mass_kick(self, ctx, *, args=None):
+        """Kick many members: IDs, mentions, joined:<minutes> or an attached ID list, then the reason"""
+        await mass_actioner.run_command(ctx, "kick", args)
+    
     @commands.command(name="unban")
     @commands.has_permissions(ban_members=True)
     @commands.bot_has_permissions(ban_members=True)
     async def unban_member(self, ctx, *, user_name):
         """Unban a member from the server"""
-        # Get ban list
-        banned_users = [entry async for entry in ctx.guild.bans()]
+        # Look the user up in the indexed ban list
+        bans = await ban_cache.get(ctx.guild)
+        matches = bans.find(user_name)
+        
+        if len(matches) > 1:
+            embed = discord.Embed(
+                title="❌ Multiple Matches",
+                description="Several banned users match that name, unban by ID instead:\n" + "\n".join(
+                    f"`{entry.user.id}` {entry.user}" for entry in matches[:10]
+                ),
+                color=CONFIG['colors']['error']
+            )
+            await ctx.send(embed=embed)
+            return
         
-        # Find user in ban list
-        for ban_entry in banned_users:
-            user = ban_entry.user
+        if matches:
+            user = matches[0].user
             
-            # Check if username matches
-            if user.name.lower() == user_name.lower() or str(user).lower() == user_name.lower():
-                # Unban the user
-                try:
-                    await ctx.guild.unban(user)
-                    
-                    embed = discord.Embed(
-                        title=f"✅ User Unbanned",
-                        description=f"{user} has been unbanned from the server.",
-                        color=CONFIG['colors']['success']
-                    )
-                    
-                    await ctx.send(embed=embed)
-                    return
-                except Exception as e:
-                    error_embed = discord.Embed(
-                        title="❌ Error",
-                        description=f"Could not unban {user}: {str(e)}",
-                        color=CONFIG['colors']['error']
-                    )
-                    await ctx.send(embed=error_embed)
-                    return
+            # Unban the user
+            try:
+                await ctx.guild.unban(user)
+                case_log.add_case(ctx.guild.id, "unban", user.id, ctx.author.id, str(ctx.author))
+                
+                embed = discord.Embed(
+                    title=f"✅ User Unbanned",
+                    description=f"{user} has been unbanned from the server.",
+                    color=CONFIG['colors']['success']
+                )
+                
+                await ctx.send(embed=embed)
+                return
+            except Exception as e:
+                error_embed = discord.Embed(
+                    title="❌ Error",
+                    description=f"Could not unban {user}: {str(e)}",
+                    color=CONFIG['colors']['error']
+                )
+                await ctx.send(embed=error_embed)
+                return
         
         # User not found
         embed = discord.Embed(
@@ -338,42 +345,37 @@ class DirectModeration(commands.Cog):
         
         await ctx.send(embed=embed)
     
+    @commands.command(name="bansearch")
+    @commands.has_permissions(ban_members=True)
+    @commands.bot_has_permissions(ban_members=True)
+    async def ban_search(self, ctx, *, prefix):
+        """Search banned users by the start of their username"""
+        bans = await ban_cache.get(ctx.guild)
+        results = bans.search(prefix, limit=25)
+        
+        embed = discord.Embed(
+            title=f"🔨 Bans Matching '{prefix}'",
+            description="\n".join(
+                f"`{entry.user.id}` {entry.user}" + (f" - {entry.reason}" if entry.reason else "")
+                for entry in results
+            ) or "No banned users match that name.",
+            color=CONFIG['colors']['info']
+        )
+        embed.set_footer(text=f"{len(bans.by_id)} bans in total")
+        await ctx.send(embed=embed)
+    
+    @commands.command(name="raidmode")
+    @commands.has_permissions(manage_guild=True)
+    async def raid_mode(self, ctx, mode: str = None):
+        """Show raid mode status, or turn it on or off"""
+        await raid_guard.run_command(ctx, mode)
+    
     @commands.command(name="purge")
     @commands.has_permissions(manage_messages=True)
-    @commands.bot_has_permissions(manage_messages=True)
-    async def purge_messages(self, ctx, amount: int):
-        """Delete a number of messages from the channel"""
-        # Check amount
-        if amount < 1 or amount > 100:
-            embed = discord.Embed(
-                title="❌ Invalid Amount",
-                description="You can only delete between 1 and 100 messages at a time.",
-                color=CONFIG['colors']['error']
-            )
-            await ctx.send(embed=embed)
-            return
-        
-        # Delete messages
-        try:
-            deleted = await ctx.channel.purge(limit=amount + 1)  # +1 to include command message
-            
-            embed = discord.Embed(
-                title=f"🧹 Channel Purged",
-                description=f"Deleted {len(deleted) - 1} messages.",
-                color=CONFIG['colors']['success']
-            )
-            
-            # Send and delete confirmation message
-            confirmation = await ctx.send(embed=embed)
-            await asyncio.sleep(3)
-            await confirmation.delete()
-        except Exception as e:
-            error_embed = discord.Embed(
-                title="❌ Error",
-                description=f"Could not delete messages: {str(e)}",
-                color=CONFIG['colors']['error']
-            )
-            await ctx.send(embed=error_embed)
+    @commands.bot_has_permissions(manage_messages=True, read_message_history=True)
+    async def purge_messages(self, ctx, amount: int, *filters):
+        """Scan the last messages of the channel (or mentioned channels) and delete those matching the filters"""
+        await purge_engine.run_command(ctx, amount, filters)
 
 async def setup(bot):
     await bot.add_cog(DirectModeration(bot))
\ No newline at end of file
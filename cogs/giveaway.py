@@ -1,13 +1,14 @@
 import discord
 from discord.ext import commands, tasks
 import asyncio
-import random
 import logging
 import re
 from datetime import datetime, timedelta
 
 from utils.database import db
 from utils.embed_creator import EmbedCreator
+from utils.giveaway_draw import giveaway_drawer
+from utils.scheduler import scheduler
 from config import CONFIG
 
 logger = logging.getLogger('discord_bot')
@@ -26,13 +27,21 @@ class Giveaway(commands.Cog):
     """Giveaway system"""
     def __init__(self, bot):
         self.bot = bot
+        scheduler.attach(bot)
+        scheduler.register("giveaway_end", self.end_scheduled_giveaway)
         logger.info(f"Giveaway cog initialized")
     
-    @commands.command(name="unknown_method")
+    def convert_time_to_seconds(self, duration):
+        """Convert a duration like 1h30m to seconds, or None if it is invalid"""
+        matches = TIME_REGEX.findall(duration.lower())
+        if not matches or "".join(value + unit for value, unit in matches) != duration.lower():
+            return None
+        return sum(int(value) * TIME_DICT[unit] for value, unit in matches)
+    
+    @commands.hybrid_command(name="gstart", description="Start a giveaway")
     @commands.has_permissions(manage_guild=True)
-    async def unknown_method(self, ctx, *args):
-        """Auto-generated method from fixing indentation"""
-
+    async def gstart(self, ctx, duration: str, winners: int, *, prize: str):
+        """Start a giveaway in this channel"""
         # Check duration format
         seconds = self.convert_time_to_seconds(duration)
         if not seconds:
@@ -56,7 +65,15 @@ class Giveaway(commands.Cog):
         end_time = datetime.now() + timedelta(seconds=seconds)
         
         # Create embed
-        embed = EmbedCreator.create_giveaway_embed(prize, ctx.author, end_time, winners)
+        embed = discord.Embed(
+            title=f"{CONFIG['emojis']['giveaway']} {prize}",
+            description=f"React with {CONFIG['emojis']['giveaway']} to enter!\n"
+                        f"Ends: <t:{int(end_time.timestamp())}:R>\n"
+                        f"Hosted by: {ctx.author.mention}",
+            color=CONFIG['colors']['default'],
+            timestamp=end_time
+        )
+        embed.set_footer(text=f"{winners} winner{'s' if winners != 1 else ''} | Ends at")
         
         # Send message
         message = await ctx.send(embed=embed)
@@ -66,15 +83,23 @@ class Giveaway(commands.Cog):
         
         # Store giveaway in database
         db.create_giveaway(
-            ctx.guild.id,
-            ctx.channel.id,
             message.id,
+            ctx.channel.id,
+            ctx.guild.id,
             prize,
             ctx.author.id,
-            end_time,
+            int(end_time.timestamp()),
             winners
         )
         
+        # End it automatically, even across restarts
+        scheduler.schedule(
+            "giveaway_end",
+            {"guild_id": str(ctx.guild.id), "channel_id": str(ctx.channel.id), "message_id": str(message.id)},
+            delay=seconds,
+            key=f"giveaway:{message.id}"
+        )
+        
         # Send confirmation to command user if different from giveaway channel
         if ctx.channel.id != message.channel.id:
             confirm_embed = EmbedCreator.create_success_embed(
@@ -83,12 +108,44 @@ class Giveaway(commands.Cog):
             )
             await ctx.send(embed=confirm_embed)
     
-    @commands.Cog.listener()
-    async def on_raw_reaction_add(self, payload):
-        """Handle reactions for giveaways"""
+    async def end_giveaway(self, giveaway_data):
+        """Draw the winners of a giveaway, announce them and mark it ended"""
+        giveaway = giveaway_data['data']
+        channel = self.bot.get_channel(int(giveaway_data['channel_id']))
+        try:
+            message = await channel.fetch_message(int(giveaway_data['message_id']))
+        except (AttributeError, discord.NotFound, discord.Forbidden):
+            logger.error(f"Giveaway message {giveaway_data['message_id']} could not be found")
+            db.end_giveaway(giveaway_data['message_id'])
+            return
+        
+        result = await giveaway_drawer.draw(message, CONFIG['emojis']['giveaway'], giveaway['winners'])
+        giveaway_drawer.record(message, result)
+        db.end_giveaway(giveaway_data['message_id'])
+        
+        if result.winners:
+            winners_text = ", ".join(winner.mention for winner in result.winners)
+            await channel.send(
+                f"🎉 Congratulations {winners_text}! You won **{giveaway['prize']}**!",
+                allowed_mentions=discord.AllowedMentions(users=True)
+            )
+        else:
+            await channel.send(f"No valid entrants for the giveaway of **{giveaway['prize']}**.")
+    
+    async def end_scheduled_giveaway(self, payload):
+        """End a giveaway when its scheduler job is due"""
+        giveaway = db.get_giveaway(payload["message_id"])
+        if not giveaway or giveaway.get("ended"):
+            return
+        await self.end_giveaway({**payload, 'end_time': datetime.now(), 'data': giveaway})
+    
+    @commands.hybrid_command(name="gend", description="End a giveaway early")
+    @commands.has_permissions(manage_guild=True)
+    async def gend(self, ctx, message_id: str):
+        """End a giveaway now and draw its winners"""
         # Get the giveaway
-        giveaway = db.get_giveaway(ctx.guild.id, message_id)
-        if not giveaway:
+        giveaway = db.get_giveaway(message_id)
+        if not giveaway or giveaway.get("ended"):
             embed = EmbedCreator.create_error_embed(
                 "Giveaway Not Found",
                 "Could not find an active giveaway with that message ID."
@@ -115,6 +172,7 @@ class Giveaway(commands.Cog):
         await ctx.send(embed=embed)
         
         # Force end time to now
+        scheduler.cancel(key=f"giveaway:{message_id}")
         giveaway_data = {
             'guild_id': str(ctx.guild.id),
             'channel_id': str(channel_id),
@@ -130,7 +188,7 @@ class Giveaway(commands.Cog):
     async def greroll(self, ctx, message_id: str):
         """Reroll a giveaway to select new winners"""
         # Get the giveaway
-        giveaway = db.get_giveaway(ctx.guild.id, message_id)
+        giveaway = db.get_giveaway(message_id)
         if not giveaway:
             embed = EmbedCreator.create_error_embed(
                 "Giveaway Not Found",
@@ -139,24 +197,26 @@ class Giveaway(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        # Check if giveaway has participants
-        if not giveaway.get('participants'):
+        # Entrants are read from the reactions, which are always current
+        channel = ctx.guild.get_channel(int(giveaway['channel_id']))
+        try:
+            message = await channel.fetch_message(int(message_id))
+        except (AttributeError, discord.NotFound, discord.Forbidden):
             embed = EmbedCreator.create_error_embed(
-                "No Participants",
-                "This giveaway doesn't have any participants to reroll."
+                "Message Not Found",
+                "The giveaway message could not be found."
             )
             await ctx.send(embed=embed)
             return
         
-        # Select new winners
-        winners_count = min(giveaway['winners'], len(giveaway['participants']))
-        winner_ids = random.sample(giveaway['participants'], winners_count)
+        # Previous winners can't win again
+        previous = set()
+        for draw in giveaway_drawer.history(message_id):
+            previous.update(draw["winners"])
         
-        winners = []
-        for winner_id in winner_ids:
-            winner = ctx.guild.get_member(int(winner_id))
-            if winner:
-                winners.append(winner)
+        result = await giveaway_drawer.draw(message, CONFIG['emojis']['giveaway'], giveaway['winners'], exclude=previous)
+        giveaway_drawer.record(message, result, reroll=True)
+        winners = result.winners
         
         if not winners:
             embed = EmbedCreator.create_error_embed(
@@ -173,17 +233,42 @@ class Giveaway(commands.Cog):
             "Giveaway Rerolled",
             f"New winners for **{giveaway['prize']}**: {winners_text}"
         )
+        embed.set_footer(text=f"{result.entrants} entrants | Seed: {result.seed}")
         
         await ctx.send(embed=embed)
         
         # Send notification in the original channel
-        channel = ctx.guild.get_channel(int(giveaway['channel_id']))
-        if channel:
-            await channel.send(
-                f"🎉 The giveaway for **{giveaway['prize']}** has been rerolled!\n"
-                f"New winners: {winners_text}",
-                allowed_mentions=discord.AllowedMentions(users=True)
+        await channel.send(
+            f"🎉 The giveaway for **{giveaway['prize']}** has been rerolled!\n"
+            f"New winners: {winners_text}",
+            allowed_mentions=discord.AllowedMentions(users=True)
+        )
+    
+    @commands.hybrid_command(name="gaudit", description="Show the recorded draws of a giveaway")
+    @commands.has_permissions(manage_guild=True)
+    async def gaudit(self, ctx, message_id: str):
+        """Show seeds, entrant counts and winners of every draw for a giveaway"""
+        draws = giveaway_drawer.history(message_id)
+        if not draws:
+            embed = EmbedCreator.create_info_embed(
+                "No Draws",
+                "No draws have been recorded for that giveaway."
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        embed = EmbedCreator.create_info_embed(
+            "Giveaway Draws",
+            f"Draws for giveaway `{message_id}`"
+        )
+        for i, draw in enumerate(draws[-25:], 1):
+            winners = ", ".join(f"<@{user_id}>" for user_id in draw["winners"]) or "None"
+            embed.add_field(
+                name=f"{'Reroll' if draw['reroll'] else 'Draw'} {i} - <t:{draw['time']}:f>",
+                value=f"Seed: `{draw['seed']}`\nEntrants: {draw['entrants']} ({draw['skipped']} skipped)\nWinners: {winners}",
+                inline=False
             )
+        await ctx.send(embed=embed)
 
 async def setup(bot):
     await bot.add_cog(Giveaway(bot))
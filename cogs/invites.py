@@ -15,20 +15,25 @@ class Invites(commands.Cog):
         self.bot = bot
         logger.info(f"Invites cog initialized")
     
-    @commands.command(name="unknown_method")
-    @commands.has_permissions(manage_guild=True)
-    async def unknown_method(self, ctx, *args):
-        """Auto-generated method from fixing indentation"""
-
+    @commands.hybrid_command(name="invites", description="Check your invite stats or someone else's")
+    @commands.bot_has_permissions(manage_guild=True)
+    async def invites(self, ctx, member: discord.Member = None):
+        """Show how many members joined through someone's invites"""
         # Default to command author if no member specified
         if member is None:
             member = ctx.author
         
-        # Get invite stats
-        stats = db.get_invite_stats(ctx.guild.id, member.id)
+        # Get invite stats from the guild's current invites
+        invites = [invite for invite in await ctx.guild.invites() if invite.inviter and invite.inviter.id == member.id]
+        uses = sum(invite.uses or 0 for invite in invites)
         
         # Create embed
-        embed = EmbedCreator.create_invite_stats_embed(member, stats)
+        embed = discord.Embed(
+            title=f"📨 Invites of {member.display_name}",
+            description=f"{member.mention} has **{uses}** invite uses across **{len(invites)}** active invite links.",
+            color=CONFIG['colors']['info']
+        )
+        embed.set_thumbnail(url=member.display_avatar.url)
         
         await ctx.send(embed=embed)
 
@@ -0,0 +1,165 @@
+import discord
+from discord.ext import commands
+import logging
+import asyncio
+
+from utils.db_manager import db
+from utils.embed_creator import EmbedCreator
+from utils.level_roles import level_role_sync
+from config import CONFIG
+
+logger = logging.getLogger('discord_bot')
+
+class LevelRoles(commands.Cog):
+    """Level reward roles and bulk reconciliation"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        logger.info("LevelRoles cog initialized")
+
+    def start_sync(self, guild, revoke=()):
+        """Start a background reconciliation for a guild"""
+        settings = db.get_level_settings(guild.id)
+        levels = db.get_guild_levels(guild.id)
+        return level_role_sync.sync_guild(
+            guild,
+            levels,
+            settings.get("roles", {}),
+            stack=CONFIG['levels'].get('stack_level_roles', True),
+            revoke=revoke
+        )
+
+    async def report_progress(self, ctx, job, interval=5):
+        """Keep one status message updated until the job finishes"""
+        status = await ctx.send(embed=EmbedCreator.create_loading_embed(
+            "Syncing Level Roles",
+            job.progress_text()
+        ))
+
+        while not job.is_finished:
+            try:
+                await asyncio.wait_for(job.finished.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                if job.is_finished:
+                    await status.edit(embed=EmbedCreator.create_success_embed(
+                        "Level Roles Synced",
+                        job.progress_text()
+                    ))
+                else:
+                    await status.edit(embed=EmbedCreator.create_loading_embed(
+                        "Syncing Level Roles",
+                        job.progress_text()
+                    ))
+            except discord.HTTPException:
+                # Status message was deleted, the sync keeps running regardless
+                return
+
+        if job.total == 0:
+            await status.edit(embed=EmbedCreator.create_info_embed(
+                "Level Roles Synced",
+                "Every member already has the correct level roles."
+            ))
+
+    async def sync_and_report(self, ctx):
+        job = self.start_sync(ctx.guild)
+        self.bot.loop.create_task(self.report_progress(ctx, job))
+
+    @commands.hybrid_group(name="levelrole", description="Manage roles rewarded at specific levels", invoke_without_command=True)
+    @commands.has_permissions(manage_roles=True)
+    async def levelrole(self, ctx):
+        """Show the configured level roles"""
+        roles = db.get_level_settings(ctx.guild.id).get("roles", {})
+
+        if not roles:
+            embed = EmbedCreator.create_info_embed(
+                "Level Roles",
+                f"No level roles are set. Use `{CONFIG['prefix']}levelrole add <level> @role` to add one."
+            )
+        else:
+            lines = []
+            for level, role_id in sorted(roles.items(), key=lambda item: int(item[0])):
+                role = ctx.guild.get_role(int(role_id))
+                lines.append(f"Level **{level}** → {role.mention if role else f'Deleted role ({role_id})'}")
+            embed = EmbedCreator.create_info_embed("Level Roles", "\n".join(lines))
+
+        await ctx.send(embed=embed)
+
+    @levelrole.command(name="add", description="Reward a role at a level")
+    @commands.has_permissions(manage_roles=True)
+    async def levelrole_add(self, ctx, level: int, role: discord.Role):
+        """Reward a role at a level and update members who already qualify"""
+        if level < 1:
+            await ctx.send(embed=EmbedCreator.create_error_embed(
+                "Invalid Level",
+                "The level must be at least 1."
+            ))
+            return
+
+        if ctx.guild.me.top_role <= role or role.managed:
+            await ctx.send(embed=EmbedCreator.create_error_embed(
+                "Permission Error",
+                "I can't assign that role. Please move my role above it in the server settings."
+            ))
+            return
+
+        roles = dict(db.get_level_settings(ctx.guild.id).get("roles", {}))
+        roles[str(level)] = str(role.id)
+
+        if not db.set_level_settings(ctx.guild.id, roles=roles):
+            await ctx.send(embed=EmbedCreator.create_error_embed(
+                "Database Error",
+                "Failed to save the level role. Please try again later."
+            ))
+            return
+
+        await ctx.send(embed=EmbedCreator.create_success_embed(
+            "Level Role Added",
+            f"Members reaching level **{level}** will receive {role.mention}."
+        ))
+        await self.sync_and_report(ctx)
+
+    @levelrole.command(name="remove", description="Stop rewarding a role at a level")
+    @commands.has_permissions(manage_roles=True)
+    async def levelrole_remove(self, ctx, level: int):
+        """Remove a level reward and take it back from members"""
+        roles = dict(db.get_level_settings(ctx.guild.id).get("roles", {}))
+
+        if str(level) not in roles:
+            await ctx.send(embed=EmbedCreator.create_info_embed(
+                "Level Roles",
+                f"No role is rewarded at level **{level}**."
+            ))
+            return
+
+        role_id = roles.pop(str(level))
+        db.set_level_settings(ctx.guild.id, roles=roles)
+
+        await ctx.send(embed=EmbedCreator.create_success_embed(
+            "Level Role Removed",
+            f"<@&{role_id}> is no longer rewarded at level **{level}**."
+        ))
+
+        # The removed role is no longer a reward, so strip it in the same pass
+        job = self.start_sync(ctx.guild, revoke=[role_id])
+        self.bot.loop.create_task(self.report_progress(ctx, job))
+
+    @levelrole.command(name="sync", description="Give and remove level roles for every member")
+    @commands.has_permissions(manage_roles=True)
+    @commands.bot_has_permissions(manage_roles=True)
+    async def levelrole_sync(self, ctx):
+        """Reconcile level roles for the whole server in the background"""
+        job = level_role_sync.get_job(ctx.guild.id)
+        if job and not job.is_finished:
+            await ctx.send(embed=EmbedCreator.create_info_embed(
+                "Sync Already Running",
+                job.progress_text()
+            ))
+            return
+
+        await self.sync_and_report(ctx)
+
+async def setup(bot):
+    await bot.add_cog(LevelRoles(bot))
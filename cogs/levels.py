@@ -1,13 +1,10 @@
 import discord
 from discord.ext import commands
-import random
 import logging
 import datetime
-import json
-import os
 from utils.helpers import Helpers
-from utils.data_manager import DataManager
 from utils.embed_creator import EmbedCreator
+from utils.xp_engine import xp_engine
 from config import CONFIG
 
 logger = logging.getLogger('discord_bot')
@@ -16,6 +13,7 @@ class Levels(commands.Cog):
     """Level tracking system"""
     def __init__(self, bot):
         self.bot = bot
+        xp_engine.attach(bot)
         logger.info(f"Levels cog initialized")
     
     @commands.command(name="unknown_method")
@@ -27,8 +25,7 @@ class Levels(commands.Cog):
             member = ctx.author
             
         # Get user data
-        user_key = f"user_{ctx.guild.id}_{member.id}"
-        user_data = await self.data_manager.get(user_key, {'xp': 0, 'level': 0, 'messages': 0})
+        user_data = xp_engine.get_user(ctx.guild.id, member.id)
         
         xp = user_data.get('xp', 0)
         level = user_data.get('level', 0)
@@ -79,39 +76,15 @@ class Levels(commands.Cog):
         if type.lower() not in ["levels", "messages", "invites"]:
             type = "levels"  # Default to levels
             
-        # Get all data
-        all_data = await self.data_manager.get_all()
-        
-        # Filter users from this guild
-        guild_users = []
-        for key, data in all_data.items():
-            if key.startswith(f"user_{ctx.guild.id}_"):
-                try:
-                    user_id = int(key.split('_')[2])
-                    
-                    if type.lower() == "levels":
-                        value = data.get('level', 0)
-                        secondary = data.get('xp', 0)
-                    elif type.lower() == "messages":
-                        value = data.get('messages', 0)
-                        secondary = 0
-                    # Invites are handled by a different cog
-                    else:
-                        continue
-                        
-                    guild_users.append({
-                        'user_id': user_id,
-                        'value': value,
-                        'secondary': secondary
-                    })
-                except (IndexError, ValueError):
-                    continue
-        
-        # Sort users by value (descending)
-        guild_users.sort(key=lambda x: (x['value'], x['secondary']), reverse=True)
+        # Invites are handled by a different cog
+        if type.lower() == "levels":
+            top = await xp_engine.leaderboard(ctx.guild.id, "level", 10)
+            value_key = "level"
+        else:
+            top = await xp_engine.leaderboard(ctx.guild.id, "messages", 10)
+            value_key = "messages"
         
-        # Take top 10
-        top_users = guild_users[:10]
+        top_users = [{'user_id': data['user_id'], 'value': data[value_key]} for data in top]
         
         if not top_users:
             await ctx.send(f"No data available for the {type} leaderboard.")
@@ -154,13 +127,9 @@ class Levels(commands.Cog):
     @commands.has_permissions(manage_guild=True)
     async def leveling(self, ctx):
         """Manage leveling system settings"""
-        guild_key = f"guild_{ctx.guild.id}"
-        guild_settings = await self.data_manager.get(guild_key, {})
-        
         # Check if resetting to default
         if isinstance(channel, str) and channel.lower() == "reset":
-            if 'level_up_channel_id' in guild_settings:
-                del guild_settings['level_up_channel_id']
+            xp_engine.set_settings(ctx.guild.id, channel_id=0)
                 
             embed = discord.Embed(
                 title="ℹ️ Level-Up Channel Reset",
@@ -169,7 +138,7 @@ class Levels(commands.Cog):
             )
         elif channel:
             # Set new channel
-            guild_settings['level_up_channel_id'] = channel.id
+            xp_engine.set_settings(ctx.guild.id, channel_id=channel.id)
             
             embed = discord.Embed(
                 title="✅ Level-Up Channel Set",
@@ -178,8 +147,8 @@ class Levels(commands.Cog):
             )
         else:
             # Show current setting
-            current_channel_id = guild_settings.get('level_up_channel_id')
-            current_channel = ctx.guild.get_channel(current_channel_id) if current_channel_id else None
+            current_channel_id = xp_engine.get_settings(ctx.guild.id).get('channel_id')
+            current_channel = ctx.guild.get_channel(int(current_channel_id)) if current_channel_id else None
             
             if current_channel:
                 description = f"Level-up messages are currently sent in {current_channel.mention}."
@@ -203,9 +172,6 @@ class Levels(commands.Cog):
             await ctx.send(embed=embed)
             return
             
-        # Save settings
-        await self.data_manager.set(guild_key, guild_settings)
-        
         # Send confirmation
         await ctx.send(embed=embed)
 
@@ -2,8 +2,11 @@ import discord
 from discord.ext import commands
 import logging
 import datetime
+import json
 import os
 from config import CONFIG
+from utils.raid_guard import raid_guard
+from utils.event_archive import event_archive
 
 logger = logging.getLogger('discord_bot')
 
@@ -11,13 +14,53 @@ class Logging(commands.Cog):
     """Server logging system"""
     def __init__(self, bot):
         self.bot = bot
+        raid_guard.attach(bot)
+        event_archive.attach(bot)
+        raid_guard.register_flush("join_log", self.log_join_batch)
+        self.settings_file = "data/logging_settings.json"
+        # guild ID -> log channel ID
+        self.log_channels = {}
+        self.load_settings()
         logger.info(f"Logging cog initialized")
     
-    @commands.command(name="unknown_method")
+    def load_settings(self):
+        """Load log channels from file"""
+        try:
+            with open(self.settings_file, "r") as f:
+                settings = json.load(f)
+            self.log_channels = {int(guild_id): int(channel_id) for guild_id, channel_id in settings.get("log_channels", {}).items()}
+        except FileNotFoundError:
+            self.log_channels = {}
+        except Exception as e:
+            logger.error(f"Error loading logging settings: {e}")
+            self.log_channels = {}
+    
+    def save_settings(self):
+        """Save log channels to file"""
+        try:
+            os.makedirs(os.path.dirname(self.settings_file), exist_ok=True)
+            with open(self.settings_file, "w") as f:
+                json.dump({"log_channels": {str(guild_id): channel_id for guild_id, channel_id in self.log_channels.items()}}, f)
+        except Exception as e:
+            logger.error(f"Error saving logging settings: {e}")
+    
+    @commands.hybrid_group(name="logs", description="Manage server logging", invoke_without_command=True)
     @commands.has_permissions(manage_guild=True)
-    async def unknown_method(self, ctx, *args):
-        """Auto-generated method from fixing indentation"""
-
+    async def logs(self, ctx):
+        """Show where server logs are sent"""
+        channel_id = self.log_channels.get(ctx.guild.id)
+        embed = discord.Embed(
+            title="📝 Server Logging",
+            description=f"Server logs are sent to <#{channel_id}>." if channel_id else "Server logging is disabled.",
+            color=CONFIG['colors']['info']
+        )
+        embed.set_footer(text=f"Use {CONFIG['prefix']}logs on #channel or {CONFIG['prefix']}logs off")
+        await ctx.send(embed=embed)
+    
+    @logs.command(name="on", description="Enable server logging in a channel")
+    @commands.has_permissions(manage_guild=True)
+    async def logs_on(self, ctx, channel: discord.TextChannel):
+        """Enable server logging in a channel"""
         # Update log channel
         self.log_channels[ctx.guild.id] = channel.id
         self.save_settings()
@@ -68,12 +111,39 @@ class Logging(commands.Cog):
         
         await ctx.send(embed=embed)
     
-    @logs.command(name="off")
+    @logs.command(name="off", description="Disable server logging")
     @commands.has_permissions(manage_guild=True)
     async def logs_off(self, ctx):
         """Disable server logging"""
+        if ctx.guild.id not in self.log_channels:
+            embed = discord.Embed(
+                title="❌ Logging Not Enabled",
+                description="Server logging is already disabled.",
+                color=CONFIG['colors']['error']
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        del self.log_channels[ctx.guild.id]
+        self.save_settings()
+        
+        embed = discord.Embed(
+            title="✅ Logging Disabled",
+            description="Server logs will no longer be sent. Events are still archived for searching.",
+            color=CONFIG['colors']['success']
+        )
+        await ctx.send(embed=embed)
+    
+    async def log_event(self, guild, title, description, color=None, fields=None, thumbnail=None, user=None):
+        """Archive an event and send it to the guild's log channel"""
         if not guild:
             return
+        
+        # Archive the event so it can be searched later
+        body = description or ""
+        if fields:
+            body += "\n" + "\n".join(f"{name}: {value}" for name, value, inline in fields)
+        event_archive.record(guild.id, "log", title, body, user_id=user.id if user else None)
             
         # Check if logging is enabled for this guild
         log_channel_id = self.log_channels.get(guild.id)
@@ -148,6 +218,7 @@ class Logging(commands.Cog):
             
         await self.log_event(
             guild=message.guild,
+            user=message.author,
             title="🗑️ Message Deleted",
             description=f"A message was deleted in {message.channel.mention}",
             color=CONFIG['colors']['error'],
@@ -187,6 +258,7 @@ class Logging(commands.Cog):
             
         await self.log_event(
             guild=before.guild,
+            user=before.author,
             title="✏️ Message Edited",
             description=f"A message was edited in {before.channel.mention}",
             color=CONFIG['colors']['warning'],
@@ -199,6 +271,11 @@ class Logging(commands.Cog):
         """Log member joins"""
         if member.bot:
             return
+        
+        # Log raid joins as one summary per interval
+        if raid_guard.observe(member):
+            raid_guard.aggregate("join_log", member)
+            return
             
         # Calculate account age
         account_age = datetime.datetime.now() - member.created_at
@@ -220,6 +297,7 @@ class Logging(commands.Cog):
             
         await self.log_event(
             guild=member.guild,
+            user=member,
             title="👋 Member Joined",
             description=f"{member.mention} joined the server",
             color=CONFIG['colors']['success'],
@@ -227,6 +305,42 @@ class Logging(commands.Cog):
             thumbnail=member.display_avatar.url
         )
     
+    async def log_join_batch(self, guild, members):
+        """Log the joins collected during raid mode as one event"""
+        new_accounts = sum(raid_guard.is_new_account(member) for member in members)
+        mentions = " ".join(member.mention for member in members[:30])
+        if len(members) > 30:
+            mentions += f" and {len(members) - 30} more"
+        
+        await self.log_event(
+            guild=guild,
+            title=f"👋 {len(members)} Members Joined (Raid Mode)",
+            description=mentions,
+            color=CONFIG['colors']['warning'],
+            fields=[("New Accounts", f"{new_accounts} of {len(members)}", True)]
+        )
+    
+    @commands.Cog.listener()
+    async def on_raid_start(self, guild, state):
+        """Log a guild switching into raid mode"""
+        await self.log_event(
+            guild=guild,
+            title="🚨 Raid Mode Enabled",
+            description=f"{len(state.joins)} members joined within {raid_guard.window_seconds} seconds. "
+                        "Autoroles are held back and welcome and join logs are batched.",
+            color=CONFIG['colors']['error']
+        )
+    
+    @commands.Cog.listener()
+    async def on_raid_end(self, guild, state):
+        """Log the end of raid mode"""
+        await self.log_event(
+            guild=guild,
+            title="✅ Raid Mode Ended",
+            description=f"{state.raid_joins} members joined during raid mode.",
+            color=CONFIG['colors']['success']
+        )
+    
     @commands.Cog.listener()
     async def on_member_remove(self, member):
         """Log member leaves"""
@@ -251,6 +365,7 @@ class Logging(commands.Cog):
             
         await self.log_event(
             guild=member.guild,
+            user=member,
             title="🚶 Member Left",
             description=f"`{member.name}` left the server",
             color=CONFIG['colors']['error'],
@@ -274,6 +389,7 @@ class Logging(commands.Cog):
                 
             await self.log_event(
                 guild=after.guild,
+                user=after,
                 title="📝 Nickname Changed",
                 description=f"{after.mention} changed their nickname",
                 color=CONFIG['colors']['info'],
@@ -298,6 +414,7 @@ class Logging(commands.Cog):
                 
             await self.log_event(
                 guild=after.guild,
+                user=after,
                 title="🏷️ Roles Added",
                 description=f"{after.mention} was given new roles",
                 color=CONFIG['colors']['success'],
@@ -318,6 +435,7 @@ class Logging(commands.Cog):
                 
             await self.log_event(
                 guild=after.guild,
+                user=after,
                 title="🏷️ Roles Removed",
                 description=f"{after.mention} had roles removed",
                 color=CONFIG['colors']['error'],
@@ -333,6 +451,9 @@ class Logging(commands.Cog):
             
         command_name = ctx.command.qualified_name
         command_args = ctx.message.content[len(f"{ctx.prefix}{command_name}"):]
+        # Commands that delete their own message, e.g. to hide banned terms, keep their arguments out of the logs
+        if ctx.command.extras.get("redact_args") and command_args.strip():
+            command_args = " [redacted]"
         
         fields = [
             ("User", f"{ctx.author.mention} `{ctx.author.name}`", True),
@@ -342,6 +463,7 @@ class Logging(commands.Cog):
             
         await self.log_event(
             guild=ctx.guild,
+            user=ctx.author,
             title="🤖 Command Used",
             description=f"{ctx.author.mention} used a command",
             color=CONFIG['colors']['info'],
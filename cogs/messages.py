@@ -1,36 +1,74 @@
 import discord
 from discord.ext import commands
 import logging
+import datetime
 
 from utils.database import db
+from utils.activity import activity
+from utils.analytics import analytics
 from utils.embed_creator import EmbedCreator
 from config import CONFIG
 
 logger = logging.getLogger('discord_bot')
 
+# Leaderboard windows answered from the activity rings: period -> (hours, days)
+WINDOWS = {
+    "24h": (24, None),
+    "7d": (None, 7),
+    "30d": (None, 30)
+}
+
 class Messages(commands.Cog):
     """Message tracking system"""
     def __init__(self, bot):
         self.bot = bot
         logger.info(f"Messages cog initialized")
     
-    @commands.command(name="unknown_method")
-    @commands.has_permissions(manage_guild=True)
-    async def unknown_method(self, ctx, *args):
-        """Auto-generated method from fixing indentation"""
-
+    async def cog_unload(self):
+        activity.save()
+        analytics.save()
+    
+    @staticmethod
+    def sketch_mode(guild_id):
+        """Check if a guild keeps approximate sketches instead of exact per-member activity"""
+        return guild_id in CONFIG['analytics']['sketch_guilds']
+    
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        """Record message activity for the time series and sketches"""
+        if message.author.bot or not message.guild:
+            return
+        timestamp = message.created_at.timestamp()
+        sketch_mode = self.sketch_mode(message.guild.id)
+        activity.record(message.guild.id, message.author.id, timestamp=timestamp,
+                        per_user=not sketch_mode, channel_id=message.channel.id)
+        if sketch_mode:
+            analytics.record(message.guild.id, message.channel.id, message.author.id, timestamp=timestamp)
+    
+    @commands.hybrid_command(name="messages", description="Check your message count or someone else's")
+    async def messages(self, ctx, member: discord.Member = None):
+        """Show how many messages a member has sent"""
         # Default to command author if no member specified
         if member is None:
             member = ctx.author
         
         # Get message stats
-        stats = db.get_message_stats(ctx.guild.id, member.id)
+        count = db.get_message_count(ctx.guild.id, member.id)
         
         # Create embed
-        embed = EmbedCreator.create_message_stats_embed(member, stats)
+        embed = discord.Embed(
+            title=f"💬 Messages of {member.display_name}",
+            description=f"{member.mention} has sent **{count:,}** messages in this server.",
+            color=CONFIG['colors']['info']
+        )
+        embed.set_thumbnail(url=member.display_avatar.url)
         
         await ctx.send(embed=embed)
     
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        activity.forget_channel(channel.guild.id, channel.id)
+    
     @commands.hybrid_command(name="resetmessages", description="Reset message stats for a user")
     @commands.has_permissions(manage_guild=True)
     async def resetmessages(self, ctx, member: discord.Member):
@@ -44,6 +82,7 @@ class Messages(commands.Cog):
                 'daily': {}
             }
             db._save_data()
+            activity.reset_user(ctx.guild.id, member.id)
             
             embed = EmbedCreator.create_success_embed(
                 "Stats Reset",
@@ -60,16 +99,35 @@ class Messages(commands.Cog):
     @commands.hybrid_command(name="topmessages", description="Show top message senders in the server")
     async def topmessages(self, ctx, period: str = "all_time"):
         """Show the top message senders"""
-        if period.lower() not in ["all_time", "today"]:
+        period = period.lower()
+        if period not in ["all_time", "today", *WINDOWS]:
             embed = EmbedCreator.create_error_embed(
                 "Invalid Period",
-                "Valid periods are: all_time, today"
+                f"Valid periods are: all_time, today, {', '.join(WINDOWS)}"
             )
             await ctx.send(embed=embed)
             return
         
         # Get the leaderboard
-        leaderboard = db.get_message_leaderboard(ctx.guild.id, 10, period.lower())
+        if period in WINDOWS and self.sketch_mode(ctx.guild.id):
+            # Sketches have day resolution, 24h is answered with today
+            hours, days = WINDOWS[period]
+            if days and days > analytics.days:
+                embed = EmbedCreator.create_error_embed(
+                    "Period Too Long",
+                    f"This server keeps approximate stats for the last {analytics.days} days only."
+                )
+                await ctx.send(embed=embed)
+                return
+            leaderboard = [
+                {"user_id": user_id, "count": f"~{count}"}
+                for user_id, count, error in analytics.top_posters(ctx.guild.id, days=days or 1, limit=10)
+            ]
+        elif period in WINDOWS:
+            hours, days = WINDOWS[period]
+            leaderboard = activity.top(ctx.guild.id, hours=hours, days=days, limit=10)
+        else:
+            leaderboard = db.get_message_leaderboard(ctx.guild.id, 10, period)
         
         if not leaderboard:
             embed = EmbedCreator.create_info_embed(
@@ -94,6 +152,89 @@ class Messages(commands.Cog):
         embed.title = f"📊 Message Leaderboard ({period.replace('_', ' ')})"
         
         await ctx.send(embed=embed)
+    
+    @commands.hybrid_command(name="serveractivity", description="Show a graph of server message activity")
+    async def serveractivity(self, ctx, period: str = "24h"):
+        """Show messages per hour over 24h, or per day over 7d or 30d"""
+        period = period.lower()
+        if period == "24h":
+            counts = activity.series(ctx.guild.id, hours=24)
+            now = discord.utils.utcnow().replace(minute=0, second=0, microsecond=0)
+            labels = [(now - datetime.timedelta(hours=23 - i)).strftime("%H:00") for i in range(24)]
+        elif period in ("7d", "30d"):
+            days = int(period[:-1])
+            counts = activity.series(ctx.guild.id, days=days)
+            today = discord.utils.utcnow().date()
+            labels = [(today - datetime.timedelta(days=days - 1 - i)).strftime("%m-%d") for i in range(days)]
+        else:
+            embed = EmbedCreator.create_error_embed(
+                "Invalid Period",
+                "Valid periods are: 24h, 7d, 30d"
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        # Draw a text bar chart scaled to the busiest bucket
+        peak = max(counts) or 1
+        width = max(len(str(peak)), 1)
+        lines = [
+            f"{label} {'█' * round(count / peak * 20):<20} {count:>{width}}"
+            for label, count in zip(labels, counts)
+        ]
+        
+        embed = EmbedCreator.create_info_embed(
+            f"Server Activity ({period})",
+            "```\n" + "\n".join(lines) + "\n```"
+        )
+        embed.set_footer(text=f"Total: {sum(counts)} messages | Peak: {max(counts)}")
+        await ctx.send(embed=embed)
+    
+    @commands.hybrid_command(name="activestats", description="Show daily/weekly active users and top posters")
+    async def activestats(self, ctx, channel: discord.TextChannel = None):
+        """Show DAU, WAU and top posters for the server, or for a channel in sketch mode"""
+        channel_id = channel.id if channel else None
+        days = CONFIG['analytics']['days']
+        if self.sketch_mode(ctx.guild.id):
+            dau = analytics.active_users(ctx.guild.id, days=1, channel_id=channel_id)
+            wau = analytics.active_users(ctx.guild.id, days=days, channel_id=channel_id)
+            top = [
+                (user_id, f"~{count:,}")
+                for user_id, count, error in analytics.top_posters(ctx.guild.id, days=days, limit=10)
+            ]
+            note, prefix = "Counts are estimates and may be off by a few percent.", "~"
+        elif channel is not None:
+            await ctx.send(embed=EmbedCreator.create_error_embed(
+                "Not Tracked",
+                "Active users per channel are only tracked on servers in sketch mode."
+            ))
+            return
+        else:
+            # Exact per-member counts answer the same questions
+            dau = activity.active_users(ctx.guild.id, days=1)
+            wau = activity.active_users(ctx.guild.id, days=days)
+            top = [
+                (int(entry["user_id"]), f"{entry['count']:,}")
+                for entry in activity.top(ctx.guild.id, days=days, limit=10)
+            ]
+            note, prefix = "Counts from this server's message activity.", ""
+        
+        embed = EmbedCreator.create_info_embed(
+            f"Active Users in {channel.name if channel else ctx.guild.name}",
+            note
+        )
+        embed.add_field(name="Today", value=f"{prefix}{dau:,}", inline=True)
+        embed.add_field(name=f"Last {days} Days", value=f"{prefix}{wau:,}", inline=True)
+        
+        # Top posters are tracked per server, not per channel
+        if channel is None:
+            lines = []
+            for i, (user_id, count) in enumerate(top):
+                member = ctx.guild.get_member(user_id)
+                name = member.mention if member else f"Unknown User ({user_id})"
+                lines.append(f"`{i+1}.` {name} - **{count}**")
+            embed.add_field(name=f"Top Posters ({days} Days)", value="\n".join(lines) or "No data yet.", inline=False)
+        
+        await ctx.send(embed=embed)
 
 async def setup(bot):
     await bot.add_cog(Messages(bot))
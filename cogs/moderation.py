@@ -6,16 +6,36 @@ import os
 import asyncio
 from datetime import datetime, timedelta
 from config import CONFIG
+from utils.ban_cache import ban_cache
+from utils.embed_creator import EmbedCreator
+from utils.scheduler import scheduler
+from utils.rest_queue import rest_queue
+from utils.mute_role import mute_rollout
+from utils.case_log import case_log
+from utils.event_archive import event_archive
+from utils.purge import purge_engine
+from utils.raid_guard import raid_guard
+from utils.mass_action import mass_actioner
 
 logger = logging.getLogger('discord_bot')
 
+# Cases shown per page in warning and case listings
+CASES_PER_PAGE = 10
+
 class Moderation(commands.Cog):
     """Server moderation commands"""
     
     def __init__(self, bot):
         self.bot = bot
+        ban_cache.attach(bot)
+        raid_guard.attach(bot)
+        event_archive.attach(bot)
         self.moderation_settings = {}
         self.load_moderation_settings()
+        self.migrate_warnings()
+        scheduler.attach(bot)
+        scheduler.register("unmute", self.scheduled_unmute)
+        mute_rollout.attach(bot)
         logger.info("Moderation cog initialized")
     
     def load_moderation_settings(self):
@@ -39,37 +59,33 @@ class Moderation(commands.Cog):
         except Exception as e:
             logger.error(f"Error saving moderation settings: {e}")
     
+    def migrate_warnings(self):
+        """Move warnings and mutes left in moderation_settings.json into the case log"""
+        warnings = {
+            guild_id: settings.pop("warnings")
+            for guild_id, settings in self.moderation_settings.items()
+            if "warnings" in settings
+        }
+        # Timed mutes are tracked by the scheduler now
+        had_mutes = [settings.pop("mutes") for settings in self.moderation_settings.values() if "mutes" in settings]
+        if not warnings and not had_mutes:
+            return
+        
+        imported = case_log.import_warnings(warnings)
+        self.save_moderation_settings()
+        logger.info(f"Moved {imported} warnings into the case log")
+    
     @commands.command(name="warn")
     @commands.has_permissions(manage_messages=True)
     async def warn(self, ctx, member: discord.Member, *, reason="No reason provided"):
         """Warn a member"""
-        guild_id = str(ctx.guild.id)
-        user_id = str(member.id)
-        
-        # Initialize guild and user entries if needed
-        if guild_id not in self.moderation_settings:
-            self.moderation_settings[guild_id] = {"warnings": {}}
-            
-        if "warnings" not in self.moderation_settings[guild_id]:
-            self.moderation_settings[guild_id]["warnings"] = {}
-            
-        if user_id not in self.moderation_settings[guild_id]["warnings"]:
-            self.moderation_settings[guild_id]["warnings"][user_id] = []
-        
-        # Add warning
-        warning = {
-            "reason": reason,
-            "timestamp": datetime.utcnow().isoformat(),
-            "moderator_id": str(ctx.author.id),
-            "moderator_name": str(ctx.author)
-        }
-        
-        self.moderation_settings[guild_id]["warnings"][user_id].append(warning)
-        self.save_settings()
+        # Append the warning to the case log
+        case_number = case_log.add_case(ctx.guild.id, "warn", member.id, ctx.author.id, str(ctx.author), reason)
+        warning_count = case_log.count_warnings(ctx.guild.id, member.id)
         
         # Create warning embed
         embed = discord.Embed(
-            title=f"⚠️ Warning",
+            title=f"⚠️ Warning (Case #{case_number})",
             description=f"{member.mention} has been warned.",
             color=CONFIG['colors']['warning']
         )
@@ -82,7 +98,7 @@ class Moderation(commands.Cog):
         
         embed.add_field(
             name="Warnings",
-            value=f"This user now has {len(self.moderation_settings[guild_id]['warnings'][user_id])} warnings",
+            value=f"This user now has {warning_count} warnings",
             inline=False
         )
         
@@ -106,7 +122,7 @@ class Moderation(commands.Cog):
                 inline=False
             )
             
-            await member.send(embed=user_embed)
+            await rest_queue.run(lambda: member.send(embed=user_embed), ctx.guild.id, bucket=f"dm:{member.id}")
             embed.set_footer(text="User has been notified via DM")
         except Exception:
             embed.set_footer(text="Could not send DM to user")
@@ -115,17 +131,12 @@ class Moderation(commands.Cog):
     
     @commands.command(name="warnings")
     @commands.has_permissions(kick_members=True)
-    async def view_warnings(self, ctx, member: discord.Member):
+    async def view_warnings(self, ctx, member: discord.Member, page: int = 1):
         """View warnings for a member"""
-        guild_id = str(ctx.guild.id)
-        user_id = str(member.id)
+        warning_count = case_log.count_warnings(ctx.guild.id, member.id)
         
-        # Check if guild and user have warnings
-        if (guild_id not in self.moderation_settings or
-            "warnings" not in self.moderation_settings[guild_id] or
-            user_id not in self.moderation_settings[guild_id]["warnings"] or
-            not self.moderation_settings[guild_id]["warnings"][user_id]):
-            
+        # Check if the member has warnings
+        if warning_count == 0:
             embed = discord.Embed(
                 title=f"Warnings for {member}",
                 description=f"{member.mention} has no warnings.",
@@ -135,44 +146,37 @@ class Moderation(commands.Cog):
             await ctx.send(embed=embed)
             return
         
+        pages = (warning_count + CASES_PER_PAGE - 1) // CASES_PER_PAGE
+        page = max(1, min(page, pages))
+        
         # Create warnings embed
         embed = discord.Embed(
             title=f"Warnings for {member}",
-            description=f"{member.mention} has {len(self.moderation_settings[guild_id]['warnings'][user_id])} warnings.",
+            description=f"{member.mention} has {warning_count} warnings.",
             color=CONFIG['colors']['warning']
         )
         
-        # Add each warning
-        for i, warning in enumerate(self.moderation_settings[guild_id]["warnings"][user_id], 1):
-            # Parse timestamp
-            try:
-                timestamp = datetime.fromisoformat(warning["timestamp"])
-                time_str = timestamp.strftime("%Y-%m-%d %H:%M UTC")
-            except:
-                time_str = "Unknown date"
-                
-            # Add warning field
+        # Add each warning on this page
+        first = (page - 1) * CASES_PER_PAGE + 1
+        for i, warning in enumerate(case_log.get_warnings(ctx.guild.id, member.id, page, CASES_PER_PAGE), first):
+            time_str = datetime.utcfromtimestamp(warning["created_at"]).strftime("%Y-%m-%d %H:%M UTC")
             embed.add_field(
-                name=f"Warning #{i}",
-                value=f"**Reason:** {warning['reason']}\n**By:** {warning.get('moderator_name', 'Unknown')}\n**Date:** {time_str}",
+                name=f"Warning #{i} (Case #{warning['case_number']})",
+                value=f"**Reason:** {warning['reason']}\n**By:** {warning['moderator_name'] or 'Unknown'}\n**Date:** {time_str}",
                 inline=False
             )
-            
+        
+        embed.set_footer(text=f"Page {page}/{pages}")
         await ctx.send(embed=embed)
     
     @commands.command(name="clearwarnings")
     @commands.has_permissions(kick_members=True)
     async def clear_warnings(self, ctx, member: discord.Member):
         """Clear warnings for a member"""
-        guild_id = str(ctx.guild.id)
-        user_id = str(member.id)
+        warning_count = case_log.count_warnings(ctx.guild.id, member.id)
         
-        # Check if guild and user have warnings
-        if (guild_id not in self.moderation_settings or
-            "warnings" not in self.moderation_settings[guild_id] or
-            user_id not in self.moderation_settings[guild_id]["warnings"] or
-            not self.moderation_settings[guild_id]["warnings"][user_id]):
-            
+        # Check if the member has warnings
+        if warning_count == 0:
             embed = discord.Embed(
                 title=f"Warnings for {member}",
                 description=f"{member.mention} already has no warnings.",
@@ -182,22 +186,69 @@ class Moderation(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        # Get warning count
-        warning_count = len(self.moderation_settings[guild_id]["warnings"][user_id])
-        
-        # Clear warnings
-        self.moderation_settings[guild_id]["warnings"][user_id] = []
-        self.save_settings()
+        # Clearing is itself a case, earlier warnings stay in the log
+        case_number = case_log.add_case(ctx.guild.id, "clear_warnings", member.id, ctx.author.id, str(ctx.author))
         
         # Create embed
         embed = discord.Embed(
-            title=f"✅ Warnings Cleared",
+            title=f"✅ Warnings Cleared (Case #{case_number})",
             description=f"Cleared {warning_count} warnings for {member.mention}.",
             color=CONFIG['colors']['success']
         )
         
         await ctx.send(embed=embed)
     
+    @commands.command(name="cases")
+    @commands.has_permissions(kick_members=True)
+    async def view_cases(self, ctx, member: discord.Member = None, page: int = 1):
+        """View the moderation case log, optionally for one member"""
+        cases, total = case_log.list_cases(
+            ctx.guild.id,
+            user_id=member.id if member else None,
+            page=page,
+            per_page=CASES_PER_PAGE
+        )
+        title = f"Cases for {member}" if member else "Moderation Cases"
+        await ctx.send(embed=self.create_cases_embed(title, cases, total, page))
+    
+    @commands.command(name="modcases")
+    @commands.has_permissions(kick_members=True)
+    async def view_moderator_cases(self, ctx, moderator: discord.Member, page: int = 1):
+        """View the cases handled by a moderator"""
+        cases, total = case_log.list_cases(
+            ctx.guild.id,
+            moderator_id=moderator.id,
+            page=page,
+            per_page=CASES_PER_PAGE
+        )
+        await ctx.send(embed=self.create_cases_embed(f"Cases by {moderator}", cases, total, page))
+    
+    def create_cases_embed(self, title, cases, total, page):
+        """Create an embed listing one page of cases"""
+        pages = max(1, (total + CASES_PER_PAGE - 1) // CASES_PER_PAGE)
+        lines = []
+        for case in cases:
+            time_str = datetime.utcfromtimestamp(case["created_at"]).strftime("%Y-%m-%d")
+            target = f"<@{case['user_id']}>" if case["user_id"] else "multiple users"
+            line = f"**#{case['case_number']}** {case['action']} {target} by <@{case['moderator_id']}> ({time_str})"
+            if case["reason"]:
+                line += f"\n{case['reason'][:100]}"
+            lines.append(line)
+        
+        embed = discord.Embed(
+            title=title,
+            description="\n".join(lines) or "No cases found.",
+            color=CONFIG['colors']['info']
+        )
+        embed.set_footer(text=f"{total} cases • Page {page}/{pages}")
+        return embed
+    
+    @commands.command(name="modsearch")
+    @commands.has_permissions(kick_members=True)
+    async def mod_search(self, ctx, *, query=None):
+        """Search past cases and logs: user:@x mod:@y since:7d until:2024-01-31 type:case page:2 and free text"""
+        await event_archive.run_command(ctx, query, per_page=CASES_PER_PAGE)
+    
     @commands.command(name="kick")
     @commands.has_permissions(kick_members=True)
     @commands.bot_has_permissions(kick_members=True)
@@ -240,7 +291,7 @@ class Moderation(commands.Cog):
                 inline=False
             )
             
-            await member.send(embed=user_embed)
+            await rest_queue.run(lambda: member.send(embed=user_embed), ctx.guild.id, bucket=f"dm:{member.id}")
             embed.set_footer(text="User has been notified via DM")
         except Exception:
             embed.set_footer(text="Could not send DM to user")
@@ -248,6 +299,7 @@ class Moderation(commands.Cog):
         # Kick the member
         try:
             await member.kick(reason=reason)
+            case_log.add_case(ctx.guild.id, "kick", member.id, ctx.author.id, str(ctx.author), reason)
             await ctx.send(embed=embed)
         except Exception as e:
             error_embed = discord.Embed(
@@ -299,7 +351,7 @@ class Moderation(commands.Cog):
                 inline=False
             )
             
-            await member.send(embed=user_embed)
+            await rest_queue.run(lambda: member.send(embed=user_embed), ctx.guild.id, bucket=f"dm:{member.id}")
             embed.set_footer(text="User has been notified via DM")
         except Exception:
             embed.set_footer(text="Could not send DM to user")
@@ -307,6 +359,7 @@ class Moderation(commands.Cog):
         # Ban the member
         try:
             await member.ban(reason=reason)
+            case_log.add_case(ctx.guild.id, "ban", member.id, ctx.author.id, str(ctx.author), reason)
             await ctx.send(embed=embed)
         except Exception as e:
             error_embed = discord.Embed(
@@ -316,40 +369,64 @@ class Moderation(commands.Cog):
             )
             await ctx.send(embed=error_embed)
     
+    @commands.command(name="massban")
+    @commands.has_permissions(ban_members=True)
+    @commands.bot_has_permissions(ban_members=True)
+    async def mass_ban(self, ctx, *, args=None):
+        """Ban many users: IDs, mentions, joined:<minutes> or an attached ID list, then the reason"""
+        await mass_actioner.run_command(ctx, "ban", args)
+    
+    @commands.command(name="masskick")
+    @commands.has_permissions(kick_members=True)
+    @commands.bot_has_permissions(kick_members=True)
+    async def mass_kick(self, ctx, *, args=None):
+        """Kick many members: IDs, mentions, joined:<minutes> or an attached ID list, then the reason"""
+        await mass_actioner.run_command(ctx, "kick", args)
+    
     @commands.command(name="unban")
     @commands.has_permissions(ban_members=True)
     @commands.bot_has_permissions(ban_members=True)
     async def unban_member(self, ctx, *, user_name):
         """Unban a member from the server"""
-        # Get ban list
-        banned_users = [entry async for entry in ctx.guild.bans()]
+        # Look the user up in the indexed ban list
+        bans = await ban_cache.get(ctx.guild)
+        matches = bans.find(user_name)
         
-        # Find user in ban list
-        for ban_entry in banned_users:
-            user = ban_entry.user
+        if len(matches) > 1:
+            embed = discord.Embed(
+                title="❌ Multiple Matches",
+                description="Several banned users match that name, unban by ID instead:\n" + "\n".join(
+                    f"`{entry.user.id}` {entry.user}" for entry in matches[:10]
+                ),
+                color=CONFIG['colors']['error']
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        if matches:
+            user = matches[0].user
             
-            # Check if username matches
-            if user.name.lower() == user_name.lower() or str(user).lower() == user_name.lower():
-                # Unban the user
-                try:
-                    await ctx.guild.unban(user)
-                    
-                    embed = discord.Embed(
-                        title=f"✅ User Unbanned",
-                        description=f"{user} has been unbanned from the server.",
-                        color=CONFIG['colors']['success']
-                    )
-                    
-                    await ctx.send(embed=embed)
-                    return
-                except Exception as e:
-                    error_embed = discord.Embed(
-                        title="❌ Error",
-                        description=f"Could not unban {user}: {str(e)}",
-                        color=CONFIG['colors']['error']
-                    )
-                    await ctx.send(embed=error_embed)
-                    return
+            # Unban the user
+            try:
+                await ctx.guild.unban(user)
+                case_log.add_case(ctx.guild.id, "unban", user.id, ctx.author.id, str(ctx.author))
+                
+                embed = discord.Embed(
+                    title=f"✅ User Unbanned",
+                    description=f"{user} has been unbanned from the server.",
+                    color=CONFIG['colors']['success']
+                )
+                
+                await ctx.send(embed=embed)
+                return
+            except Exception as e:
+                error_embed = discord.Embed(
+                    title="❌ Error",
+                    description=f"Could not unban {user}: {str(e)}",
+                    color=CONFIG['colors']['error']
+                )
+                await ctx.send(embed=error_embed)
+                return
         
         # User not found
         embed = discord.Embed(
@@ -360,42 +437,37 @@ class Moderation(commands.Cog):
         
         await ctx.send(embed=embed)
     
+    @commands.command(name="bansearch")
+    @commands.has_permissions(ban_members=True)
+    @commands.bot_has_permissions(ban_members=True)
+    async def ban_search(self, ctx, *, prefix):
+        """Search banned users by the start of their username"""
+        bans = await ban_cache.get(ctx.guild)
+        results = bans.search(prefix, limit=25)
+        
+        embed = discord.Embed(
+            title=f"🔨 Bans Matching '{prefix}'",
+            description="\n".join(
+                f"`{entry.user.id}` {entry.user}" + (f" - {entry.reason}" if entry.reason else "")
+                for entry in results
+            ) or "No banned users match that name.",
+            color=CONFIG['colors']['info']
+        )
+        embed.set_footer(text=f"{len(bans.by_id)} bans in total")
+        await ctx.send(embed=embed)
+    
+    @commands.command(name="raidmode")
+    @commands.has_permissions(manage_guild=True)
+    async def raid_mode(self, ctx, mode: str = None):
+        """Show raid mode status, or turn it on or off"""
+        await raid_guard.run_command(ctx, mode)
+    
     @commands.command(name="purge")
     @commands.has_permissions(manage_messages=True)
-    @commands.bot_has_permissions(manage_messages=True)
-    async def purge_messages(self, ctx, amount: int):
-        """Delete a number of messages from the channel"""
-        # Check amount
-        if amount < 1 or amount > 100:
-            embed = discord.Embed(
-                title="❌ Invalid Amount",
-                description="You can only delete between 1 and 100 messages at a time.",
-                color=CONFIG['colors']['error']
-            )
-            await ctx.send(embed=embed)
-            return
-        
-        # Delete messages
-        try:
-            deleted = await ctx.channel.purge(limit=amount + 1)  # +1 to include command message
-            
-            embed = discord.Embed(
-                title=f"🧹 Channel Purged",
-                description=f"Deleted {len(deleted) - 1} messages.",
-                color=CONFIG['colors']['success']
-            )
-            
-            # Send and delete confirmation message
-            confirmation = await ctx.send(embed=embed)
-            await asyncio.sleep(3)
-            await confirmation.delete()
-        except Exception as e:
-            error_embed = discord.Embed(
-                title="❌ Error",
-                description=f"Could not delete messages: {str(e)}",
-                color=CONFIG['colors']['error']
-            )
-            await ctx.send(embed=error_embed)
+    @commands.bot_has_permissions(manage_messages=True, read_message_history=True)
+    async def purge_messages(self, ctx, amount: int, *filters):
+        """Scan the last messages of the channel (or mentioned channels) and delete those matching the filters"""
+        await purge_engine.run_command(ctx, amount, filters)
     
     @commands.command(name="setslowmode")
     @commands.has_permissions(manage_channels=True)
@@ -463,9 +535,9 @@ class Moderation(commands.Cog):
                     reason="Created for mute command"
                 )
                 
-                # Set role permissions for all channels
-                for channel in ctx.guild.channels:
-                    await channel.set_permissions(muted_role, speak=False, send_messages=False, add_reactions=False)
+                # Set role permissions for all channels in the background
+                job = mute_rollout.start(ctx.guild, muted_role)
+                self.bot.loop.create_task(self.report_rollout(ctx, job))
                     
             except Exception as e:
                 error_embed = discord.Embed(
@@ -506,11 +578,14 @@ class Moderation(commands.Cog):
         # Add role to member
         try:
             await member.add_roles(muted_role, reason=reason)
+            case_number = case_log.add_case(
+                ctx.guild.id, "mute", member.id, ctx.author.id, str(ctx.author),
+                f"{reason} ({duration})" if duration else reason
+            )
             
             # Create mute embed
             if duration:
                 description = f"{member.mention} has been muted for {duration}."
-                seconds = self.parse_time_string(duration)
                 unmute_time = datetime.utcnow() + timedelta(seconds=seconds)
                 time_str = unmute_time.strftime("%Y-%m-%d %H:%M UTC")
             else:
@@ -518,7 +593,7 @@ class Moderation(commands.Cog):
                 time_str = "Indefinite"
                 
             embed = discord.Embed(
-                title=f"🔇 Member Muted",
+                title=f"🔇 Member Muted (Case #{case_number})",
                 description=description,
                 color=CONFIG['colors']['error']
             )
@@ -555,7 +630,7 @@ class Moderation(commands.Cog):
                     inline=False
                 )
                 
-                await member.send(embed=user_embed)
+                await rest_queue.run(lambda: member.send(embed=user_embed), ctx.guild.id, bucket=f"dm:{member.id}")
                 embed.set_footer(text="User has been notified via DM")
             except Exception:
                 embed.set_footer(text="Could not send DM to user")
@@ -564,49 +639,18 @@ class Moderation(commands.Cog):
             
             # Schedule unmute if duration was specified
             if duration:
-                # Initialize mutes in settings
-                if guild_id not in self.moderation_settings:
-                    self.moderation_settings[guild_id] = {}
-                    
-                if "mutes" not in self.moderation_settings[guild_id]:
-                    self.moderation_settings[guild_id]["mutes"] = {}
-                
-                # Store mute info
-                self.moderation_settings[guild_id]["mutes"][str(member.id)] = {
-                    "unmute_time": unmute_time.isoformat(),
-                    "role_id": str(muted_role.id)
-                }
-                
-                self.save_settings()
-                
                 # Schedule unmute
-                await asyncio.sleep(seconds)
-                
-                # Check if still muted
-                if (guild_id in self.moderation_settings and 
-                    "mutes" in self.moderation_settings[guild_id] and
-                    str(member.id) in self.moderation_settings[guild_id]["mutes"]):
-                    
-                    # Remove from muted list
-                    del self.moderation_settings[guild_id]["mutes"][str(member.id)]
-                    self.save_settings()
-                    
-                    # Remove role if member still in server
-                    try:
-                        member = ctx.guild.get_member(member.id)
-                        if member and muted_role in member.roles:
-                            await member.remove_roles(muted_role, reason="Mute duration expired")
-                            
-                            # Notify channel
-                            unmute_embed = discord.Embed(
-                                title=f"🔊 Member Unmuted",
-                                description=f"{member.mention} has been automatically unmuted (duration expired).",
-                                color=CONFIG['colors']['success']
-                            )
-                            
-                            await ctx.send(embed=unmute_embed)
-                    except Exception as e:
-                        logger.error(f"Failed to auto-unmute {member.id}: {e}")
+                scheduler.schedule(
+                    "unmute",
+                    {
+                        "guild_id": guild_id,
+                        "user_id": str(member.id),
+                        "role_id": str(muted_role.id),
+                        "channel_id": str(ctx.channel.id)
+                    },
+                    delay=seconds,
+                    key=f"unmute:{guild_id}:{member.id}"
+                )
                 
         except Exception as e:
             error_embed = discord.Embed(
@@ -648,13 +692,10 @@ class Moderation(commands.Cog):
         try:
             await member.remove_roles(muted_role, reason=f"Unmuted by {ctx.author}")
             
-            # Remove from muted list if present
-            if (guild_id in self.moderation_settings and 
-                "mutes" in self.moderation_settings[guild_id] and
-                str(member.id) in self.moderation_settings[guild_id]["mutes"]):
-                
-                del self.moderation_settings[guild_id]["mutes"][str(member.id)]
-                self.save_settings()
+            case_log.add_case(ctx.guild.id, "unmute", member.id, ctx.author.id, str(ctx.author))
+            
+            # Drop the pending timed unmute, if any
+            scheduler.cancel(key=f"unmute:{guild_id}:{member.id}")
             
             # Create unmute embed
             embed = discord.Embed(
@@ -673,7 +714,7 @@ class Moderation(commands.Cog):
                     color=CONFIG['colors']['success']
                 )
                 
-                await member.send(embed=user_embed)
+                await rest_queue.run(lambda: member.send(embed=user_embed), ctx.guild.id, bucket=f"dm:{member.id}")
             except Exception:
                 pass
                 
@@ -684,6 +725,94 @@ class Moderation(commands.Cog):
                 color=CONFIG['colors']['error']
             )
             await ctx.send(embed=error_embed)
+    
+    async def report_rollout(self, ctx, job, interval=5):
+        """Keep one status message updated until the Muted role rollout finishes"""
+        if job.is_finished:
+            return
+        status = await ctx.send(embed=EmbedCreator.create_loading_embed(
+            "Setting Up Muted Role",
+            job.progress_text()
+        ))
+        
+        while not job.is_finished:
+            try:
+                await asyncio.wait_for(job.finished.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            
+            try:
+                if job.is_finished:
+                    await status.edit(embed=EmbedCreator.create_success_embed(
+                        "Muted Role Set Up",
+                        job.progress_text()
+                    ))
+                else:
+                    await status.edit(embed=EmbedCreator.create_loading_embed(
+                        "Setting Up Muted Role",
+                        job.progress_text()
+                    ))
+            except discord.HTTPException:
+                # Status message was deleted, the rollout keeps running regardless
+                return
+    
+    @commands.command(name="mutesetup")
+    @commands.has_permissions(manage_roles=True)
+    @commands.bot_has_permissions(manage_roles=True)
+    async def mute_setup(self, ctx):
+        """Apply the Muted role's overwrites to every channel that is missing them"""
+        muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
+        if muted_role is None:
+            embed = discord.Embed(
+                title="❌ Error",
+                description=f"Could not find a role named 'Muted'.",
+                color=CONFIG['colors']['error']
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        job = mute_rollout.start(ctx.guild, muted_role)
+        if job.is_finished:
+            await ctx.send(embed=EmbedCreator.create_info_embed(
+                "Muted Role Set Up",
+                "Every channel already has the Muted role's overwrites."
+            ))
+            return
+        await self.report_rollout(ctx, job)
+    
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        """Cover new channels with the Muted role's overwrites"""
+        mute_rollout.cover_channel(channel)
+    
+    async def scheduled_unmute(self, payload):
+        """Remove a timed mute when its scheduler job is due"""
+        guild_id, user_id = payload["guild_id"], payload["user_id"]
+        
+        guild = self.bot.get_guild(int(guild_id))
+        if not guild:
+            return
+        member = guild.get_member(int(user_id))
+        muted_role = guild.get_role(int(payload["role_id"]))
+        if not member or not muted_role or muted_role not in member.roles:
+            return
+        
+        try:
+            await member.remove_roles(muted_role, reason="Mute duration expired")
+        except Exception as e:
+            logger.error(f"Failed to auto-unmute {member.id}: {e}")
+            return
+        case_log.add_case(guild.id, "unmute", member.id, self.bot.user.id, str(self.bot.user), "Mute duration expired")
+        
+        # Notify channel
+        channel = guild.get_channel(int(payload["channel_id"]))
+        if channel:
+            unmute_embed = discord.Embed(
+                title=f"🔊 Member Unmuted",
+                description=f"{member.mention} has been automatically unmuted (duration expired).",
+                color=CONFIG['colors']['success']
+            )
+            await channel.send(embed=unmute_embed)
 
 async def setup(bot):
     await bot.add_cog(Moderation(bot))
\ No newline at end of file
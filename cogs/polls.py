@@ -6,6 +6,9 @@ import os
 import asyncio
 import datetime
 from config import CONFIG
+from utils.scheduler import scheduler
+from utils.rest_queue import rest_queue
+from utils.reaction_targets import reaction_targets
 
 logger = logging.getLogger('discord_bot')
 
@@ -13,13 +16,221 @@ class Polls(commands.Cog):
     """Poll creation system for voting"""
     def __init__(self, bot):
         self.bot = bot
+        self.active_polls = {}
+        # poll message ID -> guild ID, for O(1) lookups from raw reaction events
+        self.poll_index = {}
+        # poll message ID -> pending debounced update task
+        self.pending_updates = {}
+        self.load_polls()
+        if self.poll_index:
+            self.bot.loop.create_task(self.recount_active_polls())
+        scheduler.attach(bot)
+        scheduler.register("poll_end", self.end_scheduled_poll)
         logger.info(f"Polls cog initialized")
     
-    @commands.command(name="unknown_method")
-    @commands.has_permissions(manage_guild=True)
-    async def unknown_method(self, ctx, *args):
-        """Auto-generated method from fixing indentation"""
-
+    def load_polls(self):
+        """Load active polls and their vote tallies from file"""
+        try:
+            with open('data/polls_data.json', 'r') as f:
+                self.active_polls = json.load(f)
+        except FileNotFoundError:
+            self.active_polls = {}
+        except Exception as e:
+            logger.error(f"Error loading polls: {e}")
+            self.active_polls = {}
+        
+        self.poll_index = {}
+        for guild_id, polls in self.active_polls.items():
+            for poll_id, poll_data in polls.items():
+                # Polls saved before live tallies start with an empty tally
+                poll_data.setdefault("counts", [0] * len(poll_data["options"]))
+                poll_data.setdefault("votes", {})
+                self.poll_index[int(poll_id)] = guild_id
+        reaction_targets.replace("polls", self.poll_index)
+    
+    def save_polls(self):
+        """Save active polls and their vote tallies to file"""
+        try:
+            os.makedirs('data', exist_ok=True)
+            with open('data/polls_data.json', 'w') as f:
+                json.dump(self.active_polls, f, indent=4)
+        except Exception as e:
+            logger.error(f"Error saving polls: {e}")
+    
+    def add_poll(self, guild_id, poll_id, poll_data):
+        """Register a new poll with an empty tally"""
+        poll_data["single_vote"] = CONFIG['polls']['single_vote']
+        poll_data["counts"] = [0] * len(poll_data["options"])
+        # user ID -> list of option indexes
+        poll_data["votes"] = {}
+        self.active_polls.setdefault(guild_id, {})[str(poll_id)] = poll_data
+        self.poll_index[int(poll_id)] = guild_id
+        reaction_targets.track("polls", poll_id)
+        self.save_polls()
+    
+    def remove_poll(self, guild_id, poll_id):
+        self.active_polls.get(guild_id, {}).pop(str(poll_id), None)
+        self.poll_index.pop(int(poll_id), None)
+        reaction_targets.untrack("polls", poll_id)
+        task = self.pending_updates.pop(int(poll_id), None)
+        if task:
+            task.cancel()
+        self.save_polls()
+    
+    async def add_poll_reactions(self, message, emojis):
+        """Add vote reactions in order through the shared REST queue"""
+        await asyncio.gather(*(
+            rest_queue.submit(
+                lambda emoji=emoji: message.add_reaction(emoji),
+                message.guild.id,
+                bucket=f"reactions:{message.channel.id}"
+            )
+            for emoji in emojis
+        ))
+    
+    def build_poll_embed(self, poll_id, poll_data):
+        """Build the poll embed with the current live results"""
+        embed = discord.Embed(
+            title=f"📊 {poll_data['question']}",
+            description="React with the corresponding emoji to vote!" + (
+                " (one vote per member)" if poll_data.get("single_vote") else ""
+            ),
+            color=CONFIG['colors']['info'],
+            timestamp=datetime.datetime.fromisoformat(poll_data["created_at"])
+        )
+        
+        total_votes = sum(poll_data["counts"])
+        for i, option in enumerate(poll_data["options"]):
+            count = poll_data["counts"][i]
+            percentage = (count / total_votes * 100) if total_votes > 0 else 0
+            bar = "█" * int(10 * percentage / 100) + "░" * (10 - int(10 * percentage / 100))
+            embed.add_field(
+                name=f"Option {i+1}",
+                value=f"{poll_data['emojis'][i]} {option}\n{bar} {count} votes ({percentage:.1f}%)",
+                inline=False
+            )
+        
+        if poll_data["timed"] and poll_data["end_time"]:
+            end_time = datetime.datetime.fromisoformat(poll_data["end_time"])
+            embed.add_field(
+                name="Poll Ends",
+                value=f"📆 {end_time.strftime('%Y-%m-%d %H:%M UTC')}",
+                inline=False
+            )
+        
+        embed.set_footer(text=f"Poll ID: {poll_id} | {total_votes} votes")
+        return embed
+    
+    def schedule_update(self, guild_id, poll_id):
+        """Edit the poll message and snapshot the tally at most once per interval"""
+        task = self.pending_updates.get(poll_id)
+        if task and not task.done():
+            return
+        self.pending_updates[poll_id] = self.bot.loop.create_task(self.update_poll_later(guild_id, poll_id))
+    
+    async def update_poll_later(self, guild_id, poll_id):
+        await asyncio.sleep(CONFIG['polls']['live_update_interval'])
+        poll_data = self.active_polls.get(guild_id, {}).get(str(poll_id))
+        if not poll_data:
+            return
+        
+        self.save_polls()
+        channel = self.bot.get_channel(int(poll_data["channel_id"]))
+        if not channel:
+            return
+        try:
+            await channel.get_partial_message(poll_id).edit(embed=self.build_poll_embed(poll_id, poll_data))
+        except discord.HTTPException as e:
+            logger.error(f"Error updating live poll {poll_id}: {e}")
+    
+    def get_poll_for_reaction(self, payload):
+        """Get (guild_id, poll_data, option_index) for a vote reaction, or None"""
+        if not reaction_targets.wants("polls", payload.message_id):
+            return None
+        guild_id = self.poll_index.get(payload.message_id)
+        if guild_id is None or payload.user_id == self.bot.user.id:
+            return None
+        poll_data = self.active_polls.get(guild_id, {}).get(str(payload.message_id))
+        if not poll_data:
+            return None
+        try:
+            option = poll_data["emojis"].index(str(payload.emoji))
+        except ValueError:
+            return None
+        return guild_id, poll_data, option
+    
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        """Count a vote"""
+        found = self.get_poll_for_reaction(payload)
+        if not found or (payload.member and payload.member.bot):
+            return
+        guild_id, poll_data, option = found
+        
+        user_id = str(payload.user_id)
+        votes = poll_data["votes"].setdefault(user_id, [])
+        if option in votes:
+            return
+        
+        previous = []
+        if poll_data.get("single_vote"):
+            # Move the vote; the old reaction's removal event is then ignored
+            previous = list(votes)
+            for old in previous:
+                poll_data["counts"][old] -= 1
+            votes.clear()
+        
+        votes.append(option)
+        poll_data["counts"][option] += 1
+        self.schedule_update(guild_id, payload.message_id)
+        
+        # Remove the member's other reactions so the message matches the tally
+        if previous:
+            channel = self.bot.get_channel(payload.channel_id)
+            message = channel.get_partial_message(payload.message_id) if channel else None
+            for old in previous:
+                try:
+                    await message.remove_reaction(poll_data["emojis"][old], discord.Object(payload.user_id))
+                except (AttributeError, discord.HTTPException):
+                    pass
+    
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload):
+        """Withdraw a vote"""
+        found = self.get_poll_for_reaction(payload)
+        if not found:
+            return
+        guild_id, poll_data, option = found
+        
+        votes = poll_data["votes"].get(str(payload.user_id), [])
+        if option not in votes:
+            # Already moved to another option
+            return
+        
+        votes.remove(option)
+        poll_data["counts"][option] -= 1
+        if not votes:
+            del poll_data["votes"][str(payload.user_id)]
+        self.schedule_update(guild_id, payload.message_id)
+    
+    @commands.group(name="poll", invoke_without_command=True)
+    async def poll(self, ctx):
+        """Create and manage polls"""
+        embed = discord.Embed(
+            title="📊 Polls",
+            description=f"`{CONFIG['prefix']}poll create \"Question\" \"Option 1\" \"Option 2\" ...` - Create a poll\n"
+                        f"`{CONFIG['prefix']}poll timed \"Question\" <duration> \"Option 1\" ...` - Create a poll that ends by itself\n"
+                        f"`{CONFIG['prefix']}poll quick <question>` - Create a yes/no poll\n"
+                        f"`{CONFIG['prefix']}poll end <poll_id>` - End a poll\n"
+                        f"`{CONFIG['prefix']}poll list` - List active polls",
+            color=CONFIG['colors']['info']
+        )
+        await ctx.send(embed=embed)
+    
+    @poll.command(name="create")
+    @commands.has_permissions(manage_messages=True)
+    async def create_poll(self, ctx, question: str, *options):
+        """Create a poll with up to 10 options"""
         # Validate options
         if len(options) < 2:
             embed = discord.Embed(
@@ -64,15 +275,9 @@ class Polls(commands.Cog):
         # Send poll and add reactions
         poll_message = await ctx.send(embed=embed)
         
-        for i in range(len(options)):
-            await poll_message.add_reaction(number_emojis[i])
-        
-        # Store poll in active polls
+        # Store poll in active polls before adding reactions, so early votes are counted
         guild_id = str(ctx.guild.id)
-        if guild_id not in self.active_polls:
-            self.active_polls[guild_id] = {}
-            
-        self.active_polls[guild_id][str(poll_message.id)] = {
+        self.add_poll(guild_id, poll_message.id, {
             "question": question,
             "options": options,
             "emojis": number_emojis[:len(options)],
@@ -81,9 +286,9 @@ class Polls(commands.Cog):
             "created_at": datetime.datetime.utcnow().isoformat(),
             "timed": False,
             "end_time": None
-        }
+        })
         
-        self.save_polls()
+        await self.add_poll_reactions(poll_message, number_emojis[:len(options)])
     
     @poll.command(name="timed")
     @commands.has_permissions(manage_messages=True)
@@ -180,15 +385,9 @@ class Polls(commands.Cog):
         # Send poll and add reactions
         poll_message = await ctx.send(embed=embed)
         
-        for i in range(len(options)):
-            await poll_message.add_reaction(number_emojis[i])
-        
-        # Store poll in active polls
+        # Store poll in active polls before adding reactions, so early votes are counted
         guild_id = str(ctx.guild.id)
-        if guild_id not in self.active_polls:
-            self.active_polls[guild_id] = {}
-            
-        self.active_polls[guild_id][str(poll_message.id)] = {
+        self.add_poll(guild_id, poll_message.id, {
             "question": question,
             "options": options,
             "emojis": number_emojis[:len(options)],
@@ -197,12 +396,17 @@ class Polls(commands.Cog):
             "created_at": datetime.datetime.utcnow().isoformat(),
             "timed": True,
             "end_time": end_time.isoformat()
-        }
+        })
         
-        self.save_polls()
+        await self.add_poll_reactions(poll_message, number_emojis[:len(options)])
         
         # Schedule poll end
-        self.bot.loop.create_task(self.end_poll_after(ctx.guild.id, poll_message.id, seconds))
+        scheduler.schedule(
+            "poll_end",
+            {"guild_id": guild_id, "poll_id": str(poll_message.id)},
+            at=end_time.replace(tzinfo=datetime.timezone.utc).timestamp(),
+            key=f"poll:{poll_message.id}"
+        )
     
     @poll.command(name="quick")
     async def quick_poll(self, ctx, *, question: str):
@@ -220,8 +424,7 @@ class Polls(commands.Cog):
         
         # Send poll and add reactions
         poll_message = await ctx.send(embed=embed)
-        await poll_message.add_reaction("👍")
-        await poll_message.add_reaction("👎")
+        await self.add_poll_reactions(poll_message, ["👍", "👎"])
     
     @poll.command(name="end")
     @commands.has_permissions(manage_messages=True)
@@ -256,23 +459,20 @@ class Polls(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        # Get the poll message
+        # Get the poll channel
         try:
             channel = ctx.guild.get_channel(int(poll_data["channel_id"]))
             if not channel:
                 raise ValueError("Channel not found")
-                
-            message = await channel.fetch_message(poll_id)
             
             # End the poll
-            await self.end_poll_message(ctx.guild.id, poll_id, message)
+            await self.end_poll_message(ctx.guild.id, poll_id, channel)
             
         except Exception as e:
             logger.error(f"Error ending poll: {e}")
             
             # Remove from active polls anyway
-            del self.active_polls[guild_id][str(poll_id)]
-            self.save_polls()
+            self.remove_poll(guild_id, poll_id)
             
             embed = discord.Embed(
                 title="❌ Error",
@@ -335,22 +535,50 @@ class Polls(commands.Cog):
         
         await ctx.send(embed=embed)
     
-    async def end_poll_message(self, guild_id, poll_id, message):
-        """End a poll and show results"""
+    async def recount_from_reactions(self, channel, poll_id, poll_data):
+        """Replace the live tally with the message's reaction counts
+
+        Votes cast while the bot was offline never reached the live tally, but
+        they are on the message. If it can't be fetched the live tally is kept.
+        """
+        try:
+            message = await channel.fetch_message(int(poll_id))
+        except discord.HTTPException as e:
+            logger.error(f"Could not recount poll {poll_id}, using the live tally: {e}")
+            return
+        
+        counts = [0] * len(poll_data["options"])
+        for reaction in message.reactions:
+            try:
+                option = poll_data["emojis"].index(str(reaction.emoji))
+            except ValueError:
+                continue
+            # The bot's own reaction is not a vote
+            counts[option] = reaction.count - (1 if reaction.me else 0)
+        poll_data["counts"] = counts
+    
+    async def recount_active_polls(self):
+        """Pick up votes cast while the bot was offline, once after startup"""
+        await self.bot.wait_until_ready()
+        for poll_id, guild_id in list(self.poll_index.items()):
+            poll_data = self.active_polls.get(guild_id, {}).get(str(poll_id))
+            channel = self.bot.get_channel(int(poll_data["channel_id"])) if poll_data else None
+            if channel is None:
+                continue
+            await self.recount_from_reactions(channel, poll_id, poll_data)
+            self.schedule_update(guild_id, poll_id)
+    
+    async def end_poll_message(self, guild_id, poll_id, channel):
+        """End a poll and show results counted from its reactions"""
         guild_id = str(guild_id)
         poll_id = str(poll_id)
         
         # Get poll data
         poll_data = self.active_polls[guild_id][poll_id]
+        await self.recount_from_reactions(channel, poll_id, poll_data)
         
         # Get the poll results
-        results = []
-        for i, emoji in enumerate(poll_data["emojis"]):
-            # Get reaction count
-            reaction = discord.utils.get(message.reactions, emoji=emoji)
-            count = reaction.count - 1 if reaction else 0  # Subtract bot's reaction
-            
-            results.append((poll_data["options"][i], count))
+        results = list(zip(poll_data["options"], poll_data["counts"]))
         
         # Sort results by vote count (descending)
         results.sort(key=lambda x: x[1], reverse=True)
@@ -386,18 +614,16 @@ class Polls(commands.Cog):
         embed.set_footer(text=f"Poll ID: {poll_id}")
         
         # Send results
-        await message.channel.send(embed=embed)
+        await channel.send(embed=embed)
         
-        # Remove from active polls
-        del self.active_polls[guild_id][poll_id]
-        self.save_polls()
+        # Remove from active polls and any pending timer
+        self.remove_poll(guild_id, poll_id)
+        scheduler.cancel(key=f"poll:{poll_id}")
     
-    async def end_poll_after(self, guild_id, poll_id, seconds):
-        """End a poll after a specified duration"""
-        await asyncio.sleep(seconds)
-        
-        guild_id = str(guild_id)
-        poll_id = str(poll_id)
+    async def end_scheduled_poll(self, payload):
+        """End a timed poll when its scheduler job is due"""
+        guild_id = str(payload["guild_id"])
+        poll_id = str(payload["poll_id"])
         
         # Check if poll still exists
         if (guild_id not in self.active_polls or
@@ -407,7 +633,7 @@ class Polls(commands.Cog):
         # Get poll data
         poll_data = self.active_polls[guild_id][poll_id]
         
-        # Get the poll message
+        # Get the poll channel
         try:
             guild = self.bot.get_guild(int(guild_id))
             if not guild:
@@ -416,19 +642,15 @@ class Polls(commands.Cog):
             channel = guild.get_channel(int(poll_data["channel_id"]))
             if not channel:
                 raise ValueError("Channel not found")
-                
-            message = await channel.fetch_message(int(poll_id))
             
             # End the poll
-            await self.end_poll_message(guild_id, poll_id, message)
+            await self.end_poll_message(guild_id, poll_id, channel)
             
         except Exception as e:
             logger.error(f"Error ending timed poll: {e}")
             
             # Remove from active polls anyway
-            if guild_id in self.active_polls and poll_id in self.active_polls[guild_id]:
-                del self.active_polls[guild_id][poll_id]
-                self.save_polls()
+            self.remove_poll(guild_id, poll_id)
 
 async def setup(bot):
     await bot.add_cog(Polls(bot))
\ No newline at end of file
@@ -1,102 +1,222 @@
 import discord
 from discord.ext import commands
 import logging
-import asyncio
+import re
 
-from utils.database import db
 from utils.embed_creator import EmbedCreator
+from utils.reaction_role_index import reaction_role_index, MISSING_CHANNEL
+from utils.reaction_targets import reaction_targets
+from utils.rest_queue import rest_queue, INTERACTIVE, NORMAL
 from config import CONFIG
 
 logger = logging.getLogger('discord_bot')
 
-class RoleSelect(discord.ui.Select):
-    """Dropdown for selecting roles"""
+MESSAGE_LINK = re.compile(r"/channels/\d+/(\d+)/(\d+)")
+
+class ReactionRoles(commands.Cog):
+    """Roles members give themselves by reacting to a message"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        reaction_role_index.attach(bot)
+        logger.info("ReactionRoles cog initialized")
+
+    def parse_message(self, ctx, reference):
+        """Get (channel_id, message_id) from a message link or ID, or None"""
+        link = MESSAGE_LINK.search(reference)
+        if link:
+            return int(link.group(1)), int(link.group(2))
+        if reference.isdigit():
+            entry = reaction_role_index.get(reference)
+            if entry is not None and entry.channel_id not in (None, MISSING_CHANNEL):
+                return entry.channel_id, entry.message_id
+            return ctx.channel.id, int(reference)
+        return None
+
+    @commands.hybrid_group(name="reactionrole", description="Manage reaction role messages", invoke_without_command=True)
+    @commands.has_permissions(manage_roles=True)
+    async def reactionrole(self, ctx):
+        """Manage reaction role messages"""
+        await ctx.send(embed=EmbedCreator.create_info_embed(
+            "Reaction Roles",
+            f"`{CONFIG['prefix']}reactionrole create <channel> <title>` - Post a reaction role message\n"
+            f"`{CONFIG['prefix']}reactionrole add <message> <emoji> <role>` - Give a role for a reaction\n"
+            f"`{CONFIG['prefix']}reactionrole delete <message>` - Delete a reaction role message\n"
+            f"`{CONFIG['prefix']}reactionrole list` - List reaction role messages"
+        ))
+
+    @reactionrole.command(name="create", description="Post a reaction role message")
+    @commands.has_permissions(manage_roles=True)
+    async def create(self, ctx, channel: discord.TextChannel, *, title: str):
+        """Post a reaction role message to add roles to"""
+        embed = discord.Embed(
+            title=title,
+            description="React below to get a role.",
+            color=CONFIG['colors']['default']
+        )
         try:
-            # Check if message exists in the database
-            reaction_roles = db.data.get('reaction_roles', {}).get(str(ctx.guild.id), {}).get(message_id)
-            
-            if not reaction_roles:
-                embed = EmbedCreator.create_error_embed(
-                    "Not Found",
-                    "Could not find a reaction role message with that ID."
-                )
-                await ctx.send(embed=embed)
-                return
-            
-            # Try to delete the message
-            try:
-                for channel in ctx.guild.text_channels:
-                    try:
-                        message = await channel.fetch_message(int(message_id))
-                        await message.delete()
-                        break
-                    except (discord.NotFound, discord.Forbidden, discord.HTTPException):
-                        continue
-            except Exception as e:
-                logger.error(f"Error deleting message: {e}")
-                await ctx.send("Could not delete the message, but will remove it from the database.")
-            
-            # Remove from database
-            if str(ctx.guild.id) in db.data.get('reaction_roles', {}) and message_id in db.data['reaction_roles'][str(ctx.guild.id)]:
-                del db.data['reaction_roles'][str(ctx.guild.id)][message_id]
-                db._save_data()
-            
-            embed = EmbedCreator.create_success_embed(
-                "Deleted",
-                "Reaction role message has been deleted."
-            )
-            await ctx.send(embed=embed)
-            
-        except Exception as e:
-            logger.error(f"Error in reaction role delete: {e}")
-            embed = EmbedCreator.create_error_embed(
-                "Error",
-                f"An error occurred: {e}"
+            message = await channel.send(embed=embed)
+        except discord.HTTPException as e:
+            await ctx.send(embed=EmbedCreator.create_error_embed("Error", f"Could not post the message: {e}"))
+            return
+
+        reaction_role_index.add(ctx.guild.id, channel.id, message.id)
+        await ctx.send(embed=EmbedCreator.create_success_embed(
+            "Reaction Role Message Created",
+            f"Posted in {channel.mention}. Add roles with "
+            f"`{CONFIG['prefix']}reactionrole add {message.id} <emoji> <role>`."
+        ))
+
+    @reactionrole.command(name="add", description="Give a role for reacting with an emoji")
+    @commands.has_permissions(manage_roles=True)
+    async def add(self, ctx, message: str, emoji: str, role: discord.Role):
+        """Give a role to members who react to a message with an emoji"""
+        location = self.parse_message(ctx, message)
+        if location is None:
+            await ctx.send(embed=EmbedCreator.create_error_embed("Invalid Message", "Give a message link or ID."))
+            return
+        if role >= ctx.guild.me.top_role:
+            await ctx.send(embed=EmbedCreator.create_error_embed(
+                "Role Too High",
+                f"{role.mention} is higher or equal to my highest role."
+            ))
+            return
+        if role >= ctx.author.top_role and ctx.author != ctx.guild.owner:
+            await ctx.send(embed=EmbedCreator.create_error_embed(
+                "Permission Error",
+                f"You can't give out {role.mention} because it is higher or equal to your highest role."
+            ))
+            return
+
+        channel_id, message_id = location
+        channel = ctx.guild.get_channel(channel_id)
+        if channel is None:
+            await ctx.send(embed=EmbedCreator.create_error_embed("Not Found", "That channel is not in this server."))
+            return
+        try:
+            await rest_queue.run(
+                lambda: channel.get_partial_message(message_id).add_reaction(emoji),
+                ctx.guild.id,
+                INTERACTIVE,
+                bucket=f"reactions:{channel.id}"
             )
-            await ctx.send(embed=embed)
-    
+        except discord.HTTPException as e:
+            await ctx.send(embed=EmbedCreator.create_error_embed("Error", f"Could not react to that message: {e}"))
+            return
+
+        entry = reaction_role_index.add(ctx.guild.id, channel.id, message_id, emoji, role.id)
+        await ctx.send(embed=EmbedCreator.create_success_embed(
+            "Reaction Role Added",
+            f"Reacting with {emoji} in {channel.mention} now gives {role.mention} "
+            f"({len(entry.roles)} roles on this message)."
+        ))
+
+    @reactionrole.command(name="delete", description="Delete a reaction role message")
+    @commands.has_permissions(manage_roles=True)
+    async def delete(self, ctx, message_id: str):
+        """Delete a reaction role message and stop tracking it"""
+        entry = reaction_role_index.get(message_id) if message_id.isdigit() else None
+        if entry is None or entry.guild_id != ctx.guild.id:
+            await ctx.send(embed=EmbedCreator.create_error_embed(
+                "Not Found",
+                "Could not find a reaction role message with that ID."
+            ))
+            return
+
+        reaction_role_index.remove(entry.message_id)
+
+        channel = ctx.guild.get_channel(entry.channel_id) if entry.channel_id else None
+        if channel is not None:
+            try:
+                await rest_queue.run(
+                    channel.get_partial_message(entry.message_id).delete,
+                    ctx.guild.id,
+                    INTERACTIVE,
+                    bucket=f"channel:{channel.id}:delete"
+                )
+            except discord.NotFound:
+                pass
+            except discord.HTTPException as e:
+                logger.error(f"Error deleting reaction role message {entry.message_id}: {e}")
+                await ctx.send("Could not delete the message, but removed it from the database.")
+
+        await ctx.send(embed=EmbedCreator.create_success_embed(
+            "Deleted",
+            "Reaction role message has been deleted."
+        ))
+
     @reactionrole.command(name="list", description="List all reaction role messages")
     @commands.has_permissions(manage_roles=True)
     async def list(self, ctx):
         """List all reaction role messages in the server"""
-        reaction_roles = db.data.get('reaction_roles', {}).get(str(ctx.guild.id), {})
-        
-        if not reaction_roles:
-            embed = EmbedCreator.create_info_embed(
+        entries = reaction_role_index.for_guild(ctx.guild.id)
+        if not entries:
+            await ctx.send(embed=EmbedCreator.create_info_embed(
                 "No Reaction Roles",
                 "This server has no reaction role messages."
-            )
-            await ctx.send(embed=embed)
+            ))
             return
-        
+
         embed = discord.Embed(
             title="Reaction Role Messages",
             description="Here are all the reaction role messages in this server:",
             color=CONFIG['colors']['default']
         )
-        
-        for message_id, roles in reaction_roles.items():
-            role_count = len(roles)
-            
-            # Try to get the channel
-            channel_id = None
-            for channel in ctx.guild.text_channels:
-                try:
-                    message = await channel.fetch_message(int(message_id))
-                    channel_id = channel.id
-                    break
-                except (discord.NotFound, discord.Forbidden, discord.HTTPException):
-                    continue
-            
-            channel_text = f"<#{channel_id}>" if channel_id else "Unknown channel"
-            
+        # Embeds hold at most 25 fields
+        for entry in entries[:25]:
+            if entry.channel_id is None:
+                channel_text = "Still being located"
+            elif entry.channel_id == MISSING_CHANNEL:
+                channel_text = "Message not found"
+            else:
+                channel_text = f"<#{entry.channel_id}>"
             embed.add_field(
-                name=f"Message ID: {message_id}",
-                value=f"Channel: {channel_text}\nRoles: {role_count}",
+                name=f"Message ID: {entry.message_id}",
+                value=f"Channel: {channel_text}\nRoles: {len(entry.roles)}",
                 inline=False
             )
-        
+        if len(entries) > 25:
+            embed.set_footer(text=f"Showing 25 of {len(entries)} messages")
+
         await ctx.send(embed=embed)
 
+    async def apply_reaction(self, payload, add):
+        """Give or take the role mapped to a reaction"""
+        if not reaction_targets.wants("reaction_roles", payload.message_id):
+            return
+        entry = reaction_role_index.get(payload.message_id)
+        if entry is None or payload.guild_id is None:
+            return
+        # The event tells us where the message is for free
+        reaction_role_index.set_channel(payload.message_id, payload.channel_id)
+
+        role_id = entry.roles.get(str(payload.emoji))
+        guild = self.bot.get_guild(payload.guild_id)
+        if role_id is None or guild is None:
+            return
+        role = guild.get_role(role_id)
+        member = guild.get_member(payload.user_id)
+        if role is None or member is None or member.bot:
+            return
+
+        if add and role not in member.roles:
+            action = lambda: member.add_roles(role, reason="Reaction role")
+        elif not add and role in member.roles:
+            action = lambda: member.remove_roles(role, reason="Reaction role")
+        else:
+            return
+        try:
+            await rest_queue.run(action, guild.id, NORMAL, bucket=f"members:{guild.id}")
+        except discord.HTTPException as e:
+            logger.error(f"Error updating reaction role {role_id} for {member.id}: {e}")
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        await self.apply_reaction(payload, True)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload):
+        await self.apply_reaction(payload, False)
+
 async def setup(bot):
     await bot.add_cog(ReactionRoles(bot))
@@ -3,9 +3,12 @@ from discord.ext import commands
 import logging
 import json
 import os
+import time
 from discord import ui, SelectOption
 from config import CONFIG
 from utils.embed_creator import EmbedCreator
+from utils.interaction_router import interaction_router
+from utils.rest_queue import rest_queue, INTERACTIVE, BACKGROUND
 
 logger = logging.getLogger('discord_bot')
 
@@ -13,6 +16,216 @@ import asyncio
 
 class RoleDropdown(ui.Select):
     """Dropdown menu for role selection"""
+    
+    def __init__(self, roles_data, multiple=True):
+        options = []
+        for role_id, role_data in list(roles_data.items())[:25]:
+            options.append(SelectOption(
+                label=role_data["name"][:100],
+                value=role_id,
+                description=role_data.get("description", "")[:100] or None,
+                emoji=role_data.get("emoji")
+            ))
+        
+        # The menu is found from the message, so every dropdown shares one custom_id
+        super().__init__(
+            custom_id="rolemenu:select",
+            placeholder="Select your roles",
+            min_values=0,
+            max_values=len(options) if multiple else 1,
+            options=options
+        )
+
+class RoleMenuView(ui.View):
+    """Persistent view holding a role menu's dropdown"""
+    
+    def __init__(self, roles_data, multiple=True):
+        super().__init__(timeout=None)
+        self.add_item(RoleDropdown(roles_data, multiple))
+
+class RoleMenu(commands.Cog):
+    """Dropdown menus for self-assignable roles"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self.settings_file = "data/role_menus.json"
+        self.role_menus = {}
+        # (guild ID, user ID) -> selections waiting to be applied together
+        self.pending_selections = {}
+        # (guild ID, user ID) -> lock so one member's role edits never overlap
+        self.selection_locks = {}
+        # (guild ID, user ID) -> (monotonic time, cached role IDs at our last edit, role IDs after it)
+        self.last_edits = {}
+        self.load_settings()
+        interaction_router.attach(bot)
+        interaction_router.register("rolemenu", self.handle_select)
+        self.register_views()
+        logger.info("RoleMenu cog initialized")
+    
+    def load_settings(self):
+        """Load role menus from file"""
+        try:
+            with open(self.settings_file, "r") as f:
+                self.role_menus = json.load(f)
+        except FileNotFoundError:
+            self.role_menus = {}
+        except Exception as e:
+            logger.error(f"Error loading role menus: {e}")
+            self.role_menus = {}
+    
+    def save_settings(self):
+        """Save role menus to file"""
+        try:
+            os.makedirs(os.path.dirname(self.settings_file), exist_ok=True)
+            with open(self.settings_file, "w") as f:
+                json.dump(self.role_menus, f, indent=4)
+        except Exception as e:
+            logger.error(f"Error saving role menus: {e}")
+    
+    def register_views(self):
+        """Register a persistent view for every stored menu so they keep working after a restart"""
+        outdated = []
+        for guild_id, menus in self.role_menus.items():
+            for message_id, menu_data in menus.items():
+                view = RoleMenuView(menu_data["roles"], menu_data.get("multiple", True))
+                self.bot.add_view(view, message_id=int(message_id))
+                if not menu_data.get("persistent"):
+                    outdated.append((guild_id, message_id, view))
+        
+        if outdated:
+            self.bot.loop.create_task(self.update_outdated_menus(outdated))
+    
+    async def update_outdated_menus(self, outdated):
+        """Give menus posted before persistent views their new dropdown, once"""
+        await self.bot.wait_until_ready()
+        for guild_id, message_id, view in outdated:
+            menu_data = self.role_menus.get(guild_id, {}).get(message_id)
+            channel = self.bot.get_channel(int(menu_data["channel_id"])) if menu_data else None
+            if channel is None:
+                continue
+            try:
+                await rest_queue.run(
+                    lambda: channel.get_partial_message(int(message_id)).edit(view=view),
+                    int(guild_id),
+                    BACKGROUND,
+                    bucket=f"channel:{channel.id}"
+                )
+            except discord.NotFound:
+                pass
+            except discord.HTTPException as e:
+                logger.error(f"Error updating role menu {message_id}: {e}")
+                continue
+            menu_data["persistent"] = True
+        self.save_settings()
+    
+    async def handle_select(self, interaction, action):
+        """Queue a member's dropdown selection, applied together with any that follow quickly"""
+        menu_id = str(interaction.message.id)
+        menu_data = self.role_menus.get(str(interaction.guild_id), {}).get(menu_id)
+        if menu_data is None:
+            await interaction.response.send_message("This role menu no longer exists.", ephemeral=True)
+            return
+        
+        # Acknowledge now, the result is sent once the roles are applied
+        await interaction.response.defer()
+        
+        key = (interaction.guild_id, interaction.user.id)
+        pending = self.pending_selections.setdefault(key, {"menus": {}})
+        # Only the latest selection per menu counts
+        pending["menus"][menu_id] = set(interaction.data.get("values", []))
+        pending["interaction"] = interaction
+        
+        task = pending.get("task")
+        if task and not task.done():
+            return
+        pending["task"] = self.bot.loop.create_task(self.apply_selections_later(key))
+    
+    async def apply_selections_later(self, key):
+        await asyncio.sleep(CONFIG['role_menus']['debounce_seconds'])
+        pending = self.pending_selections.pop(key, None)
+        if not pending:
+            return
+        
+        # A window that opened while the previous edit was running waits for it
+        lock = self.selection_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            await self.apply_selections(key, pending)
+        if key not in self.pending_selections:
+            self.selection_locks.pop(key, None)
+    
+    def current_roles(self, key, cached):
+        """Get a member's role IDs, using our last edit's result if the gateway hasn't sent it yet"""
+        last = self.last_edits.get(key)
+        # The cache still shows the roles from before our edit, so the edit's result is newer
+        if last and time.monotonic() - last[0] < 60 and cached == last[1]:
+            return set(last[2])
+        return cached
+    
+    async def apply_selections(self, key, pending):
+        interaction = pending["interaction"]
+        guild = interaction.guild
+        member = guild.get_member(interaction.user.id) or interaction.user
+        
+        # Work out the full target role set across every menu the member changed
+        cached = {role.id for role in member.roles if not role.is_default()}
+        current = self.current_roles(key, cached)
+        target = set(current)
+        for menu_id, selected in pending["menus"].items():
+            menu_data = self.role_menus.get(str(guild.id), {}).get(menu_id)
+            if menu_data is None:
+                continue
+            menu_roles = {int(role_id) for role_id in menu_data["roles"]}
+            target -= menu_roles
+            target |= {int(role_id) for role_id in selected if role_id in menu_data["roles"]}
+        # Roles deleted since the menu was made are skipped
+        target = {role_id for role_id in target if role_id in current or guild.get_role(role_id)}
+        
+        added = [guild.get_role(role_id) for role_id in target - current]
+        removed = [guild.get_role(role_id) for role_id in current - target]
+        if not added and not removed:
+            await interaction.followup.send("Your roles are unchanged.", ephemeral=True)
+            return
+        
+        # One request applies the whole diff, however many roles changed
+        try:
+            edited = await rest_queue.run(
+                lambda: member.edit(roles=[discord.Object(role_id) for role_id in target], reason="Role menu"),
+                guild.id,
+                INTERACTIVE,
+                bucket=f"members:{guild.id}"
+            )
+        except discord.HTTPException as e:
+            logger.error(f"Error updating role menu roles for {member.id}: {e}")
+            await interaction.followup.send("I couldn't update your roles.", ephemeral=True)
+            return
+        
+        # Remember the result until the gateway update for it arrives
+        now = time.monotonic()
+        after = {role.id for role in edited.roles if not role.is_default()} if edited else target
+        self.last_edits = {other: edit for other, edit in self.last_edits.items() if now - edit[0] < 60}
+        self.last_edits[key] = (now, cached, after)
+        
+        changes = [f"+ {role.name}" for role in added if role] + [f"- {role.name}" for role in removed if role]
+        await interaction.followup.send(
+            "Your roles have been updated:\n" + "\n".join(changes),
+            ephemeral=True
+        )
+    
+    @commands.hybrid_group(name="rolemenu", description="Manage role menus", invoke_without_command=True)
+    @commands.has_permissions(manage_roles=True)
+    async def rolemenu(self, ctx):
+        """Manage role menus"""
+        await ctx.send(embed=EmbedCreator.create_info_embed(
+            "Role Menus",
+            f"`{CONFIG['prefix']}rolemenu create [channel]` - Create a role menu\n"
+            f"`{CONFIG['prefix']}rolemenu delete <message_id>` - Delete a role menu\n"
+            f"`{CONFIG['prefix']}rolemenu list` - List role menus"
+        ))
+    
+    @rolemenu.command(name="create")
+    @commands.has_permissions(manage_roles=True)
+    async def create_menu(self, ctx, channel: discord.TextChannel = None):
+        """Create a role menu step by step"""
         # Determine the target channel
         target_channel = channel or ctx.channel
         
@@ -141,20 +354,20 @@ class RoleDropdown(ui.Select):
                 
                 # Check if there's an emoji at the start of the description
                 emoji = None
-                description = role_content
+                role_description = role_content
                 
                 # Try to parse emoji from the start of the description
                 for i, char in enumerate(role_content):
                     if char.isalpha() or char.isspace():
                         if i > 0:
                             emoji = role_content[:i].strip()
-                            description = role_content[i:].strip()
+                            role_description = role_content[i:].strip()
                         break
                 
                 # Store role information
                 roles_data[str(role.id)] = {
                     "name": role.name,
-                    "description": description,
+                    "description": role_description,
                 }
                 
                 if emoji:
@@ -182,13 +395,7 @@ class RoleDropdown(ui.Select):
             )
             
             # Create the view with the dropdown, handling single/multi selection
-            view = RoleMenuView(roles_data)
-            
-            # Adjust max_values for the dropdown
-            if not allow_multiple:
-                for item in view.children:
-                    if isinstance(item, RoleDropdown):
-                        item.max_values = 1
+            view = RoleMenuView(roles_data, allow_multiple)
             
             # Send the menu to the target channel
             try:
@@ -206,7 +413,8 @@ class RoleDropdown(ui.Select):
                     "roles": roles_data,
                     "channel_id": str(target_channel.id),
                     "author_id": str(ctx.author.id),
-                    "multiple": allow_multiple
+                    "multiple": allow_multiple,
+                    "persistent": True
                 }
                 
                 self.save_settings()
@@ -1,11 +1,9 @@
 import discord
 from discord.ext import commands
-import random
-import json
-import os
 import logging
-import math
 from datetime import datetime
+from utils.helpers import Helpers
+from utils.xp_engine import xp_engine
 
 # Set up logging
 logger = logging.getLogger('discord_bot')
@@ -38,8 +36,17 @@ class SimpleLevels(commands.Cog):
     """Level tracking system with dedicated notification channel"""
     def __init__(self, bot):
         self.bot = bot
+        xp_engine.attach(bot)
         logger.info(f"SimpleLevels cog initialized")
     
+    async def cog_unload(self):
+        # Credit open voice sessions and write pending XP before unloading
+        await xp_engine.close()
+    
+    def get_user_data(self, guild_id, user_id):
+        """Get a member's level data from the shared XP engine"""
+        return SimpleLevel.from_dict({**xp_engine.get_user(guild_id, user_id), "user_id": user_id})
+    
     @commands.command(name="unknown_method")
     @commands.has_permissions(manage_guild=True)
     async def unknown_method(self, ctx, *args):
@@ -53,8 +60,8 @@ class SimpleLevels(commands.Cog):
         user_data = self.get_user_data(ctx.guild.id, member.id)
         
         # Calculate progress to next level
-        current_level_xp = self.get_xp_for_level(user_data.level)
-        next_level_xp = self.get_xp_for_level(user_data.level + 1)
+        current_level_xp = Helpers.get_xp_for_level(user_data.level)
+        next_level_xp = Helpers.get_xp_for_level(user_data.level + 1)
         xp_progress = user_data.xp - current_level_xp
         xp_needed = next_level_xp - current_level_xp
         
@@ -95,34 +102,18 @@ class SimpleLevels(commands.Cog):
     @commands.command(name="leaderboard", aliases=["lb", "top"])
     async def leaderboard_command(self, ctx, type="level"):
         """Show the server leaderboard"""
-        guild_id = ctx.guild.id
-        guild_data_file = f"data/guild_{guild_id}_levels.json"
-        
-        if not os.path.exists(guild_data_file):
-            await ctx.send("No leveling data found for this server.")
-            return
-            
         try:
-            with open(guild_data_file, 'r') as f:
-                data = json.load(f)
-                
-            # Convert to list of user data objects
-            users = [SimpleLevel.from_dict({**user_data, "user_id": int(user_id)}) 
-                    for user_id, user_data in data.items()]
-            
-            # Sort based on type
+            # The engine returns the top 10 already sorted
             if type.lower() in ["message", "messages", "msg"]:
-                users.sort(key=lambda x: x.messages, reverse=True)
                 title = "Messages Leaderboard"
                 value_key = "messages"
             else:
-                # Sort by level and then by XP
-                users.sort(key=lambda x: (x.level, x.xp), reverse=True)
+                # Sorted by level and then by XP
                 title = "Levels Leaderboard"
                 value_key = "level"
             
-            # Take top 10
-            top_users = users[:10]
+            top = await xp_engine.leaderboard(ctx.guild.id, value_key, 10)
+            top_users = [SimpleLevel.from_dict({**data, "user_id": int(data["user_id"])}) for data in top]
             
             # Create embed
             embed = discord.Embed(
@@ -168,9 +159,7 @@ class SimpleLevels(commands.Cog):
     async def level_channel(self, ctx):
         """Configure the channel for level-up notifications"""
         # Save the channel
-        guild_id = str(ctx.guild.id)
-        self.level_up_channels[guild_id] = channel.id
-        self.save_data()
+        xp_engine.set_settings(ctx.guild.id, channel_id=channel.id)
         
         # Send confirmation
         embed = discord.Embed(
@@ -185,12 +174,8 @@ class SimpleLevels(commands.Cog):
     @commands.has_permissions(manage_channels=True)
     async def level_channel_reset(self, ctx):
         """Reset to use the message channel for level-up notifications"""
-        guild_id = str(ctx.guild.id)
-        
         # Remove the channel setting
-        if guild_id in self.level_up_channels:
-            del self.level_up_channels[guild_id]
-            self.save_data()
+        xp_engine.set_settings(ctx.guild.id, channel_id=0)
             
         # Send confirmation
         embed = discord.Embed(
@@ -1,16 +1,80 @@
 import discord
 from discord.ext import commands
 import logging
-import asyncio
 
 from utils.database import db
 from utils.embed_creator import EmbedCreator
+from utils.interaction_router import interaction_router
+from utils.scheduler import scheduler
 from config import CONFIG
 
 logger = logging.getLogger('discord_bot')
 
-class TicketButton(discord.ui.Button):
-    """Button for creating tickets"""
+# Seconds between closing a ticket and deleting its channel
+CLOSE_DELAY = 5
+
+async def delete_ticket_channel(bot, payload):
+    """Delete a closed ticket channel when its scheduler job is due"""
+    channel = bot.get_channel(payload["channel_id"])
+    if channel is None:
+        return
+    try:
+        await channel.delete(reason=f"Ticket closed by {payload['closed_by']}")
+    except discord.Forbidden:
+        await channel.send("I don't have permission to delete this channel.")
+    except discord.HTTPException as e:
+        logger.error(f"Error deleting ticket channel: {e}")
+
+def schedule_ticket_delete(channel, closed_by):
+    scheduler.schedule(
+        "ticket_delete",
+        {"channel_id": channel.id, "closed_by": str(closed_by)},
+        delay=CLOSE_DELAY,
+        key=f"ticket_delete:{channel.id}"
+    )
+
+class TicketView(discord.ui.View):
+    """Persistent view with the button for creating tickets"""
+    
+    def __init__(self):
+        super().__init__(timeout=None)
+        self.add_item(discord.ui.Button(
+            label="Create Ticket",
+            emoji=CONFIG['emojis']['ticket'],
+            style=discord.ButtonStyle.primary,
+            custom_id="ticket:create"
+        ))
+
+class TicketCloseView(discord.ui.View):
+    """Persistent view with the button for closing a ticket"""
+    
+    def __init__(self):
+        super().__init__(timeout=None)
+        self.add_item(discord.ui.Button(
+            label="Close Ticket",
+            emoji="🔒",
+            style=discord.ButtonStyle.danger,
+            custom_id="ticket:close"
+        ))
+
+class Tickets(commands.Cog):
+    """Support ticket system"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+        # One registration covers every panel and ticket channel, the custom_ids are fixed
+        bot.add_view(TicketView())
+        bot.add_view(TicketCloseView())
+        interaction_router.attach(bot)
+        interaction_router.register("ticket", self.handle_button)
+        # Close buttons sent before custom_ids had a prefix
+        interaction_router.register("close_ticket", lambda interaction, argument: self.close_from_button(interaction))
+        logger.info("Tickets cog initialized")
+    
+    @commands.hybrid_command(name="ticket", description="Set up the ticket system")
+    @commands.has_permissions(manage_guild=True)
+    async def ticket(self, ctx, option: str = "setup"):
+        """Post the ticket panel in this channel"""
         if option.lower() == "setup":
             # Create ticket embed and button
             embed = discord.Embed(
@@ -20,66 +84,113 @@ class TicketButton(discord.ui.Button):
             )
             
             # Try to use ticket GIF if available
+            file = None
             try:
                 import os
                 gif_path = os.path.join("assets", "images", "tickets.gif")
                 if os.path.exists(gif_path) and os.path.getsize(gif_path) > 0:
                     file = discord.File(gif_path, filename="tickets.gif")
                     embed.set_image(url="attachment://tickets.gif")
-                    await ctx.send(file=file, embed=embed, view=TicketView())
-                    return
             except Exception as e:
                 logger.error(f"Error loading ticket GIF: {e}")
-                
-            # If no GIF or error, send without GIF
-            view = TicketView()
             
             # Send the ticket message
-            await ctx.send(embed=embed, view=view)
+            if file:
+                message = await ctx.send(file=file, embed=embed, view=TicketView())
+            else:
+                message = await ctx.send(embed=embed, view=TicketView())
+            db.set_ticket_panel(ctx.guild.id, ctx.channel.id, message.id)
     
-    @commands.Cog.listener()
-    async def on_interaction(self, interaction):
-        """Handle interactions for ticket buttons"""
-        if not interaction.type == discord.InteractionType.component:
+    async def handle_button(self, interaction, action):
+        """Route ticket:<action> buttons"""
+        if action == "create":
+            await self.create_from_button(interaction)
+        elif action == "close":
+            await self.close_from_button(interaction)
+    
+    async def create_from_button(self, interaction):
+        """Open a private ticket channel for the member who pressed the button"""
+        guild = interaction.guild
+        user = interaction.user
+        
+        existing = db.get_user_ticket(guild.id, user.id)
+        if existing and guild.get_channel(int(existing)):
+            await interaction.response.send_message(
+                f"You already have an open ticket: <#{existing}>",
+                ephemeral=True
+            )
             return
         
-        # Handle close ticket button
-        if interaction.data.get('custom_id') == 'close_ticket':
-            # Check if this is a ticket channel
-            ticket_data = db.get_ticket(interaction.guild.id, interaction.channel.id)
-            if not ticket_data:
-                await interaction.response.send_message(
-                    "This is not a ticket channel.",
-                    ephemeral=True
-                )
-                return
-            
-            # Check permissions
-            if not interaction.user.guild_permissions.manage_channels and \
-               str(interaction.user.id) != ticket_data.get('user_id'):
-                await interaction.response.send_message(
-                    "You don't have permission to close this ticket.",
-                    ephemeral=True
-                )
-                return
-            
-            # Update database
-            db.close_ticket(interaction.guild.id, interaction.channel.id)
-            
-            # Send closing message
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        
+        # Tickets go in the configured category, or a "Tickets" category
+        ticket_system = db._get_guild(guild.id).get("ticket_system", {})
+        category = None
+        if ticket_system.get("category_id"):
+            category = guild.get_channel(int(ticket_system["category_id"]))
+        if category is None:
+            category = discord.utils.get(guild.categories, name="Tickets")
+        
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(view_channel=False),
+            user: discord.PermissionOverwrite(view_channel=True, send_messages=True, attach_files=True),
+            guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_channels=True)
+        }
+        try:
+            if category is None:
+                category = await guild.create_category("Tickets", reason="Ticket system")
+            channel = await guild.create_text_channel(
+                f"ticket-{user.name}"[:100],
+                category=category,
+                overwrites=overwrites,
+                reason=f"Ticket opened by {user}"
+            )
+        except discord.HTTPException as e:
+            logger.error(f"Error creating ticket channel: {e}")
+            await interaction.followup.send("I couldn't create your ticket channel.", ephemeral=True)
+            return
+        
+        db.create_ticket(guild.id, channel.id, user.id)
+        
+        embed = discord.Embed(
+            title="Support Ticket",
+            description=f"{user.mention}, thanks for reaching out! Describe your issue and staff will be with you shortly.",
+            color=CONFIG['colors']['default']
+        )
+        await channel.send(embed=embed, view=TicketCloseView())
+        await interaction.followup.send(f"Your ticket has been created: {channel.mention}", ephemeral=True)
+    
+    async def close_from_button(self, interaction):
+        """Close the ticket channel the button was pressed in"""
+        # Check if this is a ticket channel
+        ticket_data = db.get_ticket(interaction.guild.id, interaction.channel.id)
+        if not ticket_data:
             await interaction.response.send_message(
-                f"🔒 Ticket closed by {interaction.user.mention}. This channel will be deleted in 5 seconds.",
-                ephemeral=False
+                "This is not a ticket channel.",
+                ephemeral=True
             )
-            
-            # Wait and delete the channel
-            await asyncio.sleep(5)
-            try:
-                await interaction.channel.delete(reason=f"Ticket closed by {interaction.user}")
-            except discord.Forbidden:
-                await interaction.channel.send("I don't have permission to delete this channel.")
-            except discord.HTTPException as e:
-                logger.error(f"Error deleting ticket channel: {e}")
+            return
+        
+        # Check permissions
+        if not interaction.user.guild_permissions.manage_channels and \
+           str(interaction.user.id) != ticket_data.get('user_id'):
+            await interaction.response.send_message(
+                "You don't have permission to close this ticket.",
+                ephemeral=True
+            )
+            return
+        
+        # Update database
+        db.close_ticket(interaction.guild.id, interaction.channel.id)
+        
+        # Send closing message
+        await interaction.response.send_message(
+            f"🔒 Ticket closed by {interaction.user.mention}. This channel will be deleted in {CLOSE_DELAY} seconds.",
+            ephemeral=False
+        )
+        
+        # Delete the channel after the delay
+        schedule_ticket_delete(interaction.channel, interaction.user)
     
     @commands.hybrid_command(name="close", description="Close a ticket")
     async def close(self, ctx):
@@ -110,18 +221,14 @@ class TicketButton(discord.ui.Button):
         # Send closing message
         embed = EmbedCreator.create_success_embed(
             "Ticket Closing",
-            f"Ticket closed by {ctx.author.mention}. This channel will be deleted in 5 seconds."
+            f"Ticket closed by {ctx.author.mention}. This channel will be deleted in {CLOSE_DELAY} seconds."
         )
         await ctx.send(embed=embed)
         
-        # Wait and delete the channel
-        await asyncio.sleep(5)
-        try:
-            await ctx.channel.delete(reason=f"Ticket closed by {ctx.author}")
-        except discord.Forbidden:
-            await ctx.send("I don't have permission to delete this channel.")
-        except discord.HTTPException as e:
-            logger.error(f"Error deleting ticket channel: {e}")
+        # Delete the channel after the delay
+        schedule_ticket_delete(ctx.channel, ctx.author)
 
 async def setup(bot):
+    scheduler.attach(bot)
+    scheduler.register("ticket_delete", lambda payload: delete_ticket_channel(bot, payload))
     await bot.add_cog(Tickets(bot))
@@ -4,6 +4,9 @@ import logging
 import datetime
 from config import CONFIG
 from utils.embed_creator import EmbedCreator
+from utils.case_log import case_log
+from utils.mass_action import mass_actioner
+from utils.rest_queue import rest_queue, INTERACTIVE
 
 logger = logging.getLogger('discord_bot')
 
@@ -13,11 +16,11 @@ class Timeout(commands.Cog):
         self.bot = bot
         logger.info(f"Timeout cog initialized")
     
-    @commands.command(name="unknown_method")
-    @commands.has_permissions(manage_guild=True)
-    async def unknown_method(self, ctx, *args):
-        """Auto-generated method from fixing indentation"""
-
+    @commands.command(name="timeout")
+    @commands.has_permissions(moderate_members=True)
+    @commands.bot_has_permissions(moderate_members=True)
+    async def timeout(self, ctx, member: discord.Member, duration: str, *, reason: str = "No reason provided"):
+        """Time out a member for a duration like 10m, 1h or 1d"""
         # Check if user can be timed out
         if member.top_role >= ctx.author.top_role and ctx.author != ctx.guild.owner:
             await ctx.send(embed=EmbedCreator.create_error_embed(
@@ -67,7 +70,7 @@ class Timeout(commands.Cog):
                 return
                 
             # Calculate end time
-            until = datetime.datetime.utcnow() + datetime.timedelta(seconds=duration_seconds)
+            until = discord.utils.utcnow() + datetime.timedelta(seconds=duration_seconds)
             
             # Format time for display
             if duration_seconds < 60:
@@ -84,11 +87,13 @@ class Timeout(commands.Cog):
             
             # Apply timeout
             try:
-                await member.timeout(until, reason=reason)
+                case_number = await self.timeout_member(member, duration_seconds, reason, ctx.author)
+                if case_number is None:
+                    raise RuntimeError("Discord rejected the timeout")
                 
                 # Create timeout embed
                 embed = discord.Embed(
-                    title="⏱️ User Timed Out",
+                    title=f"⏱️ User Timed Out (Case #{case_number})",
                     description=f"{member.mention} has been timed out for {time_str}.",
                     color=CONFIG['colors']['warning']
                 )
@@ -261,6 +266,49 @@ class Timeout(commands.Cog):
         )
         
         await ctx.send(embed=embed)
+    
+    @commands.command(name="masstimeout")
+    @commands.has_permissions(moderate_members=True)
+    @commands.bot_has_permissions(moderate_members=True)
+    async def mass_timeout(self, ctx, duration: str, *, args=None):
+        """Time out many members: duration, then IDs, mentions, joined:<minutes> or an attached ID list, then the reason"""
+        units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+        try:
+            if duration[-1].lower() in units:
+                seconds = int(duration[:-1]) * units[duration[-1].lower()]
+            else:
+                seconds = int(duration)
+        except ValueError:
+            seconds = 0
+        
+        if seconds < 1 or seconds > 28 * 86400:
+            await ctx.send(embed=EmbedCreator.create_error_embed(
+                "Invalid Duration",
+                "Use a duration like `10m`, `1h` or `1d`, up to 28 days."
+            ))
+            return
+        
+        await mass_actioner.run_command(ctx, "timeout", args, duration=datetime.timedelta(seconds=seconds))
+    
+    async def timeout_member(self, member, seconds, reason, moderator=None):
+        """Time out a member and record the case, used by automod
+        
+        Returns:
+            int or None: The case number, or None if the timeout failed
+        """
+        moderator = moderator or member.guild.me
+        until = discord.utils.utcnow() + datetime.timedelta(seconds=seconds)
+        try:
+            await rest_queue.run(
+                lambda: member.timeout(until, reason=reason),
+                member.guild.id,
+                INTERACTIVE
+            )
+        except discord.HTTPException as e:
+            logger.error(f"Failed to timeout {member.id} in guild {member.guild.id}: {e}")
+            return None
+        
+        return case_log.add_case(member.guild.id, "timeout", member.id, moderator.id, str(moderator), reason)
 
 async def setup(bot):
     await bot.add_cog(Timeout(bot))
\ No newline at end of file
@@ -3,12 +3,13 @@ from discord.ext import commands
 import logging
 import json
 import os
-import asyncio
 import datetime
 import random
 import platform
 import time
 from config import CONFIG
+from utils.scheduler import scheduler
+from utils.rest_queue import rest_queue
 
 logger = logging.getLogger('discord_bot')
 
@@ -16,13 +17,13 @@ class Utility(commands.Cog):
     """Utility commands for server management and information"""
     def __init__(self, bot):
         self.bot = bot
+        scheduler.attach(bot)
+        scheduler.register("reminder", self.send_reminder)
         logger.info(f"Utility cog initialized")
     
-    @commands.command(name="unknown_method")
-    @commands.has_permissions(manage_guild=True)
-    async def unknown_method(self, ctx, *args):
-        """Auto-generated method from fixing indentation"""
-
+    @commands.command(name="userinfo", aliases=["whois"])
+    async def userinfo(self, ctx, member: discord.Member = None):
+        """Show information about a member"""
         # Default to the command invoker if no member specified
         member = member or ctx.author
         
@@ -275,95 +276,6 @@ class Utility(commands.Cog):
         
         await ctx.send(embed=embed)
     
-    @commands.command(name="channelinfo")
-    async def channel_info(self, ctx, channel: discord.TextChannel = None):
-        """Show information about a channel"""
-        # Default to the current channel if none specified
-        channel = channel or ctx.channel
-        
-        # Create embed
-        embed = discord.Embed(
-            title=f"#{channel.name} Channel Information",
-            description=channel.topic or "No topic set",
-            color=CONFIG['colors']['info']
-        )
-        
-        # Add channel ID
-        embed.add_field(
-            name="🆔 Channel ID",
-            value=channel.id,
-            inline=True
-        )
-        
-        # Add category
-        embed.add_field(
-            name="📁 Category",
-            value=channel.category.name if channel.category else "None",
-            inline=True
-        )
-        
-        # Add creation date
-        created_timestamp = int(channel.created_at.timestamp())
-        created_date = f"<t:{created_timestamp}:F>\n<t:{created_timestamp}:R>"
-        
-        embed.add_field(
-            name="📅 Created",
-            value=created_date,
-            inline=True
-        )
-        
-        # Add position
-        embed.add_field(
-            name="📊 Position",
-            value=channel.position,
-            inline=True
-        )
-        
-        # Add slowmode
-        slowmode = channel.slowmode_delay
-        if slowmode > 0:
-            # Format slowmode (e.g. 5s, 1m, 1h)
-            if slowmode < 60:
-                slowmode_str = f"{slowmode}s"
-            elif slowmode < 3600:
-                slowmode_str = f"{slowmode // 60}m"
-            else:
-                slowmode_str = f"{slowmode // 3600}h"
-        else:
-            slowmode_str = "Off"
-            
-        embed.add_field(
-            name="⏱️ Slowmode",
-            value=slowmode_str,
-            inline=True
-        )
-        
-        # Add NSFW status
-        embed.add_field(
-            name="🔞 NSFW",
-            value="Yes" if channel.is_nsfw() else "No",
-            inline=True
-        )
-        
-        # Add news status (if applicable)
-        if hasattr(channel, 'is_news'):
-            embed.add_field(
-                name="📰 Announcement Channel",
-                value="Yes" if channel.is_news() else "No",
-                inline=True
-            )
-        
-        # Add permission synced status
-        if hasattr(channel, 'permissions_synced'):
-            synced = await channel.permissions_synced() if callable(channel.permissions_synced) else channel.permissions_synced
-            embed.add_field(
-                name="🔄 Synced Permissions",
-                value="Yes" if synced else "No",
-                inline=True
-            )
-        
-        await ctx.send(embed=embed)
-    
     @commands.command(name="emojis")
     async def emojis(self, ctx):
         """Show all emojis in the server"""
@@ -461,6 +373,44 @@ class Utility(commands.Cog):
         
         await ctx.send(embed=embed)
     
+    @commands.command(name="queuestats")
+    @commands.has_permissions(administrator=True)
+    async def queuestats(self, ctx):
+        """Show the outbound REST queue depth and counters"""
+        metrics = rest_queue.metrics()
+        
+        embed = discord.Embed(
+            title="📬 REST Queue",
+            color=CONFIG['colors']['info']
+        )
+        
+        embed.add_field(
+            name="Queued",
+            value="\n".join(f"{name.title()}: {depth}" for name, depth in metrics["depth"].items()),
+            inline=True
+        )
+        
+        embed.add_field(
+            name="Counters",
+            value=(
+                f"In flight: {metrics['in_flight']}\n"
+                f"Completed: {metrics['completed']}\n"
+                f"Failed: {metrics['failed']}\n"
+                f"Rate limited: {metrics['rate_limited']}"
+            ),
+            inline=True
+        )
+        
+        # Show this server's share of the queue
+        this_guild = sum(guilds.get(ctx.guild.id, 0) for guilds in metrics["guilds"].values())
+        embed.add_field(
+            name="This Server",
+            value=f"{this_guild} queued",
+            inline=True
+        )
+        
+        await ctx.send(embed=embed)
+    
     @commands.command(name="remind")
     async def remind(self, ctx, time: str, *, reminder: str):
         """Set a reminder"""
@@ -518,40 +468,59 @@ class Utility(commands.Cog):
         
         await ctx.send(embed=embed)
         
-        # Wait for the specified time
-        await asyncio.sleep(seconds)
-        
+        # Hand the reminder to the scheduler so it survives restarts
+        scheduler.schedule(
+            "reminder",
+            {
+                "user_id": ctx.author.id,
+                "guild_id": ctx.guild.id if ctx.guild else None,
+                "channel_id": ctx.channel.id,
+                "reminder": reminder,
+                "set_at": now.replace(tzinfo=datetime.timezone.utc).timestamp(),
+                "seconds": seconds
+            },
+            delay=seconds
+        )
+    
+    async def send_reminder(self, payload):
+        """Deliver a reminder when its scheduler job is due"""
         # Create reminder embed
         reminder_embed = discord.Embed(
             title="⏰ Reminder",
-            description=reminder,
+            description=payload["reminder"],
             color=CONFIG['colors']['info'],
-            timestamp=now  # When the reminder was set
+            timestamp=datetime.datetime.fromtimestamp(payload["set_at"], datetime.timezone.utc)  # When the reminder was set
         )
         
         reminder_embed.add_field(
             name="Reminder Set",
-            value=f"{seconds_to_time_string(seconds)} ago",
+            value=f"{seconds_to_time_string(payload['seconds'])} ago",
             inline=False
         )
         
+        user = self.bot.get_user(payload["user_id"])
+        channel = self.bot.get_channel(payload["channel_id"])
+        in_guild = payload["guild_id"] is not None and channel is not None
+        
         # Send the reminder
         try:
-            await ctx.author.send(f"{ctx.author.mention} Here's your reminder!", embed=reminder_embed)
+            if user is None:
+                user = await self.bot.fetch_user(payload["user_id"])
+            await user.send(f"{user.mention} Here's your reminder!", embed=reminder_embed)
             
             # If the reminder was set in a guild, also send a message there
-            if ctx.guild:
-                await ctx.send(f"{ctx.author.mention} I've sent your reminder to your DMs!")
+            if in_guild:
+                await channel.send(f"{user.mention} I've sent your reminder to your DMs!")
                 
         except discord.Forbidden:
             # Can't DM the user
-            if ctx.guild:
-                await ctx.send(f"{ctx.author.mention} Here's your reminder!", embed=reminder_embed)
+            if in_guild:
+                await channel.send(f"<@{payload['user_id']}> Here's your reminder!", embed=reminder_embed)
             
         except Exception as e:
             logger.error(f"Error sending reminder: {e}")
-            if ctx.guild:
-                await ctx.send(f"{ctx.author.mention} I tried to send your reminder, but something went wrong.")
+            if in_guild:
+                await channel.send(f"<@{payload['user_id']}> I tried to send your reminder, but something went wrong.")
 
 def seconds_to_time_string(seconds):
     """Convert seconds to a human-readable time string"""
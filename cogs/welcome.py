@@ -4,6 +4,7 @@ import logging
 import json
 import os
 from config import CONFIG
+from utils.raid_guard import raid_guard
 
 logger = logging.getLogger('discord_bot')
 
@@ -14,6 +15,8 @@ class Welcome(commands.Cog):
         self.bot = bot
         self.welcome_settings = {}
         self.load_welcome_settings()
+        raid_guard.attach(bot)
+        raid_guard.register_flush("welcome", self.send_welcome_batch)
         logger.info("Welcome cog initialized")
         
     def load_welcome_settings(self):
@@ -38,6 +41,53 @@ class Welcome(commands.Cog):
         except Exception as e:
             logger.error(f"Error saving welcome settings: {e}")
             
+    def get_welcome_channel(self, guild):
+        """Get the guild's welcome channel if welcome messages are enabled"""
+        settings = self.welcome_settings.get(str(guild.id))
+        if not settings or not settings.get('enabled') or not settings.get('channel_id'):
+            return None
+        return guild.get_channel(int(settings['channel_id']))
+    
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        """Send the welcome message for a new member"""
+        if member.bot:
+            return
+        
+        channel = self.get_welcome_channel(member.guild)
+        if channel is None:
+            return
+        
+        # During a raid, welcome everyone in one message per interval
+        if raid_guard.observe(member):
+            raid_guard.aggregate("welcome", member)
+            return
+        
+        message = self.welcome_settings[str(member.guild.id)]['message']
+        try:
+            await channel.send(message.replace('{member}', member.mention))
+        except discord.HTTPException as e:
+            logger.error(f"Error sending welcome message in guild {member.guild.id}: {e}")
+    
+    async def send_welcome_batch(self, guild, members):
+        """Welcome the members who joined during raid mode in one message"""
+        channel = self.get_welcome_channel(guild)
+        if channel is None:
+            return
+        
+        # Only welcome members who are still here
+        members = [member for member in members if guild.get_member(member.id)]
+        if not members:
+            return
+        
+        mentions = ", ".join(member.mention for member in members[:20])
+        if len(members) > 20:
+            mentions += f" and {len(members) - 20} others"
+        await channel.send(
+            f"Welcome {mentions} to the server!",
+            allowed_mentions=discord.AllowedMentions.none()
+        )
+    
     @commands.command(name="welcome")
     @commands.has_permissions(manage_guild=True)
     async def welcome_command(self, ctx, channel: discord.TextChannel = None):
@@ -58,7 +108,7 @@ class Welcome(commands.Cog):
             self.welcome_settings[guild_id]['channel_id'] = str(channel.id)
             
         # Save updated settings
-        self.save_settings()
+        self.save_welcome_settings()
         
         embed = discord.Embed(
             title="✅ Welcome Channel Set",
@@ -69,7 +119,7 @@ class Welcome(commands.Cog):
         # Enable welcome messages if they're not already
         if not self.welcome_settings[guild_id].get('enabled', False):
             self.welcome_settings[guild_id]['enabled'] = True
-            self.save_settings()
+            self.save_welcome_settings()
             
             embed.add_field(
                 name="ℹ️ Welcome Messages Enabled",
@@ -96,7 +146,7 @@ class Welcome(commands.Cog):
             self.welcome_settings[guild_id]['message'] = message
             
         # Save updated settings
-        self.save_settings()
+        self.save_welcome_settings()
         
         embed = discord.Embed(
             title="✅ Welcome Message Set",
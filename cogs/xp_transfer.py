@@ -0,0 +1,142 @@
+import discord
+from discord.ext import commands
+import logging
+import asyncio
+import os
+import tempfile
+
+import aiohttp
+
+from utils.db_manager import db
+from utils.embed_creator import EmbedCreator
+from utils.xp_engine import xp_engine
+from utils.xp_transfer import FORMATS, detect_format, export_guild, iter_import_batches
+
+logger = logging.getLogger('discord_bot')
+
+class XPTransfer(commands.Cog):
+    """Import and export level data for migrations from other bots"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.running_imports = set()
+        logger.info("XPTransfer cog initialized")
+
+    async def download_attachment(self, attachment, path):
+        """Stream an attachment to disk in chunks instead of reading it into memory"""
+        async with aiohttp.ClientSession() as session:
+            async with session.get(attachment.url) as response:
+                response.raise_for_status()
+                with open(path, "wb") as f:
+                    async for chunk in response.content.iter_chunked(64 * 1024):
+                        f.write(chunk)
+
+    @commands.hybrid_command(name="xpexport", description="Export the server's XP data as CSV or NDJSON")
+    @commands.has_permissions(administrator=True)
+    async def xpexport(self, ctx, file_format: str = "csv"):
+        """Export XP, levels and message counts for this server"""
+        file_format = file_format.lower()
+        if file_format not in FORMATS:
+            await ctx.send(embed=EmbedCreator.create_error_embed(
+                "Invalid Format",
+                f"Valid formats are: {', '.join(FORMATS)}"
+            ))
+            return
+
+        fd, path = tempfile.mkstemp(suffix=f".{file_format}")
+        os.close(fd)
+        try:
+            # Write unflushed XP first so the export is current
+            await xp_engine.flush(ctx.guild.id)
+            count = await asyncio.to_thread(export_guild, db, ctx.guild.id, path, file_format)
+            filename = f"xp_{ctx.guild.id}.{file_format}"
+            await ctx.send(
+                embed=EmbedCreator.create_success_embed(
+                    "XP Exported",
+                    f"Exported level data for **{count}** members."
+                ),
+                file=discord.File(path, filename=filename)
+            )
+        except discord.HTTPException as e:
+            await ctx.send(embed=EmbedCreator.create_error_embed(
+                "Upload Failed",
+                f"The export could not be uploaded: {e}\n"
+                f"Use `python -m utils.xp_transfer export {ctx.guild.id} <file>` on the host instead."
+            ))
+        finally:
+            os.remove(path)
+
+    @commands.hybrid_command(name="xpimport", description="Import XP data from a CSV or NDJSON attachment")
+    @commands.has_permissions(administrator=True)
+    async def xpimport(self, ctx, attachment: discord.Attachment = None):
+        """Import XP data from another leveling bot, overwriting existing entries"""
+        attachment = attachment or (ctx.message.attachments[0] if ctx.message.attachments else None)
+        if attachment is None:
+            await ctx.send(embed=EmbedCreator.create_error_embed(
+                "No File",
+                "Attach a `.csv` or `.ndjson` file with `user_id`, `xp`, `level` and `messages` columns."
+            ))
+            return
+
+        try:
+            file_format = detect_format(attachment.filename)
+        except ValueError as e:
+            await ctx.send(embed=EmbedCreator.create_error_embed("Invalid Format", str(e)))
+            return
+
+        if ctx.guild.id in self.running_imports:
+            await ctx.send(embed=EmbedCreator.create_info_embed(
+                "Import Running",
+                "An XP import is already running for this server."
+            ))
+            return
+
+        self.running_imports.add(ctx.guild.id)
+        status = await ctx.send(embed=EmbedCreator.create_loading_embed(
+            "Importing XP",
+            "Downloading file..."
+        ))
+
+        fd, path = tempfile.mkstemp(suffix=f".{file_format}")
+        os.close(fd)
+        imported = 0
+        failed = 0
+        try:
+            await self.download_attachment(attachment, path)
+
+            for batch_number, batch in enumerate(iter_import_batches(path, file_format), 1):
+                if await xp_engine.import_levels(ctx.guild.id, batch):
+                    imported += len(batch)
+                else:
+                    failed += len(batch)
+
+                if batch_number % 20 == 0:
+                    await status.edit(embed=EmbedCreator.create_loading_embed(
+                        "Importing XP",
+                        f"Imported {imported} members so far..."
+                    ))
+                # Let other events run between batches
+                await asyncio.sleep(0)
+
+            description = f"Imported level data for **{imported}** members."
+            if failed:
+                description += f"\n{failed} rows could not be saved."
+            await status.edit(embed=EmbedCreator.create_success_embed("XP Imported", description))
+
+            # Imported levels may qualify members for level roles
+            level_roles = self.bot.get_cog("LevelRoles")
+            if level_roles and imported:
+                job = level_roles.start_sync(ctx.guild)
+                self.bot.loop.create_task(level_roles.report_progress(ctx, job))
+        except Exception as e:
+            logger.error(f"XP import failed for guild {ctx.guild.id}: {e}")
+            await status.edit(embed=EmbedCreator.create_error_embed(
+                "Import Failed",
+                f"Imported {imported} members before an error occurred: {e}"
+            ))
+        finally:
+            self.running_imports.discard(ctx.guild.id)
+            os.remove(path)
+
+async def setup(bot):
+    await bot.add_cog(XPTransfer(bot))
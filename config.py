@@ -19,7 +19,10 @@ CONFIG = {
         'role_menu',
         'timeout',
         'channel_management',
-        'direct_moderation'
+        'direct_moderation',
+        'level_roles',
+        'xp_transfer',
+        'automod'
     ],
     'colors': {
         'default': 0x5865F2,  # Discord Blurple
@@ -58,6 +61,65 @@ CONFIG = {
         'xp_cooldown': 60,         # Seconds between XP awards
         'level_up_channel_id': None,  # Set to a specific channel ID to send all level up notifications
                                       # If None, uses guild-specific settings from the database
-        'level_roles': {}           # Roles awarded at specific levels - format: {level: role_id}
+        'level_roles': {},          # Roles awarded at specific levels - format: {level: role_id}
+        'stack_level_roles': True,  # Keep lower level roles when a higher one is earned
+        'announce_window': 5,       # Seconds to merge level up announcements per channel
+        'voice_xp_per_minute': 5    # XP per minute in voice (not muted, deafened or AFK), 0 to disable
+    },
+    'polls': {
+        'single_vote': True,        # Members can only vote for one option, a new vote moves the old one
+        'live_update_interval': 5   # Seconds between live result edits of a poll message
+    },
+    'giveaways': {
+        'role_weights': {},         # Extra entries by role - format: {role_id: weight}, highest role weight applies
+        'level_weight': 0           # Extra entry weight per member level, 0 to ignore levels
+    },
+    'analytics': {
+        'sketch_guilds': [],        # Guild IDs that keep approximate sketches instead of exact per-member activity
+        'days': 7,                  # Days of sketches kept, the longest window for active users and top posters
+        'top_capacity': 50          # Members tracked per top poster sketch
+    },
+    'purge': {
+        'max_amount': 5000,         # Most messages one purge scans per channel
+        'max_channels': 5,          # Most channels one purge runs in at once
+        'old_message_delay': 1.0    # Seconds between deletes of messages older than 14 days
+    },
+    'raid': {
+        'join_threshold': 10,       # Joins inside the window that switch a guild into raid mode
+        'new_account_threshold': 5, # Joins of new accounts inside the window that switch into raid mode
+        'window_seconds': 10,       # Length of the sliding join window
+        'new_account_days': 7,      # Accounts younger than this count as new
+        'cooldown': 120,            # Seconds without a trip before raid mode ends
+        'batch_interval': 10,       # Seconds between aggregated welcome and join log messages
+        'lockdown': False           # Raise the verification level to highest while in raid mode
+    },
+    'automod': {
+        'block_invites': False,     # Default for new guilds: delete messages with invite links
+        'mention_limit': 0,         # Default for new guilds: mentions in one message that trigger a timeout, 0 to disable
+        'timeout_minutes': 10       # Timeout length for mass mentions
+    },
+    'flood': {
+        'history': 8,               # Messages remembered per member
+        'window_seconds': 15,       # How far back messages count toward the limits
+        'duplicate_limit': 4,       # Identical messages within the window that trigger a timeout
+        'near_duplicate_limit': 5,  # Near-identical messages within the window that trigger a timeout
+        'user_rate_limit': 8,       # Messages from one member within the window that trigger a timeout
+        'channel_rate_limit': 25,   # Messages in one channel within the window that turn on slowmode
+        'idle_seconds': 300,        # Members and channels quiet this long are forgotten
+        'timeout_minutes': 5,       # Timeout length for spam and floods
+        'slowmode_seconds': 5,      # Slowmode delay applied to a flooded channel
+        'slowmode_duration': 300    # Seconds before a flooded channel's slowmode is turned back off
+    },
+    'mass_actions': {
+        'ban_delete_message_seconds': 3600  # Message history of mass banned users to delete
+    },
+    'archive': {
+        'flush_interval': 5,        # Seconds between batched writes of logged events
+        'batch_size': 500,          # Buffered events that trigger a write before the interval
+        'log_retention_days': 30,   # Days logged events are kept, 0 keeps them forever (cases are always kept)
+        'prune_interval': 3600      # Seconds between deletions of expired logged events
+    },
+    'role_menus': {
+        'debounce_seconds': 1.5     # Role menu selections within this time are applied in one request
     }
 }
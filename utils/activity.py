@@ -0,0 +1,301 @@
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+from array import array
+
+logger = logging.getLogger('discord_bot')
+
+HOUR = 3600
+DAY = 86400
+
+class Ring:
+    """Fixed-size ring of counters indexed by absolute bucket number
+
+    Bucket n is stored at slot n % size. Advancing to a newer bucket zeroes the
+    slots in between, so old counts age out without any cleanup pass.
+    """
+
+    __slots__ = ("counts", "last")
+
+    def __init__(self, size, last=0, counts=None):
+        self.counts = array("I", counts if counts is not None else [0] * size)
+        self.last = last
+
+    def _advance(self, bucket):
+        size = len(self.counts)
+        if bucket - self.last >= size:
+            for i in range(size):
+                self.counts[i] = 0
+        else:
+            for n in range(self.last + 1, bucket + 1):
+                self.counts[n % size] = 0
+        self.last = bucket
+
+    def add(self, bucket, amount=1):
+        if bucket > self.last:
+            self._advance(bucket)
+        elif self.last - bucket >= len(self.counts):
+            # Too old to be stored
+            return
+        self.counts[bucket % len(self.counts)] += amount
+
+    def window(self, bucket, length):
+        """Get counts for the `length` buckets ending at `bucket`, oldest first"""
+        size = len(self.counts)
+        length = min(length, size)
+        values = []
+        for n in range(bucket - length + 1, bucket + 1):
+            # Buckets newer than the last write, or already overwritten, are empty
+            if n > self.last or self.last - n >= size:
+                values.append(0)
+            else:
+                values.append(self.counts[n % size])
+        return values
+
+    def total(self, bucket, length):
+        return sum(self.window(bucket, length))
+
+    def to_list(self):
+        return [self.last, self.counts.tolist()]
+
+class ActivityStore:
+    """Per-guild message activity time series with bounded memory
+
+    Each guild keeps hourly and daily rings of its total message count, and
+    each member keeps a short hourly ring and a longer daily ring. Windowed
+    leaderboards sum the member rings instead of scanning dated dict keys.
+    Channels keep a running message count and the time of their last message.
+    """
+
+    def __init__(self, data_file="data/activity.json", guild_hours=168, guild_days=90,
+                 user_hours=24, user_days=30, save_interval=300):
+        """Initialize the store
+
+        Args:
+            data_file: JSON file the rings are saved to
+            guild_hours: Hourly buckets kept for the guild graph
+            guild_days: Daily buckets kept for the guild graph
+            user_hours: Hourly buckets kept per member
+            user_days: Daily buckets kept per member, the longest leaderboard window
+            save_interval: Seconds between saves while there are changes
+        """
+        self.data_file = data_file
+        self.guild_hours = guild_hours
+        self.guild_days = guild_days
+        self.user_hours = user_hours
+        self.user_days = user_days
+        self.save_interval = save_interval
+
+        # guild_id -> {"hourly": Ring, "daily": Ring, "users": {user_id: (hourly Ring, daily Ring)},
+        #              "channels": {channel_id: [message_count, last_message_timestamp]}}
+        self.guilds = {}
+        self._dirty = False
+        self._save_task = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.data_file):
+            return
+        try:
+            with open(self.data_file, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading activity data: {e}")
+            return
+
+        for guild_id, guild in data.items():
+            try:
+                self.guilds[int(guild_id)] = {
+                    "hourly": self._ring(self.guild_hours, guild["hourly"]),
+                    "daily": self._ring(self.guild_days, guild["daily"]),
+                    "users": {
+                        int(user_id): (self._ring(self.user_hours, rings[0]), self._ring(self.user_days, rings[1]))
+                        for user_id, rings in guild.get("users", {}).items()
+                    },
+                    "channels": {
+                        int(channel_id): list(counter)
+                        for channel_id, counter in guild.get("channels", {}).items()
+                    }
+                }
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping invalid activity data for guild {guild_id}: {e}")
+
+    @staticmethod
+    def _ring(size, saved):
+        last, counts = saved
+        if len(counts) != size:
+            # Ring size changed in the config, start this ring over
+            return Ring(size, last)
+        return Ring(size, last, counts)
+
+    def save(self):
+        """Write all rings to disk"""
+        data = {
+            str(guild_id): {
+                "hourly": guild["hourly"].to_list(),
+                "daily": guild["daily"].to_list(),
+                "users": {
+                    str(user_id): [hourly.to_list(), daily.to_list()]
+                    for user_id, (hourly, daily) in guild["users"].items()
+                },
+                "channels": {str(channel_id): counter for channel_id, counter in guild["channels"].items()}
+            }
+            for guild_id, guild in self.guilds.items()
+        }
+        try:
+            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+            with open(self.data_file, "w") as f:
+                json.dump(data, f)
+            self._dirty = False
+        except Exception as e:
+            logger.error(f"Error saving activity data: {e}")
+
+    def _schedule_save(self):
+        self._dirty = True
+        if self._save_task is None or self._save_task.done():
+            try:
+                self._save_task = asyncio.get_running_loop().create_task(self._save_later())
+            except RuntimeError:
+                self._save_task = None
+
+    async def _save_later(self):
+        await asyncio.sleep(self.save_interval)
+        # Members who went quiet for the whole daily window no longer need rings
+        for guild_id in list(self.guilds):
+            self.prune(guild_id)
+        if self._dirty:
+            self.save()
+
+    def _guild(self, guild_id):
+        guild = self.guilds.get(guild_id)
+        if guild is None:
+            guild = {
+                "hourly": Ring(self.guild_hours),
+                "daily": Ring(self.guild_days),
+                "users": {},
+                "channels": {}
+            }
+            self.guilds[guild_id] = guild
+        return guild
+
+    def record(self, guild_id, user_id, amount=1, timestamp=None, per_user=True, channel_id=None):
+        """Count messages for a member at a time (defaults to now)
+
+        Args:
+            per_user: Set to False to only count the guild totals
+            channel_id: Channel the messages were sent in, updates its counter
+        """
+        timestamp = timestamp or time.time()
+        hour, day = int(timestamp // HOUR), int(timestamp // DAY)
+
+        guild = self._guild(guild_id)
+        guild["hourly"].add(hour, amount)
+        guild["daily"].add(day, amount)
+
+        if per_user:
+            rings = guild["users"].get(user_id)
+            if rings is None:
+                rings = (Ring(self.user_hours), Ring(self.user_days))
+                guild["users"][user_id] = rings
+            rings[0].add(hour, amount)
+            rings[1].add(day, amount)
+
+        if channel_id is not None:
+            counter = guild["channels"].setdefault(channel_id, [0, 0])
+            counter[0] += amount
+            counter[1] = max(counter[1], timestamp)
+
+        self._schedule_save()
+
+    def top(self, guild_id, hours=None, days=None, limit=10):
+        """Get the top members over the last `hours` or `days`
+
+        Returns:
+            list: [{"user_id", "count"}] sorted by count, highest first
+        """
+        guild = self.guilds.get(guild_id)
+        if not guild:
+            return []
+
+        now = time.time()
+        if hours is not None:
+            index, bucket, length = 0, int(now // HOUR), hours
+        else:
+            index, bucket, length = 1, int(now // DAY), days
+
+        totals = (
+            (rings[index].total(bucket, length), user_id)
+            for user_id, rings in guild["users"].items()
+        )
+        return [
+            {"user_id": user_id, "count": count}
+            for count, user_id in heapq.nlargest(limit, totals)
+            if count > 0
+        ]
+
+    def active_users(self, guild_id, days=1):
+        """Count members who sent a message in the last `days` days"""
+        guild = self.guilds.get(guild_id)
+        if not guild:
+            return 0
+
+        bucket = int(time.time() // DAY)
+        return sum(1 for rings in guild["users"].values() if rings[1].total(bucket, days) > 0)
+
+    def series(self, guild_id, hours=None, days=None):
+        """Get the guild's message counts per hour or day, oldest first"""
+        guild = self._guild(guild_id)
+        now = time.time()
+        if hours is not None:
+            return guild["hourly"].window(int(now // HOUR), hours)
+        return guild["daily"].window(int(now // DAY), days)
+
+    def channel_stats(self, guild_id, channel_id):
+        """Get (message_count, last_message_timestamp) for a channel, zeros if untracked"""
+        guild = self.guilds.get(guild_id)
+        counter = guild["channels"].get(channel_id) if guild else None
+        return tuple(counter) if counter else (0, 0)
+
+    def busiest_channels(self, guild_id, limit=10):
+        """Get [(channel_id, message_count, last_message_timestamp)] by message count"""
+        guild = self.guilds.get(guild_id)
+        if not guild:
+            return []
+        return [
+            (channel_id, count, last)
+            for channel_id, (count, last) in heapq.nlargest(
+                limit, guild["channels"].items(), key=lambda pair: pair[1][0]
+            )
+        ]
+
+    def forget_channel(self, guild_id, channel_id):
+        guild = self.guilds.get(guild_id)
+        if guild and guild["channels"].pop(channel_id, None):
+            self._schedule_save()
+
+    def prune(self, guild_id):
+        """Drop members with no messages left in their daily ring"""
+        guild = self.guilds.get(guild_id)
+        if not guild:
+            return 0
+        day = int(time.time() // DAY)
+        idle = [
+            user_id for user_id, (hourly, daily) in guild["users"].items()
+            if daily.total(day, self.user_days) == 0
+        ]
+        for user_id in idle:
+            del guild["users"][user_id]
+        if idle:
+            self._schedule_save()
+        return len(idle)
+
+    def reset_user(self, guild_id, user_id):
+        guild = self.guilds.get(guild_id)
+        if guild and guild["users"].pop(user_id, None):
+            self._schedule_save()
+
+# Create a global activity store instance
+activity = ActivityStore()
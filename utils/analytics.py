@@ -0,0 +1,274 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+
+from config import CONFIG
+
+logger = logging.getLogger('discord_bot')
+
+DAY = 86400
+
+class SpaceSaving:
+    """Space-Saving heavy hitter sketch tracking at most `capacity` items
+
+    Any item with more than total / capacity occurrences is guaranteed to be
+    tracked, and each count overestimates the true count by at most its error.
+    """
+
+    def __init__(self, capacity=50):
+        self.capacity = capacity
+        # item -> [count, error]
+        self.counters = {}
+
+    def add(self, item, amount=1):
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += amount
+        elif len(self.counters) < self.capacity:
+            self.counters[item] = [amount, 0]
+        else:
+            # Replace the smallest counter; the new item inherits its count as error
+            victim = min(self.counters, key=lambda key: self.counters[key][0])
+            floor = self.counters.pop(victim)[0]
+            self.counters[item] = [floor + amount, floor]
+
+    def _floor(self):
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(counter[0] for counter in self.counters.values())
+
+    def merge(self, other):
+        """Combine two sketches into a new one of the same capacity"""
+        merged = SpaceSaving(self.capacity)
+        floor_a, floor_b = self._floor(), other._floor()
+        combined = {}
+        for item in set(self.counters) | set(other.counters):
+            a = self.counters.get(item, [floor_a, floor_a])
+            b = other.counters.get(item, [floor_b, floor_b])
+            combined[item] = [a[0] + b[0], a[1] + b[1]]
+        largest = sorted(combined.items(), key=lambda pair: pair[1][0], reverse=True)[:self.capacity]
+        merged.counters = dict(largest)
+        return merged
+
+    def top(self, limit=10):
+        """Get [(item, count, error)] sorted by count, highest first"""
+        ranked = sorted(self.counters.items(), key=lambda pair: pair[1][0], reverse=True)[:limit]
+        return [(item, count, error) for item, (count, error) in ranked]
+
+    def to_dict(self):
+        return {"capacity": self.capacity, "counters": self.counters}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["capacity"])
+        sketch.counters = {int(item): list(counter) for item, counter in data["counters"].items()}
+        return sketch
+
+class HyperLogLog:
+    """HyperLogLog distinct counter using 2^precision one-byte registers
+
+    The standard error is about 1.04 / sqrt(2^precision), 1.6% at precision 12.
+    """
+
+    def __init__(self, precision=12, registers=None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = registers if registers is not None else bytearray(self.size)
+
+    @staticmethod
+    def _hash(item):
+        # Stable across restarts, unlike hash()
+        return int.from_bytes(hashlib.blake2b(str(item).encode(), digest_size=8).digest(), "big")
+
+    def add(self, item):
+        value = self._hash(item)
+        index = value >> (64 - self.precision)
+        remaining = value & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """Get the union of two counters by taking the max of each register"""
+        return HyperLogLog(self.precision, bytearray(map(max, self.registers, other.registers)))
+
+    def count(self):
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        if estimate <= 2.5 * m:
+            # Small range correction
+            zeros = self.registers.count(0)
+            if zeros:
+                estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def to_str(self):
+        return base64.b64encode(bytes(self.registers)).decode()
+
+    @classmethod
+    def from_str(cls, precision, data):
+        registers = bytearray(base64.b64decode(data))
+        if len(registers) != 1 << precision:
+            return cls(precision)
+        return cls(precision, registers)
+
+class AnalyticsStore:
+    """Fixed-memory per-guild analytics built from sketches
+
+    For each of the last `days` days a guild keeps a Space-Saving sketch of top
+    posters, a HyperLogLog of active users and one HyperLogLog per channel.
+    Weekly figures merge the daily sketches.
+    """
+
+    def __init__(self, data_file="data/analytics.json", days=7, top_capacity=50,
+                 guild_precision=12, channel_precision=10, save_interval=300):
+        """Initialize the store
+
+        Args:
+            data_file: JSON file the sketches are saved to
+            days: Daily sketches kept per guild, the longest window
+            top_capacity: Counters per Space-Saving sketch
+            guild_precision: HyperLogLog precision for guild active users
+            channel_precision: HyperLogLog precision for channel active users
+            save_interval: Seconds between saves while there are changes
+        """
+        self.data_file = data_file
+        self.days = days
+        self.top_capacity = top_capacity
+        self.guild_precision = guild_precision
+        self.channel_precision = channel_precision
+        self.save_interval = save_interval
+
+        # guild_id -> {day: {"top": SpaceSaving, "users": HyperLogLog, "channels": {channel_id: HyperLogLog}}}
+        self.guilds = {}
+        self._dirty = False
+        self._save_task = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.data_file):
+            return
+        try:
+            with open(self.data_file, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading analytics data: {e}")
+            return
+
+        for guild_id, days in data.items():
+            try:
+                self.guilds[int(guild_id)] = {
+                    int(day): {
+                        "top": SpaceSaving.from_dict(sketches["top"]),
+                        "users": HyperLogLog.from_str(self.guild_precision, sketches["users"]),
+                        "channels": {
+                            int(channel_id): HyperLogLog.from_str(self.channel_precision, registers)
+                            for channel_id, registers in sketches["channels"].items()
+                        }
+                    }
+                    for day, sketches in days.items()
+                }
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping invalid analytics data for guild {guild_id}: {e}")
+
+    def save(self):
+        """Write all sketches to disk"""
+        data = {
+            str(guild_id): {
+                str(day): {
+                    "top": sketches["top"].to_dict(),
+                    "users": sketches["users"].to_str(),
+                    "channels": {
+                        str(channel_id): hll.to_str()
+                        for channel_id, hll in sketches["channels"].items()
+                    }
+                }
+                for day, sketches in days.items()
+            }
+            for guild_id, days in self.guilds.items()
+        }
+        try:
+            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+            with open(self.data_file, "w") as f:
+                json.dump(data, f)
+            self._dirty = False
+        except Exception as e:
+            logger.error(f"Error saving analytics data: {e}")
+
+    def _schedule_save(self):
+        self._dirty = True
+        if self._save_task is None or self._save_task.done():
+            try:
+                self._save_task = asyncio.get_running_loop().create_task(self._save_later())
+            except RuntimeError:
+                self._save_task = None
+
+    async def _save_later(self):
+        await asyncio.sleep(self.save_interval)
+        if self._dirty:
+            self.save()
+
+    def _day(self, guild_id, day):
+        days = self.guilds.setdefault(guild_id, {})
+        sketches = days.get(day)
+        if sketches is None:
+            sketches = {
+                "top": SpaceSaving(self.top_capacity),
+                "users": HyperLogLog(self.guild_precision),
+                "channels": {}
+            }
+            days[day] = sketches
+            # Drop days that fell out of the window
+            for old in [d for d in days if d <= day - self.days]:
+                del days[old]
+        return sketches
+
+    def record(self, guild_id, channel_id, user_id, timestamp=None):
+        """Count a message from a member in a channel"""
+        day = int((timestamp or time.time()) // DAY)
+        if day <= int(time.time() // DAY) - self.days:
+            return
+
+        sketches = self._day(guild_id, day)
+        sketches["top"].add(user_id)
+        sketches["users"].add(user_id)
+
+        channel = sketches["channels"].get(channel_id)
+        if channel is None:
+            channel = sketches["channels"][channel_id] = HyperLogLog(self.channel_precision)
+        channel.add(user_id)
+
+        self._schedule_save()
+
+    def _window(self, guild_id, days):
+        today = int(time.time() // DAY)
+        stored = self.guilds.get(guild_id, {})
+        return [stored[day] for day in range(today - days + 1, today + 1) if day in stored]
+
+    def active_users(self, guild_id, days=1, channel_id=None):
+        """Estimate distinct active members over the last `days` days"""
+        merged = None
+        for sketches in self._window(guild_id, days):
+            hll = sketches["users"] if channel_id is None else sketches["channels"].get(channel_id)
+            if hll is not None:
+                merged = hll if merged is None else merged.merge(hll)
+        return merged.count() if merged else 0
+
+    def top_posters(self, guild_id, days=1, limit=10):
+        """Get approximate [(user_id, count, error)] over the last `days` days"""
+        merged = None
+        for sketches in self._window(guild_id, days):
+            merged = sketches["top"] if merged is None else merged.merge(sketches["top"])
+        return merged.top(limit) if merged else []
+
+# Create a global analytics store instance
+analytics = AnalyticsStore(
+    days=CONFIG['analytics']['days'],
+    top_capacity=CONFIG['analytics']['top_capacity']
+)
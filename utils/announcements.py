@@ -0,0 +1,84 @@
+import asyncio
+import logging
+
+import discord
+
+from utils.embed_creator import EmbedCreator
+from config import CONFIG
+
+logger = logging.getLogger('discord_bot')
+
+# Discord allows at most 25 fields per embed
+MAX_FIELDS = 25
+
+class LevelUpAnnouncer:
+    """Buffers level ups per channel and sends them as one embed per flush"""
+
+    def __init__(self, window=5.0):
+        """Initialize the announcer
+
+        Args:
+            window: Seconds to collect level ups in a channel before sending
+        """
+        self.window = window
+        # channel_id -> {"channel": channel, "level_ups": {member_id: (member, level)}}
+        self.pending = {}
+        self._timers = {}
+
+    def announce(self, channel, member, level):
+        """Queue a level up; the channel's buffer is flushed when its window closes"""
+        buffer = self.pending.setdefault(channel.id, {"channel": channel, "level_ups": {}})
+
+        # Several level ups by the same member inside one window only show the latest
+        buffer["level_ups"][member.id] = (member, level)
+
+        if len(buffer["level_ups"]) >= MAX_FIELDS:
+            # A full embed goes out right away; detach it so new level ups start a fresh buffer
+            self._cancel_timer(channel.id)
+            self.pending.pop(channel.id)
+            asyncio.get_running_loop().create_task(self._send(buffer))
+        elif channel.id not in self._timers:
+            self._timers[channel.id] = asyncio.get_running_loop().create_task(self._flush_later(channel.id))
+
+    def _cancel_timer(self, channel_id):
+        timer = self._timers.pop(channel_id, None)
+        if timer and timer is not asyncio.current_task():
+            timer.cancel()
+
+    async def _flush_later(self, channel_id):
+        await asyncio.sleep(self.window)
+        self._timers.pop(channel_id, None)
+        await self.flush(channel_id)
+
+    async def flush(self, channel_id):
+        """Send everything buffered for a channel in a single message"""
+        buffer = self.pending.pop(channel_id, None)
+        if buffer:
+            await self._send(buffer)
+
+    async def _send(self, buffer):
+        level_ups = list(buffer["level_ups"].values())
+        if not level_ups:
+            return
+
+        channel = buffer["channel"]
+        if len(level_ups) == 1:
+            embed = EmbedCreator.create_level_up_embed(*level_ups[0])
+        else:
+            embed = EmbedCreator.create_level_up_summary_embed(level_ups)
+
+        try:
+            await channel.send(embed=embed)
+        except discord.Forbidden:
+            logger.warning(f"No permission to announce level ups in channel {channel.id}")
+        except discord.HTTPException as e:
+            logger.error(f"Failed to announce level ups in channel {channel.id}: {e}")
+
+    async def flush_all(self):
+        """Send every pending buffer immediately, used on shutdown"""
+        for channel_id in list(self.pending):
+            self._cancel_timer(channel_id)
+            await self.flush(channel_id)
+
+# Create a global level up announcer instance
+level_up_announcer = LevelUpAnnouncer(window=CONFIG['levels'].get('announce_window', 5))
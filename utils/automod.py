@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+import re
+
+from config import CONFIG
+
+logger = logging.getLogger('discord_bot')
+
+INVITE_PATTERN = re.compile(r"(?:discord(?:app)?\.com/invite|discord\.gg)/[\w-]+", re.IGNORECASE)
+
+# Longest banned term accepted, longer ones only nest the pattern deeper
+MAX_TERM_LENGTH = 100
+
+def build_pattern(terms):
+    """Compile banned terms into one regex shaped like a trie
+
+    A plain `a|b|c` alternation tries every term at each position, so its cost
+    grows with the list. Factoring the terms into a trie first means each
+    position only follows the branch for the characters actually there, which
+    keeps the per-message cost flat as the list grows. Terms match whole words,
+    case-insensitively.
+
+    Returns:
+        re.Pattern or None: None if there are no terms
+    """
+    trie = {}
+    for term in terms:
+        term = term.lower().strip()
+        if not term:
+            continue
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        # Empty key marks the end of a term
+        node[""] = {}
+    if not trie:
+        return None
+    return re.compile(r"(?<!\w)" + _trie_regex(trie) + r"(?!\w)", re.IGNORECASE)
+
+def _trie_regex(root):
+    # Built children first with an explicit stack, since recursing once per
+    # character would hit the recursion limit on long terms
+    patterns = {}
+    stack = [(root, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if not children_done:
+            stack.append((node, True))
+            stack.extend((child, False) for char, child in node.items() if char)
+            continue
+
+        ends_here = "" in node
+        branches = [re.escape(char) + patterns.pop(id(child)) for char, child in sorted(node.items()) if char]
+        if not branches:
+            pattern = ""
+        elif len(branches) == 1 and not ends_here:
+            pattern = branches[0]
+        else:
+            pattern = "(?:" + "|".join(branches) + ")"
+            if ends_here:
+                pattern += "?"
+        patterns[id(node)] = pattern
+    return patterns[id(root)]
+
+class AutoMod:
+    """Per-guild automod rules checked on every message
+
+    Each guild's banned terms are compiled once into a single pattern and the
+    compiled pattern is cached until the list changes, so the message path
+    only runs one regex search plus the invite and mention checks.
+    """
+
+    def __init__(self, data_file="data/automod.json"):
+        """Initialize automod
+
+        Args:
+            data_file: JSON file the per-guild rules are saved to
+        """
+        self.data_file = data_file
+        # guild_id -> {"terms": [...], "invites": bool, "mention_limit": int}
+        self.settings = {}
+        # guild_id -> compiled banned term pattern (None if the list is empty)
+        self.patterns = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.data_file, "r") as f:
+                self.settings = {int(guild_id): settings for guild_id, settings in json.load(f).items()}
+        except FileNotFoundError:
+            self.settings = {}
+        except Exception as e:
+            logger.error(f"Error loading automod settings: {e}")
+            self.settings = {}
+        self.patterns = {}
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+            with open(self.data_file, "w") as f:
+                json.dump({str(guild_id): settings for guild_id, settings in self.settings.items()}, f, indent=4)
+        except Exception as e:
+            logger.error(f"Error saving automod settings: {e}")
+
+    def get_settings(self, guild_id):
+        if guild_id not in self.settings:
+            self.settings[guild_id] = {
+                "terms": [],
+                "invites": CONFIG['automod']['block_invites'],
+                "mention_limit": CONFIG['automod']['mention_limit']
+            }
+        return self.settings[guild_id]
+
+    def pattern(self, guild_id):
+        """Get the guild's compiled banned term pattern, building it on first use"""
+        if guild_id not in self.patterns:
+            terms = self.settings.get(guild_id, {}).get("terms", [])
+            try:
+                self.patterns[guild_id] = build_pattern(terms)
+            except (re.error, RecursionError) as e:
+                # Cache the failure too, so it isn't rebuilt on every message
+                logger.error(f"Could not compile banned terms for guild {guild_id}: {e}")
+                self.patterns[guild_id] = None
+        return self.patterns[guild_id]
+
+    def add_terms(self, guild_id, terms):
+        """Add banned terms and get the ones that were new
+
+        Raises:
+            ValueError: If a term is longer than MAX_TERM_LENGTH
+        """
+        terms = [term.lower().strip() for term in terms]
+        if any(len(term) > MAX_TERM_LENGTH for term in terms):
+            raise ValueError(f"Terms can be at most {MAX_TERM_LENGTH} characters long.")
+
+        settings = self.get_settings(guild_id)
+        existing = set(settings["terms"])
+        added = []
+        for term in terms:
+            if term and term not in existing:
+                existing.add(term)
+                added.append(term)
+        settings["terms"].extend(added)
+        self.patterns.pop(guild_id, None)
+        self.save()
+        return added
+
+    def remove_terms(self, guild_id, terms):
+        """Remove banned terms and get the ones that were listed"""
+        settings = self.get_settings(guild_id)
+        removing = {term.lower() for term in terms}
+        removed = [term for term in settings["terms"] if term in removing]
+        settings["terms"] = [term for term in settings["terms"] if term not in removing]
+        self.patterns.pop(guild_id, None)
+        self.save()
+        return removed
+
+    def set_option(self, guild_id, name, value):
+        self.get_settings(guild_id)[name] = value
+        self.save()
+
+    def check(self, message):
+        """Check a message against its guild's rules
+
+        Returns:
+            tuple or None: (rule, detail) of the first rule broken, None if the message is fine
+        """
+        settings = self.settings.get(message.guild.id)
+        if settings is None:
+            return None
+
+        mention_limit = settings.get("mention_limit", 0)
+        if mention_limit and len(message.raw_mentions) + len(message.raw_role_mentions) >= mention_limit:
+            return "mentions", f"{len(message.raw_mentions) + len(message.raw_role_mentions)} mentions"
+
+        if not message.content:
+            return None
+
+        if settings.get("invites") and INVITE_PATTERN.search(message.content):
+            return "invite", "Invite link"
+
+        pattern = self.pattern(message.guild.id)
+        if pattern is not None:
+            match = pattern.search(message.content)
+            if match:
+                return "banned_term", f"Banned term '{match.group(0)}'"
+        return None
+
+# Create a global automod instance
+automod = AutoMod()
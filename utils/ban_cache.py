@@ -0,0 +1,156 @@
+import asyncio
+import bisect
+import logging
+
+logger = logging.getLogger('discord_bot')
+
+class GuildBans:
+    """Ban entries of one guild indexed by ID, exact name and name prefix"""
+
+    def __init__(self):
+        # user_id -> discord.BanEntry
+        self.by_id = {}
+        # lowercased name or name#discriminator -> set of user IDs
+        self.by_name = {}
+        # Sorted (lowercased name, user_id) pairs for prefix search
+        self.sorted_names = []
+        # user_id -> (name keys, sort pair) the entry was indexed under. discord.py
+        # renames cached users in place, so removal can't recompute them
+        self.indexed = {}
+
+    @staticmethod
+    def _keys(user):
+        keys = {user.name.lower(), str(user).lower()}
+        if getattr(user, "global_name", None):
+            keys.add(user.global_name.lower())
+        return keys
+
+    def _index(self, entry):
+        """Add an entry to the name index and get its sort pair"""
+        user = entry.user
+        keys = self._keys(user)
+        pair = (user.name.lower(), user.id)
+        self.by_id[user.id] = entry
+        self.indexed[user.id] = (keys, pair)
+        for key in keys:
+            self.by_name.setdefault(key, set()).add(user.id)
+        return pair
+
+    def load(self, entries):
+        """Index the first full ban list, sorting the prefix index once instead of per entry"""
+        latest = {entry.user.id: entry for entry in entries}
+        self.sorted_names = sorted(self._index(entry) for entry in latest.values())
+
+    def add(self, entry):
+        """Add or replace one entry, e.g. from a ban event"""
+        if entry.user.id in self.by_id:
+            self.remove(entry.user.id)
+        bisect.insort(self.sorted_names, self._index(entry))
+
+    def remove(self, user_id):
+        entry = self.by_id.pop(user_id, None)
+        if entry is None:
+            return None
+        keys, pair = self.indexed.pop(user_id)
+        for key in keys:
+            ids = self.by_name.get(key)
+            if ids:
+                ids.discard(user_id)
+                if not ids:
+                    del self.by_name[key]
+        index = bisect.bisect_left(self.sorted_names, pair)
+        if index < len(self.sorted_names) and self.sorted_names[index] == pair:
+            del self.sorted_names[index]
+        return entry
+
+    def find(self, query):
+        """Get ban entries matching an ID, name, display name or name#discriminator exactly"""
+        query = query.strip()
+        if query.isdigit() and int(query) in self.by_id:
+            return [self.by_id[int(query)]]
+        return [self.by_id[user_id] for user_id in self.by_name.get(query.lower(), ())]
+
+    def search(self, prefix, limit=25):
+        """Get up to `limit` ban entries whose username starts with `prefix`"""
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self.sorted_names, (prefix,))
+        results = []
+        for name, user_id in self.sorted_names[start:]:
+            if not name.startswith(prefix) or len(results) >= limit:
+                break
+            results.append(self.by_id[user_id])
+        return results
+
+class BanCache:
+    """Per-guild ban lists, fetched from the API once and kept current from ban events"""
+
+    def __init__(self):
+        # guild_id -> GuildBans, only for fully loaded guilds
+        self.guilds = {}
+        self._locks = {}
+        # guild_id -> [(event, payload)] received while the guild was loading
+        self._loading_events = {}
+        self.bot = None
+
+    def attach(self, bot):
+        """Register the ban event listeners once; safe to call from every moderation cog"""
+        if self.bot is bot:
+            return
+        self.bot = bot
+        bot.add_listener(self.on_member_ban, "on_member_ban")
+        bot.add_listener(self.on_member_unban, "on_member_unban")
+
+    async def get(self, guild):
+        """Get the guild's indexed bans, paging the API only the first time"""
+        bans = self.guilds.get(guild.id)
+        if bans is not None:
+            return bans
+
+        lock = self._locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            if guild.id in self.guilds:
+                return self.guilds[guild.id]
+
+            bans = GuildBans()
+            self._loading_events[guild.id] = []
+            try:
+                entries = [entry async for entry in guild.bans(limit=None)]
+            finally:
+                events = self._loading_events.pop(guild.id, [])
+            bans.load(entries)
+
+            # Replay bans and unbans that happened while the pages were fetched
+            for event, payload in events:
+                if event == "ban":
+                    bans.add(payload)
+                else:
+                    bans.remove(payload)
+
+            self.guilds[guild.id] = bans
+            logger.info(f"Loaded {len(bans.by_id)} bans for guild {guild.id}")
+            return bans
+
+    async def on_member_ban(self, guild, user):
+        entry = _CachedBan(user, None)
+        if guild.id in self._loading_events:
+            self._loading_events[guild.id].append(("ban", entry))
+        elif guild.id in self.guilds:
+            self.guilds[guild.id].add(entry)
+
+    async def on_member_unban(self, guild, user):
+        if guild.id in self._loading_events:
+            self._loading_events[guild.id].append(("unban", user.id))
+        elif guild.id in self.guilds:
+            self.guilds[guild.id].remove(user.id)
+
+class _CachedBan:
+    """Ban entry built from a ban event, which does not include the reason"""
+
+    __slots__ = ("user", "reason")
+
+    def __init__(self, user, reason):
+        self.user = user
+        self.reason = reason
+
+# Create a global ban cache instance
+ban_cache = BanCache()
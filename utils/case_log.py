@@ -0,0 +1,149 @@
+import calendar
+import logging
+import os
+import sqlite3
+import time
+
+logger = logging.getLogger('discord_bot')
+
+class CaseLog:
+    """Append-only moderation case log stored in SQLite
+
+    Every action is a new row with a per-guild sequential case number; rows
+    are never rewritten. Clearing warnings appends a clear_warnings case, and
+    a member's active warnings are the warn cases after their latest clear.
+    Cases are indexed by member and by moderator so listings page through an
+    index instead of scanning the guild's history.
+    """
+
+    def __init__(self, db_file="data/cases.db"):
+        """Initialize the case log
+
+        Args:
+            db_file: SQLite database file
+        """
+        self.db_file = db_file
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        self.conn = sqlite3.connect(db_file)
+        self.conn.row_factory = sqlite3.Row
+        # WAL keeps appends cheap and lets reads run alongside them
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cases (
+                guild_id INTEGER NOT NULL,
+                case_number INTEGER NOT NULL,
+                action TEXT NOT NULL,
+                user_id INTEGER NOT NULL,
+                moderator_id INTEGER NOT NULL,
+                moderator_name TEXT,
+                reason TEXT,
+                created_at INTEGER NOT NULL,
+                PRIMARY KEY (guild_id, case_number)
+            );
+            CREATE INDEX IF NOT EXISTS cases_by_user ON cases (guild_id, user_id, case_number);
+            CREATE INDEX IF NOT EXISTS cases_by_moderator ON cases (guild_id, moderator_id, case_number);
+            CREATE TABLE IF NOT EXISTS case_counters (
+                guild_id INTEGER PRIMARY KEY,
+                last_case INTEGER NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    def add_case(self, guild_id, action, user_id, moderator_id, moderator_name=None, reason=None, created_at=None):
+        """Append a case and get its case number"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO case_counters (guild_id, last_case) VALUES (?, 1) "
+                "ON CONFLICT(guild_id) DO UPDATE SET last_case = last_case + 1",
+                (int(guild_id),)
+            )
+            case_number = self.conn.execute(
+                "SELECT last_case FROM case_counters WHERE guild_id = ?", (int(guild_id),)
+            ).fetchone()[0]
+            self.conn.execute(
+                "INSERT INTO cases (guild_id, case_number, action, user_id, moderator_id, moderator_name, reason, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (int(guild_id), case_number, action, int(user_id), int(moderator_id),
+                 moderator_name, reason, int(created_at or time.time()))
+            )
+        return case_number
+
+    def get_case(self, guild_id, case_number):
+        row = self.conn.execute(
+            "SELECT * FROM cases WHERE guild_id = ? AND case_number = ?", (int(guild_id), int(case_number))
+        ).fetchone()
+        return dict(row) if row else None
+
+    def _last_clear(self, guild_id, user_id):
+        return self.conn.execute(
+            "SELECT COALESCE(MAX(case_number), 0) FROM cases "
+            "WHERE guild_id = ? AND user_id = ? AND action = 'clear_warnings'",
+            (int(guild_id), int(user_id))
+        ).fetchone()[0]
+
+    def count_warnings(self, guild_id, user_id):
+        """Count a member's warnings since their last clear"""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM cases WHERE guild_id = ? AND user_id = ? AND action = 'warn' AND case_number > ?",
+            (int(guild_id), int(user_id), self._last_clear(guild_id, user_id))
+        ).fetchone()[0]
+
+    def get_warnings(self, guild_id, user_id, page=1, per_page=10):
+        """Get one page of a member's active warnings, oldest first"""
+        rows = self.conn.execute(
+            "SELECT * FROM cases WHERE guild_id = ? AND user_id = ? AND action = 'warn' AND case_number > ? "
+            "ORDER BY case_number LIMIT ? OFFSET ?",
+            (int(guild_id), int(user_id), self._last_clear(guild_id, user_id), per_page, (page - 1) * per_page)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def list_cases(self, guild_id, user_id=None, moderator_id=None, page=1, per_page=10):
+        """Get one page of cases, newest first, with the total count
+
+        Returns:
+            tuple: (cases, total)
+        """
+        where = "guild_id = ?"
+        params = [int(guild_id)]
+        if user_id is not None:
+            where += " AND user_id = ?"
+            params.append(int(user_id))
+        if moderator_id is not None:
+            where += " AND moderator_id = ?"
+            params.append(int(moderator_id))
+
+        total = self.conn.execute(f"SELECT COUNT(*) FROM cases WHERE {where}", params).fetchone()[0]
+        rows = self.conn.execute(
+            f"SELECT * FROM cases WHERE {where} ORDER BY case_number DESC LIMIT ? OFFSET ?",
+            params + [per_page, (page - 1) * per_page]
+        ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def import_warnings(self, warnings_by_guild):
+        """Import warnings from the old moderation_settings.json layout
+
+        Args:
+            warnings_by_guild: {guild_id: {user_id: [warning dicts]}}
+
+        Returns:
+            int: Number of warnings imported
+        """
+        imported = 0
+        for guild_id, users in warnings_by_guild.items():
+            for user_id, warnings in users.items():
+                for warning in warnings:
+                    try:
+                        # The old timestamps are naive UTC from datetime.utcnow()
+                        created_at = calendar.timegm(time.strptime(warning["timestamp"][:19], "%Y-%m-%dT%H:%M:%S"))
+                    except (KeyError, ValueError):
+                        created_at = None
+                    self.add_case(
+                        guild_id, "warn", user_id, warning.get("moderator_id", 0),
+                        warning.get("moderator_name"), warning.get("reason"), created_at
+                    )
+                    imported += 1
+        return imported
+
+# Create a global case log instance
+case_log = CaseLog()
@@ -3,6 +3,8 @@ import os
 import logging
 import time
 from datetime import datetime
+from utils.helpers import Helpers
+from utils.reaction_targets import reaction_targets
 
 logger = logging.getLogger('discord_bot')
 
@@ -18,6 +20,10 @@ class Database:
         self.file_path = file_path
         self.data = self._load_data()
         self._migrate_if_needed()
+        reaction_targets.replace("giveaways", [
+            message_id for message_id, giveaway in self.data["giveaways"].items()
+            if not giveaway.get("ended")
+        ])
     
     def _load_data(self):
         """Load data from the database file"""
@@ -206,9 +212,7 @@ class Database:
         user_xp["xp"] += xp_amount
         
         # Calculate new level based on total XP
-        # Formula: level = sqrt(total_xp / 100)
-        import math
-        new_level = math.floor(math.sqrt(user_xp["xp"] / 100))
+        new_level = Helpers.get_level_from_xp(user_xp["xp"])
         
         user_xp["level"] = new_level
         self._save_data()
@@ -218,6 +222,80 @@ class Database:
             return new_level
         return None
     
+    def bulk_add_xp(self, guild_id, updates):
+        """Apply accumulated XP and message deltas for many users with one save
+        
+        Args:
+            guild_id: The guild the updates belong to
+            updates: Mapping of {user_id: {"xp": int, "messages": int}}
+        """
+        for user_id, delta in updates.items():
+            if delta.get("xp"):
+                user_xp = self.get_xp(user_id, guild_id)
+                user_xp["xp"] += delta["xp"]
+                user_xp["level"] = Helpers.get_level_from_xp(user_xp["xp"])
+            
+            if delta.get("messages"):
+                self._add_message_count(guild_id, user_id, delta["messages"])
+        
+        return self._save_data()
+    
+    def reset_levels(self, guild_id, user_id=None):
+        """Reset level data for one user or a whole guild"""
+        guild_id = str(guild_id)
+        levels = self.data.get("levels", {}).get(guild_id, {})
+        
+        if user_id is None:
+            levels.clear()
+        else:
+            levels.pop(str(user_id), None)
+        
+        return self._save_data()
+    
+    def get_guild_levels(self, guild_id):
+        """Get every stored user level in a guild as {user_id: {"xp", "level"}}"""
+        guild_id = str(guild_id)
+        return self.data.get("levels", {}).get(guild_id, {})
+    
+    def iter_guild_levels(self, guild_id, batch_size=1000):
+        """Yield batches of {"user_id", "xp", "level", "messages"} rows for a guild"""
+        guild_id = str(guild_id)
+        levels = self.data.get("levels", {}).get(guild_id, {})
+        counts = self.data.get("message_counts", {}).get(guild_id, {})
+        
+        batch = []
+        for user_id in levels.keys() | counts.keys():
+            user_xp = levels.get(user_id, {})
+            batch.append({
+                "user_id": user_id,
+                "xp": user_xp.get("xp", 0),
+                "level": user_xp.get("level", 0),
+                "messages": counts.get(user_id, {}).get("all_time", 0)
+            })
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def bulk_set_levels(self, guild_id, rows):
+        """Overwrite XP, level and message counts for a batch of users in one save"""
+        guild_id = str(guild_id)
+        levels = self.data.setdefault("levels", {}).setdefault(guild_id, {})
+        counts = self.data.setdefault("message_counts", {}).setdefault(guild_id, {})
+        
+        for row in rows:
+            user_id = str(row["user_id"])
+            user_xp = levels.setdefault(user_id, {"level": 0, "xp": 0})
+            user_xp["xp"] = row["xp"]
+            user_xp["level"] = row["level"]
+            
+            if row.get("messages") is not None:
+                user_counts = counts.setdefault(user_id, {"all_time": 0, "daily": {}})
+                user_counts["all_time"] = row["messages"]
+        
+        return self._save_data()
+    
     def set_last_message_time(self, user_id, guild_id, timestamp):
         """Set the last message time for XP cooldown"""
         user_id = str(user_id)
@@ -265,8 +343,8 @@ class Database:
         return self._save_data()
     
     # Message tracking methods
-    def increment_message_count(self, guild_id, user_id):
-        """Increment message count for a user in a guild"""
+    def _add_message_count(self, guild_id, user_id, amount=1):
+        """Add to a user's all-time and daily message counts without saving"""
         user_id = str(user_id)
         guild_id = str(guild_id)
         today = datetime.now().strftime("%Y-%m-%d")
@@ -284,7 +362,7 @@ class Database:
             }
             
         # Increment all-time count
-        self.data["message_counts"][guild_id][user_id]["all_time"] += 1
+        self.data["message_counts"][guild_id][user_id]["all_time"] += amount
         
         # Increment daily count
         if "daily" not in self.data["message_counts"][guild_id][user_id]:
@@ -293,8 +371,11 @@ class Database:
         if today not in self.data["message_counts"][guild_id][user_id]["daily"]:
             self.data["message_counts"][guild_id][user_id]["daily"][today] = 0
             
-        self.data["message_counts"][guild_id][user_id]["daily"][today] += 1
-        
+        self.data["message_counts"][guild_id][user_id]["daily"][today] += amount
+    
+    def increment_message_count(self, guild_id, user_id):
+        """Increment message count for a user in a guild"""
+        self._add_message_count(guild_id, user_id)
         return self._save_data()
     
     def get_message_count(self, guild_id, user_id):
@@ -402,8 +483,10 @@ class Database:
             "host_id": str(host_id),
             "end_time": end_time,
             "winners": winners,
-            "participants": []
+            "participants": [],
+            "ended": False
         }
+        reaction_targets.track("giveaways", message_id)
         
         return self._save_data()
         
@@ -423,7 +506,7 @@ class Database:
         return {
             message_id: giveaway 
             for message_id, giveaway in self.data["giveaways"].items() 
-            if giveaway["end_time"] > current_time
+            if giveaway["end_time"] > current_time and not giveaway.get("ended")
         }
         
     def add_giveaway_participant(self, message_id, user_id):
@@ -445,11 +528,60 @@ class Database:
         if not giveaway:
             return None
             
-        # Remove the giveaway from active giveaways
-        self.data["giveaways"].pop(str(message_id))
+        # Keep the record so the giveaway can still be rerolled
+        giveaway["ended"] = True
+        reaction_targets.untrack("giveaways", message_id)
         self._save_data()
         
         return giveaway
+        
+    # Ticket methods
+    def create_ticket(self, guild_id, channel_id, user_id):
+        """Create a new ticket"""
+        if "tickets" not in self.data:
+            self.data["tickets"] = {}
+            
+        self.data["tickets"].setdefault(str(guild_id), {})[str(channel_id)] = {
+            "user_id": str(user_id),
+            "created_at": int(time.time()),
+            "open": True
+        }
+        
+        return self._save_data()
+        
+    def get_ticket(self, guild_id, channel_id):
+        """Get an open ticket by its channel ID"""
+        ticket = self.data.get("tickets", {}).get(str(guild_id), {}).get(str(channel_id))
+        if not ticket or not ticket.get("open"):
+            return None
+            
+        return ticket
+        
+    def get_user_ticket(self, guild_id, user_id):
+        """Get the channel ID of a user's open ticket, or None"""
+        for channel_id, ticket in self.data.get("tickets", {}).get(str(guild_id), {}).items():
+            if ticket.get("open") and ticket["user_id"] == str(user_id):
+                return channel_id
+                
+        return None
+        
+    def close_ticket(self, guild_id, channel_id):
+        """Mark a ticket as closed"""
+        ticket = self.get_ticket(guild_id, channel_id)
+        if not ticket:
+            return False
+            
+        ticket["open"] = False
+        ticket["closed_at"] = int(time.time())
+        return self._save_data()
+        
+    def set_ticket_panel(self, guild_id, channel_id, message_id):
+        """Remember the channel and message of a guild's ticket panel"""
+        ticket_system = self._get_guild(guild_id).setdefault("ticket_system", {})
+        ticket_system["enabled"] = True
+        ticket_system["channel_id"] = str(channel_id)
+        ticket_system["message_id"] = str(message_id)
+        return self._save_data()
 
 # Create a global database instance
 db = Database()
\ No newline at end of file
@@ -5,6 +5,7 @@ from datetime import datetime
 import json
 from sqlalchemy.exc import SQLAlchemyError
 from models import get_session, Guild, User, Role, Giveaway, Ticket, ReactionRole, Poll
+from utils.helpers import Helpers
 
 # Set up logging
 logger = logging.getLogger('discord_bot')
@@ -256,8 +257,6 @@ class PostgresDatabase:
     
     def add_xp(self, user_id, guild_id, xp_amount):
         """Add XP to a user in a guild, returns new level if leveled up"""
-        import math
-        
         session = get_session()
         try:
             user = session.query(User).filter_by(id=user_id, guild_id=guild_id).first()
@@ -269,8 +268,7 @@ class PostgresDatabase:
             user.xp += xp_amount
             
             # Calculate new level based on total XP
-            # Formula: level = sqrt(total_xp / 100)
-            new_level = math.floor(math.sqrt(user.xp / 100))
+            new_level = Helpers.get_level_from_xp(user.xp)
             user.level = new_level
             
             session.commit()
@@ -286,6 +284,132 @@ class PostgresDatabase:
         finally:
             session.close()
     
+    def bulk_add_xp(self, guild_id, updates):
+        """Apply accumulated XP and message deltas for many users in one transaction
+        
+        Args:
+            guild_id: The guild the updates belong to
+            updates: Mapping of {user_id: {"xp": int, "messages": int}}
+        """
+        session = get_session()
+        try:
+            if not session.query(Guild).filter_by(id=guild_id).first():
+                session.add(Guild(id=guild_id))
+            
+            user_ids = [int(user_id) for user_id in updates]
+            existing = {
+                user.id: user
+                for user in session.query(User).filter(User.guild_id == guild_id, User.id.in_(user_ids))
+            }
+            
+            for user_id, delta in updates.items():
+                user = existing.get(int(user_id))
+                if not user:
+                    user = User(id=int(user_id), guild_id=guild_id, xp=0, level=0, messages_count=0)
+                    session.add(user)
+                
+                user.xp = (user.xp or 0) + delta.get("xp", 0)
+                user.level = Helpers.get_level_from_xp(user.xp)
+                user.messages_count = (user.messages_count or 0) + delta.get("messages", 0)
+            
+            session.commit()
+            return True
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Database error applying XP batch: {e}")
+            return False
+        finally:
+            session.close()
+    
+    def reset_levels(self, guild_id, user_id=None):
+        """Reset level data for one user or a whole guild"""
+        session = get_session()
+        try:
+            query = session.query(User).filter_by(guild_id=guild_id)
+            if user_id is not None:
+                query = query.filter_by(id=user_id)
+            query.update({User.xp: 0, User.level: 0}, synchronize_session=False)
+            session.commit()
+            return True
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Database error resetting levels: {e}")
+            return False
+        finally:
+            session.close()
+    
+    def get_guild_levels(self, guild_id):
+        """Get every stored user level in a guild as {user_id: {"xp", "level"}}"""
+        session = get_session()
+        try:
+            rows = session.query(User.id, User.xp, User.level).filter_by(guild_id=guild_id).all()
+            return {str(user_id): {"xp": xp, "level": level} for user_id, xp, level in rows}
+        except SQLAlchemyError as e:
+            logger.error(f"Database error getting guild levels: {e}")
+            return {}
+        finally:
+            session.close()
+    
+    def iter_guild_levels(self, guild_id, batch_size=1000):
+        """Yield batches of {"user_id", "xp", "level", "messages"} rows for a guild"""
+        session = get_session()
+        try:
+            query = (session.query(User.id, User.xp, User.level, User.messages_count)
+                     .filter_by(guild_id=guild_id)
+                     .order_by(User.id)
+                     .yield_per(batch_size))
+            
+            batch = []
+            for user_id, xp, level, messages in query:
+                batch.append({
+                    "user_id": str(user_id),
+                    "xp": xp or 0,
+                    "level": level or 0,
+                    "messages": messages or 0
+                })
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        except SQLAlchemyError as e:
+            logger.error(f"Database error exporting guild levels: {e}")
+        finally:
+            session.close()
+    
+    def bulk_set_levels(self, guild_id, rows):
+        """Overwrite XP, level and message counts for a batch of users in one transaction"""
+        session = get_session()
+        try:
+            if not session.query(Guild).filter_by(id=guild_id).first():
+                session.add(Guild(id=guild_id))
+            
+            user_ids = [int(row["user_id"]) for row in rows]
+            existing = {
+                user.id: user
+                for user in session.query(User).filter(User.guild_id == guild_id, User.id.in_(user_ids))
+            }
+            
+            for row in rows:
+                user = existing.get(int(row["user_id"]))
+                if not user:
+                    user = User(id=int(row["user_id"]), guild_id=guild_id, messages_count=0)
+                    session.add(user)
+                
+                user.xp = row["xp"]
+                user.level = row["level"]
+                if row.get("messages") is not None:
+                    user.messages_count = row["messages"]
+            
+            session.commit()
+            return True
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Database error importing guild levels: {e}")
+            return False
+        finally:
+            session.close()
+    
     def set_last_message_time(self, user_id, guild_id, timestamp):
         """Set the last message time for XP cooldown"""
         session = get_session()
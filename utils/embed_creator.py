@@ -95,4 +95,56 @@ class EmbedCreator:
             description,
             CONFIG['colors']['default'],
             **kwargs
-        )
\ No newline at end of file
+        )
+    
+    @staticmethod
+    def create_level_up_embed(member, level):
+        """Create a level up announcement for a single member"""
+        return EmbedCreator.create_embed(
+            f"{CONFIG['emojis']['level']} Level Up!",
+            f"Congratulations {member.mention}, you reached **level {level}**!",
+            CONFIG['colors']['success'],
+            thumbnail=member.display_avatar.url
+        )
+    
+    @staticmethod
+    def create_level_up_summary_embed(level_ups):
+        """Create one announcement for several level ups
+        
+        Args:
+            level_ups: List of (member, level) tuples, at most 25 (the embed field limit)
+        """
+        embed = EmbedCreator.create_embed(
+            f"{CONFIG['emojis']['level']} Level Ups!",
+            f"{len(level_ups)} members just leveled up!",
+            CONFIG['colors']['success']
+        )
+        
+        for member, level in level_ups[:25]:
+            embed.add_field(
+                name=member.display_name,
+                value=f"{member.mention} reached **level {level}**",
+                inline=True
+            )
+        
+        return embed
+    
+    @staticmethod
+    def create_leaderboard_embed(category, entries):
+        """Create a leaderboard embed
+        
+        Args:
+            category: What the leaderboard ranks, used in the title
+            entries: List of {"name": str, "value": any} dicts, already sorted
+        """
+        medals = ["🥇", "🥈", "🥉"]
+        lines = []
+        for i, entry in enumerate(entries):
+            position = medals[i] if i < len(medals) else f"`{i+1}.`"
+            lines.append(f"{position} {entry['name']} - **{entry['value']}**")
+        
+        return EmbedCreator.create_embed(
+            f"🏆 {category.title()} Leaderboard",
+            "\n".join(lines) or "No data yet.",
+            CONFIG['colors']['default']
+        )
@@ -0,0 +1,349 @@
+import asyncio
+import datetime
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+import discord
+
+from config import CONFIG
+from utils.case_log import case_log
+from utils.embed_creator import EmbedCreator
+
+logger = logging.getLogger('discord_bot')
+
+SEARCH_FILTER = re.compile(r"^(user|mod|since|until|type|page):(\S+)$", re.IGNORECASE)
+RELATIVE_TIME = re.compile(r"^(\d+)([hdw])$")
+# Search result counts stop at this many
+MAX_COUNT = 1000
+
+def parse_time(value):
+    """Parse YYYY-MM-DD or a relative time like 12h, 7d or 2w into a Unix time"""
+    relative = RELATIVE_TIME.match(value.lower())
+    if relative:
+        seconds = int(relative.group(1)) * {"h": 3600, "d": 86400, "w": 604800}[relative.group(2)]
+        return int(time.time()) - seconds
+    return int(datetime.datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc).timestamp())
+
+def parse_search(text):
+    """Split a search command into filters and free text
+
+    Filters are `user:<@id or id>`, `mod:<@id or id>`, `since:<date or 7d>`,
+    `until:<date or 7d>`, `type:case|log` and `page:<n>`; everything else is
+    the free text query.
+
+    Raises:
+        ValueError: On a malformed filter value
+    """
+    options = {}
+    words = []
+    for word in (text or "").split():
+        match = SEARCH_FILTER.match(word)
+        if not match:
+            words.append(word)
+            continue
+        name, value = match.group(1).lower(), match.group(2)
+        if name in ("user", "mod"):
+            digits = re.sub(r"\D", "", value)
+            if not digits:
+                raise ValueError(f"'{value}' is not a user")
+            options["user_id" if name == "user" else "moderator_id"] = int(digits)
+        elif name in ("since", "until"):
+            options[name] = parse_time(value)
+        elif name == "type":
+            options["kind"] = value.lower()
+        else:
+            options["page"] = max(1, int(value))
+    if words:
+        options["text"] = " ".join(words)
+    return options
+
+def fts_phrase(word):
+    """Quote a word as an FTS5 phrase, so operators and column filters in it are plain text"""
+    return '"' + word.replace('"', '""') + '"'
+
+class EventArchive:
+    """Searchable archive of moderation cases and logged events
+
+    Events live next to the case log in the same SQLite file, with B-tree
+    indexes on (guild, time), (guild, user, time) and (guild, moderator, time)
+    for filter-only searches. The contentless FTS5 index holds the text plus
+    scope tokens for guild, kind, user and moderator, so text searches
+    intersect posting lists inside FTS5 instead of filtering every text match
+    afterwards. New cases are copied in by a trigger on the cases table, so
+    the case log needs no changes. Logged events are
+    buffered in memory and written in batches from a worker thread, and
+    searches run in the same thread, so the event loop never waits on disk.
+    """
+
+    def __init__(self, db_file=None, flush_interval=5, batch_size=500, log_retention_days=30, prune_interval=3600):
+        """Initialize the archive
+
+        Args:
+            db_file: SQLite database file, defaults to the case log's
+            flush_interval: Seconds between batched writes
+            batch_size: Buffered events that trigger a write before the interval
+            log_retention_days: Days logged events are kept, 0 keeps them forever
+            prune_interval: Seconds between deletions of expired logged events
+        """
+        self.db_file = db_file or case_log.db_file
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.log_retention_days = log_retention_days
+        self.prune_interval = prune_interval
+        self._last_prune = 0
+        self.buffer = []
+        self.bot = None
+        self._wake = None
+        self._task = None
+        # The connection is shared by worker threads, one statement at a time
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._lock, self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY,
+                    guild_id INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    user_id INTEGER,
+                    moderator_id INTEGER,
+                    case_number INTEGER,
+                    created_at INTEGER NOT NULL,
+                    title TEXT,
+                    body TEXT
+                );
+                CREATE INDEX IF NOT EXISTS events_by_time ON events (guild_id, created_at);
+                CREATE INDEX IF NOT EXISTS events_by_user ON events (guild_id, user_id, created_at);
+                CREATE INDEX IF NOT EXISTS events_by_moderator ON events (guild_id, moderator_id, created_at);
+                CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(title, body, scope, content='');
+                CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+                    INSERT INTO events_fts (rowid, title, body, scope) VALUES (
+                        new.id, new.title, new.body,
+                        'g' || new.guild_id || ' k' || new.kind
+                            || coalesce(' u' || new.user_id, '') || coalesce(' m' || new.moderator_id, '')
+                    );
+                END;
+                -- A contentless index is told the deleted row's values to drop its tokens
+                CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+                    INSERT INTO events_fts (events_fts, rowid, title, body, scope) VALUES (
+                        'delete', old.id, old.title, old.body,
+                        'g' || old.guild_id || ' k' || old.kind
+                            || coalesce(' u' || old.user_id, '') || coalesce(' m' || old.moderator_id, '')
+                    );
+                END;
+            """)
+            created = self.conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name = 'cases_archive'"
+            ).fetchone()[0] == 0
+            self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS cases_archive AFTER INSERT ON cases BEGIN
+                    INSERT INTO events (guild_id, kind, user_id, moderator_id, case_number, created_at, title, body)
+                    VALUES (new.guild_id, 'case', new.user_id, new.moderator_id, new.case_number,
+                            new.created_at, new.action, new.reason);
+                END
+            """)
+            if created:
+                # First run: archive the cases recorded before the trigger existed
+                self.conn.execute("""
+                    INSERT INTO events (guild_id, kind, user_id, moderator_id, case_number, created_at, title, body)
+                    SELECT guild_id, 'case', user_id, moderator_id, case_number, created_at, action, reason
+                    FROM cases ORDER BY guild_id, case_number
+                """)
+
+    def attach(self, bot):
+        """Start the batched writer once; safe to call repeatedly"""
+        if self.bot is bot:
+            return
+        self.bot = bot
+        self._wake = asyncio.Event()
+        self._task = bot.loop.create_task(self._flush_loop())
+
+    def record(self, guild_id, kind, title, body, user_id=None, moderator_id=None, created_at=None):
+        """Buffer an event for the next batched write"""
+        self.buffer.append((
+            int(guild_id), kind,
+            int(user_id) if user_id else None,
+            int(moderator_id) if moderator_id else None,
+            int(created_at or time.time()),
+            title, body
+        ))
+        if len(self.buffer) >= self.batch_size and self._wake:
+            self._wake.set()
+
+    def _write(self, rows):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO events (guild_id, kind, user_id, moderator_id, created_at, title, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    async def flush(self):
+        """Write buffered events from a worker thread"""
+        if not self.buffer:
+            return
+        rows, self.buffer = self.buffer, []
+        try:
+            await asyncio.to_thread(self._write, rows)
+        except Exception as e:
+            logger.error(f"Error archiving {len(rows)} events: {e}")
+
+    def _prune(self, before):
+        with self._lock, self.conn:
+            return self.conn.execute(
+                "DELETE FROM events WHERE kind = 'log' AND created_at < ?", (int(before),)
+            ).rowcount
+
+    async def prune(self):
+        """Delete logged events older than the retention window; cases are kept"""
+        if not self.log_retention_days:
+            return
+        try:
+            deleted = await asyncio.to_thread(self._prune, time.time() - self.log_retention_days * 86400)
+        except Exception as e:
+            logger.error(f"Error pruning archived events: {e}")
+            return
+        if deleted:
+            logger.info(f"Pruned {deleted} archived events older than {self.log_retention_days} days")
+
+    async def _flush_loop(self):
+        while not self.bot.is_closed():
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+            if time.monotonic() - self._last_prune >= self.prune_interval:
+                self._last_prune = time.monotonic()
+                await self.prune()
+
+    def _search(self, guild_id, text, user_id, moderator_id, since, until, kind, limit, offset):
+        where = []
+        params = []
+        if since is not None:
+            where.append("e.created_at >= ?")
+            params.append(int(since))
+        if until is not None:
+            where.append("e.created_at < ?")
+            params.append(int(until))
+
+        # The filters are always checked on the events table, so no text can reach another guild
+        where.insert(0, "e.guild_id = ?")
+        params.insert(0, int(guild_id))
+        if user_id is not None:
+            where.append("e.user_id = ?")
+            params.append(int(user_id))
+        if moderator_id is not None:
+            where.append("e.moderator_id = ?")
+            params.append(int(moderator_id))
+        if kind is not None:
+            where.append("e.kind = ?")
+            params.append(kind)
+
+        if text:
+            # The same filters as scope tokens let FTS5 intersect posting lists
+            scope = [f"scope:g{int(guild_id)}"]
+            if user_id is not None:
+                scope.append(f"scope:u{int(user_id)}")
+            if moderator_id is not None:
+                scope.append(f"scope:m{int(moderator_id)}")
+            if kind is not None:
+                scope.append(f"scope:{fts_phrase('k' + kind)}")
+            match = " AND ".join(scope + [fts_phrase(word) for word in text.split()])
+            # Row IDs grow with time, so FTS5 can walk matches newest first and stop at the page
+            source = "events_fts f JOIN events e ON e.id = f.rowid"
+            order = "f.rowid DESC"
+            where.insert(0, "events_fts MATCH ?")
+            params.insert(0, match)
+        else:
+            source = "events e"
+            order = "e.created_at DESC, e.id DESC"
+
+        condition = f"WHERE {' AND '.join(where)}" if where else ""
+        with self._lock:
+            # Counting stops at MAX_COUNT so broad queries stay fast
+            total = self.conn.execute(
+                f"SELECT COUNT(*) FROM (SELECT 1 FROM {source} {condition} LIMIT {MAX_COUNT})", params
+            ).fetchone()[0]
+            rows = self.conn.execute(
+                f"SELECT e.* FROM {source} {condition} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [dict(row) for row in rows], total
+
+    async def search(self, guild_id, text=None, user_id=None, moderator_id=None, since=None, until=None,
+                     kind=None, page=1, per_page=10):
+        """Search archived cases and events, newest first
+
+        Args:
+            guild_id: Guild to search
+            text: Words that must all appear in the title or body
+            user_id: Only events about this user
+            moderator_id: Only events by this moderator
+            since: Only events at or after this Unix time
+            until: Only events before this Unix time
+            kind: "case" or "log" to search only one of them
+            page: Page number, from 1
+            per_page: Results per page
+
+        Returns:
+            tuple: (events, total), total stops counting at MAX_COUNT
+        """
+        # Make sure the latest events are searchable
+        await self.flush()
+        return await asyncio.to_thread(
+            self._search, guild_id, text, user_id, moderator_id, since, until, kind,
+            per_page, (page - 1) * per_page
+        )
+
+    async def run_command(self, ctx, query=None, per_page=10):
+        """Run a modsearch command and send one page of results
+
+        Args:
+            ctx: Command context
+            query: Raw search text, see `parse_search`
+            per_page: Results per page
+        """
+        try:
+            options = parse_search(query)
+            events, total = await self.search(ctx.guild.id, per_page=per_page, **options)
+        except ValueError as e:
+            await ctx.send(embed=EmbedCreator.create_error_embed("Invalid Search", str(e)))
+            return
+        
+        lines = []
+        for event in events:
+            if event["kind"] == "case":
+                line = f"**Case #{event['case_number']}** {event['title']}"
+            else:
+                line = f"**{event['title']}**"
+            if event["user_id"]:
+                line += f" <@{event['user_id']}>"
+            line += f" <t:{event['created_at']}:R>"
+            if event["body"]:
+                line += f"\n{event['body'][:150]}"
+            lines.append(line)
+        
+        page = options.get("page", 1)
+        embed = discord.Embed(
+            title="🔎 Moderation Search",
+            description="\n".join(lines) or "Nothing found.",
+            color=CONFIG['colors']['info']
+        )
+        embed.set_footer(text=f"{total}{'+' if total >= MAX_COUNT else ''} results • Page {page}")
+        await ctx.send(embed=embed)
+
+# Create a global event archive instance
+event_archive = EventArchive(
+    flush_interval=CONFIG['archive']['flush_interval'],
+    batch_size=CONFIG['archive']['batch_size'],
+    log_retention_days=CONFIG['archive']['log_retention_days'],
+    prune_interval=CONFIG['archive']['prune_interval']
+)
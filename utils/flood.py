@@ -0,0 +1,218 @@
+import collections
+import hashlib
+import logging
+import re
+import time
+from array import array
+
+from config import CONFIG
+
+logger = logging.getLogger('discord_bot')
+
+NON_LETTERS = re.compile(r"[\W\d_]+")
+REPEATS = re.compile(r"(.)\1+")
+
+def content_hash(text):
+    """64-bit hash of the exact message text"""
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+
+def fingerprint(text):
+    """64-bit hash of the text with case, digits, punctuation, spacing and repeated letters removed
+
+    "Free nitro!!", "free   nitro 2" and "FREEE NITROOO" share a fingerprint.
+    Returns 0 for text with no letters, which never counts as a near duplicate.
+    """
+    letters = REPEATS.sub(r"\1", NON_LETTERS.sub("", text.lower()))
+    if not letters:
+        return 0
+    return content_hash(letters)
+
+class UserWindow:
+    """The last `size` messages of one member as fixed-size rings of hashes and times"""
+
+    __slots__ = ("hashes", "fingerprints", "times", "pos", "last_seen", "last_message_id", "last_verdict")
+
+    def __init__(self, size):
+        self.hashes = array("Q", bytes(8 * size))
+        self.fingerprints = array("Q", bytes(8 * size))
+        self.times = array("d", bytes(8 * size))
+        self.pos = 0
+        self.last_seen = 0
+        self.last_message_id = None
+        self.last_verdict = None
+
+    def add(self, exact, near, now):
+        self.hashes[self.pos] = exact
+        self.fingerprints[self.pos] = near
+        self.times[self.pos] = now
+        self.pos = (self.pos + 1) % len(self.times)
+        self.last_seen = now
+
+class ChannelRate:
+    """Times of a channel's last `size` messages in a ring"""
+
+    __slots__ = ("times", "pos", "flagged_until")
+
+    def __init__(self, size):
+        self.times = array("d", bytes(8 * size))
+        self.pos = 0
+        self.flagged_until = 0
+
+    def add(self, now):
+        self.times[self.pos] = now
+        self.pos = (self.pos + 1) % len(self.times)
+
+    def oldest(self):
+        # The slot about to be overwritten holds the oldest time
+        return self.times[self.pos]
+
+    @property
+    def last_seen(self):
+        return self.times[self.pos - 1]
+
+class FloodDetector:
+    """Duplicate and flood detection on fixed-size per-member and per-channel rings
+
+    Each tracked member costs one UserWindow of `history` slots and each
+    channel one ChannelRate, whatever they send. Members and channels that go
+    quiet for `idle_seconds` are evicted, oldest first, as new messages arrive.
+    `observe` is idempotent per message, so automod and the XP engine can both
+    ask about the same message and the first call records it.
+    """
+
+    def __init__(self, history=8, window_seconds=15, duplicate_limit=4, near_duplicate_limit=5,
+                 user_rate_limit=8, channel_rate_limit=25, idle_seconds=300):
+        """Initialize the detector
+
+        Args:
+            history: Messages remembered per member, the upper bound for the limits below
+            window_seconds: How far back messages count toward the limits
+            duplicate_limit: Identical messages within the window that count as spam
+            near_duplicate_limit: Near-identical messages within the window that count as spam
+            user_rate_limit: Messages from one member within the window that count as a flood
+            channel_rate_limit: Messages in one channel within the window that count as a flood
+            idle_seconds: Seconds without messages before a member or channel is forgotten
+        """
+        self.history = max(history, duplicate_limit, near_duplicate_limit, user_rate_limit)
+        self.window_seconds = window_seconds
+        self.duplicate_limit = duplicate_limit
+        self.near_duplicate_limit = near_duplicate_limit
+        self.user_rate_limit = user_rate_limit
+        self.channel_rate_limit = channel_rate_limit
+        self.idle_seconds = idle_seconds
+
+        # (guild_id, user_id) -> UserWindow, least recently active first
+        self.users = collections.OrderedDict()
+        # channel_id -> ChannelRate, least recently active first
+        self.channels = collections.OrderedDict()
+
+    def _evict(self, table, now):
+        while table:
+            key, entry = next(iter(table.items()))
+            if now - entry.last_seen < self.idle_seconds:
+                break
+            del table[key]
+
+    def observe(self, message):
+        """Record a message once and check it
+
+        Returns:
+            str or None: "duplicate", "near_duplicate" or "flood" if the member
+            crossed a limit with this message, otherwise None
+        """
+        now = time.monotonic()
+        key = (message.guild.id, message.author.id)
+        window = self.users.get(key)
+        if window is not None and window.last_message_id == message.id:
+            return window.last_verdict
+
+        self._evict(self.users, now)
+        if window is None:
+            window = self.users[key] = UserWindow(self.history)
+        else:
+            self.users.move_to_end(key)
+
+        exact = content_hash(message.content) if message.content else 0
+        near = fingerprint(message.content) if message.content else 0
+        window.add(exact, near, now)
+        self.observe_channel(message.channel.id, now)
+
+        since = now - self.window_seconds
+        recent = 0
+        duplicates = 0
+        near_duplicates = 0
+        for slot_hash, slot_near, slot_time in zip(window.hashes, window.fingerprints, window.times):
+            if slot_time < since or slot_time == 0:
+                continue
+            recent += 1
+            if exact and slot_hash == exact:
+                duplicates += 1
+            if near and slot_near == near:
+                near_duplicates += 1
+
+        verdict = None
+        if exact and duplicates >= self.duplicate_limit:
+            verdict = "duplicate"
+        elif near and near_duplicates >= self.near_duplicate_limit:
+            verdict = "near_duplicate"
+        elif recent >= self.user_rate_limit:
+            verdict = "flood"
+
+        window.last_message_id = message.id
+        window.last_verdict = verdict
+        return verdict
+
+    def observe_channel(self, channel_id, now):
+        self._evict(self.channels, now)
+        rate = self.channels.get(channel_id)
+        if rate is None:
+            rate = self.channels[channel_id] = ChannelRate(self.channel_rate_limit)
+        else:
+            self.channels.move_to_end(channel_id)
+        rate.add(now)
+
+    def channel_flooded(self, channel_id):
+        """Check if a channel got more than its limit of messages within the window"""
+        rate = self.channels.get(channel_id)
+        if rate is None:
+            return False
+        oldest = rate.oldest()
+        return oldest != 0 and time.monotonic() - oldest < self.window_seconds
+
+    def claim_channel_flood(self, channel_id, duration):
+        """Check if a flooded channel still needs handling, marking it handled for `duration` seconds"""
+        if not self.channel_flooded(channel_id):
+            return False
+        rate = self.channels[channel_id]
+        now = time.monotonic()
+        if rate.flagged_until > now:
+            return False
+        rate.flagged_until = now + duration
+        return True
+
+    def forget(self, guild_id, user_id):
+        """Drop a member's history, e.g. after they were timed out
+
+        The verdict of their last message is kept, so the XP engine asking about
+        that message afterwards still sees it as spam.
+        """
+        key = (guild_id, user_id)
+        window = self.users.get(key)
+        if window is None:
+            return
+        fresh = UserWindow(self.history)
+        fresh.last_seen = window.last_seen
+        fresh.last_message_id = window.last_message_id
+        fresh.last_verdict = window.last_verdict
+        self.users[key] = fresh
+
+# Create a global flood detector instance
+flood_detector = FloodDetector(
+    history=CONFIG['flood']['history'],
+    window_seconds=CONFIG['flood']['window_seconds'],
+    duplicate_limit=CONFIG['flood']['duplicate_limit'],
+    near_duplicate_limit=CONFIG['flood']['near_duplicate_limit'],
+    user_rate_limit=CONFIG['flood']['user_rate_limit'],
+    channel_rate_limit=CONFIG['flood']['channel_rate_limit'],
+    idle_seconds=CONFIG['flood']['idle_seconds']
+)
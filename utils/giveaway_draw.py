@@ -0,0 +1,163 @@
+import heapq
+import json
+import logging
+import os
+import random
+import secrets
+import time
+
+from config import CONFIG
+
+logger = logging.getLogger('discord_bot')
+
+class DrawResult:
+    """Outcome of a giveaway draw"""
+
+    def __init__(self, winners, seed, entrants, skipped, exclude=()):
+        self.winners = winners
+        self.seed = seed
+        self.entrants = entrants
+        self.skipped = skipped
+        self.exclude = sorted(exclude)
+
+    def to_dict(self):
+        return {
+            "seed": self.seed,
+            "exclude": [str(user_id) for user_id in self.exclude],
+            "entrants": self.entrants,
+            "skipped": self.skipped,
+            "winners": [str(member.id) for member in self.winners]
+        }
+
+class GiveawayDrawer:
+    """Draws giveaway winners by streaming reaction users
+
+    Reaction users are fetched page by page and never stored; a weighted
+    reservoir (Efraimidis-Spirakis A-Res) keeps only the k best keys, so
+    memory is O(k) regardless of the number of entrants. Every draw uses a
+    recorded seed. Discord returns reaction users in ID order, so replaying a
+    seed against the same entrants reproduces the same winners.
+    """
+
+    def __init__(self, audit_file="data/giveaway_draws.jsonl", role_weights=None, level_weight=0):
+        """Initialize the drawer
+
+        Args:
+            audit_file: JSON lines file every draw is appended to
+            role_weights: {role_id: weight}, a member's entry weight is their highest role weight
+            level_weight: Extra weight per member level, 0 to ignore levels
+        """
+        self.audit_file = audit_file
+        self.role_weights = {int(role_id): weight for role_id, weight in (role_weights or {}).items()}
+        self.level_weight = level_weight
+
+    def weight(self, member, levels=None):
+        """Get a member's entry weight, at least 1
+
+        Args:
+            member: The entrant
+            levels: {user_id: level} of the guild from `guild_levels`, needed for level weights
+        """
+        weight = 1
+        if self.role_weights:
+            weight = max([weight] + [self.role_weights[role.id] for role in member.roles if role.id in self.role_weights])
+        if self.level_weight and levels:
+            weight += levels.get(member.id, 0) * self.level_weight
+        return weight
+
+    async def guild_levels(self, guild_id):
+        """Read every member's level in one pass, without filling the engine's cache"""
+        # Imported here so the drawer works without the leveling engine loaded
+        from utils.xp_engine import xp_engine
+        await xp_engine.flush(guild_id)
+        return {
+            int(row["user_id"]): row["level"]
+            for batch in xp_engine.db.iter_guild_levels(guild_id)
+            for row in batch
+            if row["level"]
+        }
+
+    async def draw(self, message, emoji, count, seed=None, exclude=(), weighted=True):
+        """Pick up to `count` winners among members who reacted with `emoji`
+
+        Args:
+            message: The giveaway message
+            emoji: The entry reaction emoji
+            count: Number of winners
+            seed: Seed to replay a previous draw, a new one is generated if None
+            exclude: User IDs that cannot win, e.g. previous winners on a reroll
+            weighted: Apply role and level weights
+
+        Returns:
+            DrawResult: Winners in draw order, with the seed and entrant counts
+        """
+        seed = seed or secrets.token_hex(8)
+        rng = random.Random(seed)
+        exclude = {int(user_id) for user_id in exclude}
+
+        reaction = next((r for r in message.reactions if str(r.emoji) == str(emoji)), None)
+        if reaction is None:
+            return DrawResult([], seed, 0, 0, exclude)
+
+        levels = await self.guild_levels(message.guild.id) if weighted and self.level_weight else None
+
+        # Min-heap of (key, user_id); the smallest key is evicted first
+        reservoir = []
+        entrants = 0
+        skipped = 0
+        async for user in reaction.users(limit=None):
+            if user.bot or user.id in exclude:
+                skipped += 1
+                continue
+            member = message.guild.get_member(user.id)
+            if member is None:
+                # Left the server
+                skipped += 1
+                continue
+
+            entrants += 1
+            weight = self.weight(member, levels) if weighted else 1
+            key = rng.random() ** (1 / weight)
+            if len(reservoir) < count:
+                heapq.heappush(reservoir, (key, member.id))
+            elif key > reservoir[0][0]:
+                heapq.heapreplace(reservoir, (key, member.id))
+
+        winners = [
+            message.guild.get_member(user_id)
+            for key, user_id in sorted(reservoir, reverse=True)
+        ]
+        return DrawResult([member for member in winners if member], seed, entrants, skipped, exclude)
+
+    def record(self, message, result, reroll=False):
+        """Append a draw to the audit log"""
+        entry = {
+            "time": int(time.time()),
+            "guild_id": str(message.guild.id),
+            "message_id": str(message.id),
+            "reroll": reroll,
+            **result.to_dict()
+        }
+        try:
+            os.makedirs(os.path.dirname(self.audit_file), exist_ok=True)
+            with open(self.audit_file, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        except Exception as e:
+            logger.error(f"Error recording giveaway draw: {e}")
+
+    def history(self, message_id):
+        """Get all recorded draws for a giveaway, oldest first"""
+        if not os.path.exists(self.audit_file):
+            return []
+        draws = []
+        with open(self.audit_file, "r") as f:
+            for line in f:
+                if f'"message_id": "{message_id}"' in line:
+                    draws.append(json.loads(line))
+        return draws
+
+# Create a global giveaway drawer instance
+giveaway_drawer = GiveawayDrawer(
+    role_weights=CONFIG['giveaways']['role_weights'],
+    level_weight=CONFIG['giveaways']['level_weight']
+)
@@ -0,0 +1,21 @@
+import math
+
+class Helpers:
+    """Shared helper functions used across cogs"""
+
+    # Level curve: level = floor(sqrt(total_xp / 100)), so level n starts at 100 * n^2 XP
+    XP_CURVE_FACTOR = 100
+
+    @staticmethod
+    def get_level_from_xp(xp):
+        """Get the level reached with a total amount of XP"""
+        if xp <= 0:
+            return 0
+        return math.isqrt(int(xp) // Helpers.XP_CURVE_FACTOR)
+
+    @staticmethod
+    def get_xp_for_level(level):
+        """Get the total XP needed to reach a level"""
+        if level <= 0:
+            return 0
+        return Helpers.XP_CURVE_FACTOR * level * level
@@ -0,0 +1,56 @@
+import logging
+
+import discord
+
+logger = logging.getLogger('discord_bot')
+
+class InteractionRouter:
+    """Dispatches component interactions to handlers by custom_id prefix
+
+    Component custom_ids look like `<prefix>:<argument>`. Features register
+    one handler per prefix, and a single on_interaction listener finds it
+    with one dict lookup, so a button press never runs every other feature's
+    checks. Handlers are called with the interaction and the argument after
+    the prefix. Because routing only depends on the custom_id, components
+    keep working after a restart.
+    """
+
+    def __init__(self):
+        # custom_id prefix -> async handler(interaction, argument)
+        self.handlers = {}
+        self.bot = None
+
+    def attach(self, bot):
+        """Start routing the bot's interactions once; safe to call repeatedly"""
+        if self.bot is bot:
+            return
+        self.bot = bot
+        bot.add_listener(self.on_interaction, "on_interaction")
+
+    def register(self, prefix, handler):
+        """Route custom_ids starting with `prefix:` (or equal to `prefix`) to a handler"""
+        if prefix in self.handlers and self.handlers[prefix] is not handler:
+            logger.warning(f"Interaction prefix '{prefix}' was registered twice, the last handler wins")
+        self.handlers[prefix] = handler
+
+    async def on_interaction(self, interaction):
+        if interaction.type != discord.InteractionType.component:
+            return
+        custom_id = (interaction.data or {}).get("custom_id", "")
+        prefix, _, argument = custom_id.partition(":")
+        handler = self.handlers.get(prefix)
+        if handler is None:
+            return
+
+        try:
+            await handler(interaction, argument)
+        except Exception as e:
+            logger.error(f"Error handling interaction '{custom_id}': {e}")
+            try:
+                if not interaction.response.is_done():
+                    await interaction.response.send_message("Something went wrong, please try again.", ephemeral=True)
+            except discord.HTTPException:
+                pass
+
+# Create a global interaction router instance
+interaction_router = InteractionRouter()
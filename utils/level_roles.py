@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import time
+
+import discord
+
+from utils.rest_queue import rest_queue, BACKGROUND
+
+logger = logging.getLogger('discord_bot')
+
+class RoleSyncJob:
+    """Progress tracker for a single guild level-role reconciliation"""
+
+    def __init__(self, guild_id):
+        self.guild_id = guild_id
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.planned = False
+        # Queued behind a running job of the same guild
+        self.waiting = False
+        self.finished = asyncio.Event()
+        self.started_at = time.monotonic()
+
+    @property
+    def is_finished(self):
+        return self.finished.is_set()
+
+    def progress_text(self):
+        """Human-readable progress line for status messages"""
+        if self.waiting:
+            return "Waiting for the running sync to finish..."
+        if not self.planned:
+            return "Comparing stored levels with the member list..."
+        elapsed = int(time.monotonic() - self.started_at)
+        return f"{self.done}/{self.total} members updated, {self.failed} failed ({elapsed}s elapsed)"
+
+    def _mark_one(self, ok):
+        if ok:
+            self.done += 1
+        else:
+            self.failed += 1
+        if self.planned and self.done + self.failed >= self.total:
+            self.finished.set()
+
+
+def desired_level_roles(level, level_roles, stack=True):
+    """Return the set of reward role IDs a member at `level` should hold
+
+    Args:
+        level: The member's current level
+        level_roles: Mapping of {level: role_id} as stored by set_level_settings
+        stack: Keep every reward at or below the level instead of only the highest
+    """
+    earned = [(int(lvl), int(role_id)) for lvl, role_id in level_roles.items() if int(lvl) <= level]
+    if not earned:
+        return set()
+    if stack:
+        return {role_id for _, role_id in earned}
+    return {max(earned)[1]}
+
+
+def compute_role_plan(guild, levels, level_roles, stack=True, revoke=()):
+    """Compare stored levels with the cached member list in a single pass
+
+    Args:
+        guild: The discord.Guild whose member cache is used
+        levels: Mapping of {user_id: {"level": int, ...}} for the guild
+        level_roles: Mapping of {level: role_id}
+        stack: Whether lower reward roles are kept when a higher one is earned
+        revoke: Role IDs that are no longer rewards and must be taken away
+
+    Returns:
+        list: (member, [roles]) tuples for every member whose roles must change
+    """
+    managed = {int(role_id) for role_id in level_roles.values()} | {int(role_id) for role_id in revoke}
+    # Rewards whose role was deleted can't be granted, so leave them out of the diff
+    managed &= {role.id for role in guild.roles}
+    if not managed:
+        return []
+
+    plan = []
+    for member in guild.members:
+        if member.bot:
+            continue
+
+        level = levels.get(str(member.id), {}).get("level", 0)
+        desired = desired_level_roles(level, level_roles, stack) & managed
+        current = {role.id for role in member.roles} & managed
+
+        if desired == current:
+            continue
+
+        # Keep every non-reward role, swap the reward roles in one edit
+        target = [role for role in member.roles if not role.is_default() and role.id not in managed]
+        target.extend(guild.get_role(role_id) for role_id in desired)
+        plan.append((member, target))
+
+    return plan
+
+
+class LevelRoleSync:
+    """Background worker pool applying level-role changes one member.edit at a time"""
+
+    def __init__(self, workers=2, queue_size=200, min_interval=0.25):
+        """Initialize the sync service
+
+        Args:
+            workers: Number of concurrent member edits
+            queue_size: Maximum queued edits before the planner waits
+            min_interval: Minimum seconds between edits per worker
+        """
+        self.workers = workers
+        self.min_interval = min_interval
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.jobs = {}
+        # guild_id -> (job, sync arguments) queued behind the guild's running job
+        self.followups = {}
+        self._worker_tasks = []
+
+    def _ensure_workers(self):
+        """Start the worker tasks lazily on the running loop"""
+        self._worker_tasks = [task for task in self._worker_tasks if not task.done()]
+        while len(self._worker_tasks) < self.workers:
+            self._worker_tasks.append(asyncio.get_running_loop().create_task(self._worker()))
+
+    def get_job(self, guild_id):
+        """Get the running or last job for a guild"""
+        return self.jobs.get(guild_id)
+
+    def sync_guild(self, guild, levels, level_roles, stack=True, revoke=()):
+        """Start reconciling a guild in the background and return its job
+
+        While a guild's job is running, further requests are merged into one
+        follow-up job that starts with the newest mapping once the running job
+        finishes, so a reward changed mid-sync is still applied.
+        """
+        running = self.jobs.get(guild.id)
+        if running and not running.is_finished:
+            followup = self.followups.get(guild.id)
+            if followup is None:
+                job = RoleSyncJob(guild.id)
+                job.waiting = True
+                asyncio.get_running_loop().create_task(self._start_after(running, job))
+            else:
+                # Roles removed by earlier requests must still be revoked
+                job, queued = followup
+                revoke = set(queued[-1]) | set(revoke)
+            self.followups[guild.id] = (job, (guild, levels, level_roles, stack, revoke))
+            return job
+
+        return self._start(RoleSyncJob(guild.id), guild, levels, level_roles, stack, revoke)
+
+    def _start(self, job, guild, levels, level_roles, stack, revoke):
+        self.jobs[guild.id] = job
+        self._ensure_workers()
+        asyncio.get_running_loop().create_task(self._plan(job, guild, levels, level_roles, stack, revoke))
+        return job
+
+    async def _start_after(self, running, job):
+        """Start a follow-up job with its latest arguments once the running job finishes"""
+        await running.finished.wait()
+        _, args = self.followups.pop(job.guild_id)
+        job.waiting = False
+        job.started_at = time.monotonic()
+        self._start(job, *args)
+
+    async def _plan(self, job, guild, levels, level_roles, stack, revoke):
+        """Compute the diff and feed the bounded queue"""
+        try:
+            plan = compute_role_plan(guild, levels, level_roles, stack, revoke)
+        except Exception as e:
+            logger.error(f"Failed to plan level roles for guild {guild.id}: {e}")
+            plan = []
+
+        job.total = len(plan)
+        job.planned = True
+        logger.info(f"Level role sync for guild {guild.id}: {job.total} members to update")
+
+        if not plan:
+            job.finished.set()
+            return
+
+        # put() blocks while the queue is full, so a huge plan never floods memory with tasks
+        for member, roles in plan:
+            await self.queue.put((job, member, roles))
+
+    async def _worker(self):
+        """Apply queued edits, backing off when Discord rate limits us"""
+        while True:
+            job, member, roles = await self.queue.get()
+            try:
+                ok = await self._apply(member, roles)
+            except Exception as e:
+                # A network error must not kill the worker and stall every queued member
+                logger.error(f"Failed to sync level roles for {member.id}: {e}")
+                ok = False
+            job._mark_one(ok)
+            self.queue.task_done()
+            await asyncio.sleep(self.min_interval)
+
+    async def _apply(self, member, roles):
+        # Member edits share a per-guild route bucket; the REST queue retries 429s and 5xx errors
+        try:
+            await rest_queue.run(
+                lambda: member.edit(roles=roles, reason="Level role sync"),
+                member.guild.id,
+                BACKGROUND,
+                bucket=f"members:{member.guild.id}"
+            )
+            return True
+        except discord.NotFound:
+            # Member left between planning and applying
+            return True
+        except discord.Forbidden:
+            logger.warning(f"No permission to sync level roles for {member.id} in {member.guild.id}")
+            return False
+        except discord.HTTPException as e:
+            logger.error(f"Failed to sync level roles for {member.id}: {e}")
+            return False
+
+# Create a global level role sync instance
+level_role_sync = LevelRoleSync()
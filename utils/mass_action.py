@@ -0,0 +1,270 @@
+import asyncio
+import datetime
+import logging
+import os
+import re
+import time
+
+import discord
+
+from config import CONFIG
+from utils.case_log import case_log
+from utils.embed_creator import EmbedCreator
+from utils.rest_queue import rest_queue, NORMAL
+
+logger = logging.getLogger('discord_bot')
+
+ID_PATTERN = re.compile(r"^<@!?(\d{15,20})>$|^(\d{15,20})$")
+JOINED_PATTERN = re.compile(r"^joined:(\d+)m?$", re.IGNORECASE)
+# Most users Discord accepts in one bulk ban call
+BULK_BAN_SIZE = 200
+
+async def parse_targets(ctx, text):
+    """Split mass action arguments into target IDs and a reason
+
+    Leading arguments are targets: IDs, mentions, or `joined:<minutes>` for
+    everyone who joined in the last N minutes. IDs in a text file attached to
+    the command message are added as well. The rest is the reason.
+
+    Returns:
+        tuple: (list of user IDs in order, reason or None)
+    """
+    targets = []
+    words = text.split() if text else []
+    while words:
+        match = ID_PATTERN.match(words[0])
+        joined = JOINED_PATTERN.match(words[0])
+        if match:
+            targets.append(int(match.group(1) or match.group(2)))
+        elif joined:
+            since = discord.utils.utcnow() - datetime.timedelta(minutes=int(joined.group(1)))
+            targets.extend(
+                member.id for member in ctx.guild.members
+                if member.joined_at and member.joined_at >= since
+            )
+        else:
+            break
+        words.pop(0)
+
+    for attachment in ctx.message.attachments:
+        if attachment.size > 1024 * 1024:
+            continue
+        content = (await attachment.read()).decode(errors="ignore")
+        targets.extend(int(user_id) for user_id in re.findall(r"\d{15,20}", content))
+
+    # Keep the first occurrence of each ID
+    return list(dict.fromkeys(targets)), " ".join(words) or None
+
+class MassActionJob:
+    """Progress and outcome of one mass action"""
+
+    def __init__(self, action, total):
+        self.action = action
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+        # user_id -> outcome text, written to the summary file
+        self.results = {}
+        self.started_at = time.monotonic()
+
+    def mark(self, user_id, outcome, ok):
+        self.results[user_id] = outcome
+        if ok:
+            self.done += 1
+        else:
+            self.failed += 1
+
+    def skip(self, user_id, why):
+        self.results[user_id] = f"skipped: {why}"
+        self.skipped += 1
+
+    def progress_text(self):
+        elapsed = int(time.monotonic() - self.started_at)
+        return (f"{self.done}/{self.total} done, {self.skipped} skipped, "
+                f"{self.failed} failed ({elapsed}s elapsed)")
+
+class MassActioner:
+    """Runs bans, kicks and timeouts against many members at once
+
+    Bans go through Discord's bulk ban endpoint, up to 200 users per call.
+    Kicks and timeouts are queued on the shared REST queue, which bounds how
+    many run at once. Bulk actions never DM their targets. Each run writes
+    one case to the case log and a summary file listing every target's
+    outcome.
+    """
+
+    def __init__(self, summary_dir="data/mass_actions"):
+        """Initialize the mass actioner
+
+        Args:
+            summary_dir: Directory summary files are written to
+        """
+        self.summary_dir = summary_dir
+
+    def check_target(self, ctx, user_id):
+        """Get why a user cannot be targeted, or None if they can"""
+        if user_id in (ctx.author.id, ctx.guild.owner_id, ctx.guild.me.id):
+            return "protected user"
+        member = ctx.guild.get_member(user_id)
+        if member is None:
+            return None
+        if member.top_role >= ctx.author.top_role and ctx.author != ctx.guild.owner:
+            return "role is higher or equal to yours"
+        if member.top_role >= ctx.guild.me.top_role:
+            return "role is higher or equal to mine"
+        return None
+
+    async def confirm(self, ctx, action, count):
+        """Ask the moderator to confirm with 'yes'"""
+        await ctx.send(embed=EmbedCreator.create_warning_embed(
+            f"Confirm Mass {action.title()}",
+            f"This will {action} **{count}** users. Reply with 'yes' to confirm or 'no' to cancel."
+        ))
+
+        def check(m):
+            return m.author == ctx.author and m.channel == ctx.channel and m.content.lower() in ["yes", "no"]
+
+        try:
+            response = await ctx.bot.wait_for("message", check=check, timeout=30.0)
+        except asyncio.TimeoutError:
+            return False
+        return response.content.lower() == "yes"
+
+    async def run_command(self, ctx, action, args, duration=None):
+        """Parse the targets and reason of a mass action command and run it
+
+        Args:
+            ctx: Command context
+            action: "ban", "kick" or "timeout"
+            args: Raw command arguments, see `parse_targets`
+            duration: Timeout length as a timedelta, for timeouts
+        """
+        user_ids, reason = await parse_targets(ctx, args)
+        return await self.run(ctx, action, user_ids, reason, duration=duration)
+
+    async def run(self, ctx, action, user_ids, reason, duration=None):
+        """Confirm and run a mass action for a command, keeping one status message updated
+
+        Args:
+            ctx: Command context
+            action: "ban", "kick" or "timeout"
+            user_ids: Target user IDs
+            reason: Reason for the audit log and the case
+            duration: Timeout length as a timedelta, for timeouts
+        """
+        reason = reason or "No reason provided"
+        if not user_ids:
+            await ctx.send(embed=EmbedCreator.create_error_embed(
+                "No Targets",
+                "Give user IDs or mentions, `joined:<minutes>`, or attach a text file of IDs."
+            ))
+            return None
+
+        if not await self.confirm(ctx, action, len(user_ids)):
+            await ctx.send(embed=EmbedCreator.create_info_embed("Cancelled", f"Mass {action} cancelled."))
+            return None
+
+        job = MassActionJob(action, len(user_ids))
+        audit_reason = f"Mass {action} by {ctx.author}: {reason}"[:512]
+        targets = []
+        for user_id in user_ids:
+            why = self.check_target(ctx, user_id)
+            if why:
+                job.skip(user_id, why)
+            else:
+                targets.append(user_id)
+
+        status = await ctx.send(embed=EmbedCreator.create_loading_embed(f"Mass {action.title()}", job.progress_text()))
+        task = asyncio.get_running_loop().create_task(self.execute(ctx.guild, job, targets, audit_reason, duration))
+        while not task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(task), timeout=3)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await status.edit(embed=EmbedCreator.create_loading_embed(f"Mass {action.title()}", job.progress_text()))
+            except discord.HTTPException:
+                pass
+        await task
+
+        case_number = case_log.add_case(
+            ctx.guild.id, f"mass_{action}", 0, ctx.author.id, str(ctx.author),
+            f"{reason} ({job.done} of {job.total} users)"
+        )
+        path = self.write_summary(ctx.guild, case_number, job, reason)
+
+        embed = EmbedCreator.create_success_embed(
+            f"Mass {action.title()} Finished (Case #{case_number})",
+            job.progress_text()
+        )
+        try:
+            await status.edit(embed=embed)
+            await ctx.send(file=discord.File(path))
+        except discord.HTTPException as e:
+            logger.error(f"Could not send mass {action} summary: {e}")
+        return job
+
+    async def execute(self, guild, job, user_ids, reason, duration=None):
+        """Apply the action to every target, updating the job as results come in"""
+        if job.action == "ban":
+            await self._ban(guild, job, user_ids, reason)
+            return
+
+        futures = {}
+        for user_id in user_ids:
+            member = guild.get_member(user_id)
+            if member is None:
+                job.skip(user_id, "not in the server")
+                continue
+            if job.action == "kick":
+                action = lambda member=member: member.kick(reason=reason)
+            else:
+                action = lambda member=member: member.timeout(duration, reason=reason)
+            futures[user_id] = rest_queue.submit(action, guild.id, NORMAL)
+
+        for user_id, future in futures.items():
+            try:
+                await future
+                job.mark(user_id, f"{job.action} ok", True)
+            except discord.HTTPException as e:
+                job.mark(user_id, f"failed: {e}", False)
+
+    async def _ban(self, guild, job, user_ids, reason):
+        delete_seconds = CONFIG['mass_actions']['ban_delete_message_seconds']
+        for start in range(0, len(user_ids), BULK_BAN_SIZE):
+            chunk = user_ids[start:start + BULK_BAN_SIZE]
+            try:
+                result = await rest_queue.run(
+                    lambda chunk=chunk: guild.bulk_ban(
+                        [discord.Object(user_id) for user_id in chunk],
+                        reason=reason,
+                        delete_message_seconds=delete_seconds
+                    ),
+                    guild.id,
+                    NORMAL,
+                    bucket=f"guild:{guild.id}:bulk_ban"
+                )
+            except discord.HTTPException as e:
+                for user_id in chunk:
+                    job.mark(user_id, f"failed: {e}", False)
+                continue
+            for user in result.banned:
+                job.mark(user.id, "ban ok", True)
+            for user in result.failed:
+                job.mark(user.id, "failed: already banned or not bannable", False)
+
+    def write_summary(self, guild, case_number, job, reason):
+        """Write the per-user outcome of a mass action and get the file path"""
+        os.makedirs(self.summary_dir, exist_ok=True)
+        path = os.path.join(self.summary_dir, f"{guild.id}-case-{case_number}-{job.action}.txt")
+        with open(path, "w") as f:
+            f.write(f"Mass {job.action} in {guild.name} ({guild.id}), case #{case_number}\n")
+            f.write(f"Reason: {reason}\n")
+            f.write(f"{job.progress_text()}\n\n")
+            for user_id, outcome in job.results.items():
+                f.write(f"{user_id}\t{outcome}\n")
+        return path
+
+# Create a global mass actioner instance
+mass_actioner = MassActioner()
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+import discord
+
+from utils.rest_queue import rest_queue, BACKGROUND, NORMAL
+
+logger = logging.getLogger('discord_bot')
+
+# Channel permissions denied to the Muted role
+MUTED_OVERWRITE = {
+    "send_messages": False,
+    "send_messages_in_threads": False,
+    "add_reactions": False,
+    "speak": False
+}
+
+def needs_overwrite(channel, role):
+    """Check if a channel is missing any of the Muted role's denies"""
+    overwrite = channel.overwrites_for(role)
+    return any(getattr(overwrite, name) is not value for name, value in MUTED_OVERWRITE.items())
+
+class OverwriteJob:
+    """Progress tracker for one guild's Muted role overwrite rollout"""
+
+    def __init__(self, guild_id, role_id):
+        self.guild_id = guild_id
+        self.role_id = role_id
+        self.total = 0
+        self.done = 0
+        self.skipped = 0
+        self.failed = 0
+        self.finished = asyncio.Event()
+        self.started_at = time.monotonic()
+
+    @property
+    def is_finished(self):
+        return self.finished.is_set()
+
+    def progress_text(self):
+        """Human-readable progress line for status messages"""
+        elapsed = int(time.monotonic() - self.started_at)
+        return (f"{self.done}/{self.total} channels updated, {self.skipped} already set, "
+                f"{self.failed} failed ({elapsed}s elapsed)")
+
+    def _mark_one(self, future):
+        if future.cancelled() or future.exception():
+            self.failed += 1
+        else:
+            self.done += 1
+        if self.done + self.failed >= self.total:
+            self.finished.set()
+
+class MuteRoleRollout:
+    """Applies the Muted role's channel overwrites in the background
+
+    Channels that already deny everything are skipped, so a rollout is cheap to
+    re-run. Guilds with an unfinished rollout are saved to disk and resumed
+    when the bot is ready again. Writes go through the shared REST queue at
+    background priority, which bounds how many run at once.
+    """
+
+    def __init__(self, data_file="data/mute_rollouts.json"):
+        """Initialize the rollout service
+
+        Args:
+            data_file: JSON file unfinished rollouts are saved to
+        """
+        self.data_file = data_file
+        self.bot = None
+        # guild_id -> OverwriteJob
+        self.jobs = {}
+        # guild_id -> role_id of rollouts that have not finished
+        self.unfinished = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.data_file, "r") as f:
+                self.unfinished = {int(guild_id): int(role_id) for guild_id, role_id in json.load(f).items()}
+        except FileNotFoundError:
+            self.unfinished = {}
+        except Exception as e:
+            logger.error(f"Error loading mute rollouts: {e}")
+            self.unfinished = {}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+            with open(self.data_file, "w") as f:
+                json.dump({str(guild_id): str(role_id) for guild_id, role_id in self.unfinished.items()}, f)
+        except Exception as e:
+            logger.error(f"Error saving mute rollouts: {e}")
+
+    def attach(self, bot):
+        """Resume unfinished rollouts once the bot is ready; safe to call repeatedly"""
+        if self.bot is bot:
+            return
+        self.bot = bot
+        bot.loop.create_task(self._resume())
+
+    async def _resume(self):
+        await self.bot.wait_until_ready()
+        for guild_id, role_id in list(self.unfinished.items()):
+            guild = self.bot.get_guild(guild_id)
+            role = guild.get_role(role_id) if guild else None
+            if role is None:
+                self.unfinished.pop(guild_id)
+                continue
+            logger.info(f"Resuming Muted role rollout in guild {guild_id}")
+            self.start(guild, role)
+        self._save()
+
+    def start(self, guild, role):
+        """Start (or return the running) rollout for a guild"""
+        job = self.jobs.get(guild.id)
+        if job and not job.is_finished:
+            return job
+
+        job = OverwriteJob(guild.id, role.id)
+        self.jobs[guild.id] = job
+        self.unfinished[guild.id] = role.id
+        self._save()
+
+        for channel in guild.channels:
+            if not needs_overwrite(channel, role):
+                job.skipped += 1
+                continue
+            job.total += 1
+            future = rest_queue.submit(
+                lambda channel=channel: channel.set_permissions(role, reason="Muted role setup", **MUTED_OVERWRITE),
+                guild.id,
+                BACKGROUND,
+                bucket=f"channel:{channel.id}"
+            )
+            future.add_done_callback(job._mark_one)
+
+        if job.total == 0:
+            job.finished.set()
+        asyncio.get_running_loop().create_task(self._finish(job))
+        return job
+
+    async def _finish(self, job):
+        await job.finished.wait()
+        # Failed channels keep the rollout unfinished so it resumes on restart
+        if job.failed == 0:
+            self.unfinished.pop(job.guild_id, None)
+            self._save()
+        logger.info(f"Muted role rollout in guild {job.guild_id}: {job.progress_text()}")
+
+    def cover_channel(self, channel):
+        """Apply the Muted role overwrite to a newly created channel"""
+        role = discord.utils.get(channel.guild.roles, name="Muted")
+        if role is None or not needs_overwrite(channel, role):
+            return None
+        return rest_queue.fire(
+            lambda: channel.set_permissions(role, reason="Muted role setup", **MUTED_OVERWRITE),
+            channel.guild.id,
+            NORMAL,
+            bucket=f"channel:{channel.id}"
+        )
+
+# Create a global Muted role rollout instance
+mute_rollout = MuteRoleRollout()
@@ -0,0 +1,297 @@
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+import discord
+
+from config import CONFIG
+from utils.embed_creator import EmbedCreator
+from utils.rest_queue import rest_queue, NORMAL, BACKGROUND
+
+logger = logging.getLogger('discord_bot')
+
+# Discord only bulk-deletes messages younger than 14 days; keep a margin for slow purges
+BULK_DELETE_AGE = timedelta(days=14) - timedelta(minutes=10)
+BULK_DELETE_SIZE = 100
+
+LINK_PATTERN = re.compile(r"https?://|discord\.gg/", re.IGNORECASE)
+
+class PurgeFilter:
+    """Message filter compiled once from purge command arguments
+
+    Filters combine with AND. Supported arguments are member mentions,
+    channel mentions (where to purge), `bots`, `humans`, `attachments`,
+    `links`, `contains:<text>` and `regex:<pattern>`.
+    """
+
+    def __init__(self, user_ids=(), bots=False, humans=False, attachments=False, links=False,
+                 contains=None, pattern=None):
+        self.user_ids = set(user_ids)
+        self.bots = bots
+        self.humans = humans
+        self.attachments = attachments
+        self.links = links
+        self.contains = contains.lower() if contains else None
+        self.pattern = re.compile(pattern, re.IGNORECASE) if pattern else None
+        self.checks = self._compile()
+
+    @classmethod
+    def from_args(cls, message, args):
+        """Build a filter from command arguments, mentions are read from the message
+
+        Raises:
+            ValueError: On an unknown argument or invalid regex
+        """
+        options = {"user_ids": message.raw_mentions}
+        for arg in args:
+            lowered = arg.lower()
+            if arg.startswith("<@") or arg.startswith("<#"):
+                continue
+            if lowered in ("bots", "humans", "attachments", "links"):
+                options[lowered] = True
+            elif lowered.startswith("contains:"):
+                options["contains"] = arg.split(":", 1)[1]
+            elif lowered.startswith("regex:"):
+                try:
+                    re.compile(arg.split(":", 1)[1])
+                except re.error as e:
+                    raise ValueError(f"Invalid regex: {e}")
+                options["pattern"] = arg.split(":", 1)[1]
+            else:
+                raise ValueError(f"Unknown filter '{arg}'")
+        return cls(**options)
+
+    def _compile(self):
+        checks = []
+        if self.user_ids:
+            checks.append(lambda m: m.author.id in self.user_ids)
+        if self.bots:
+            checks.append(lambda m: m.author.bot)
+        if self.humans:
+            checks.append(lambda m: not m.author.bot)
+        if self.attachments:
+            checks.append(lambda m: bool(m.attachments))
+        if self.links:
+            checks.append(lambda m: LINK_PATTERN.search(m.content) is not None)
+        if self.contains:
+            checks.append(lambda m: self.contains in m.content.lower())
+        if self.pattern:
+            checks.append(lambda m: self.pattern.search(m.content) is not None)
+        return checks
+
+    def __call__(self, message):
+        return all(check(message) for check in self.checks)
+
+    def describe(self):
+        """Human-readable summary of the active filters"""
+        parts = []
+        if self.user_ids:
+            parts.append("from " + ", ".join(f"<@{user_id}>" for user_id in self.user_ids))
+        for name in ("bots", "humans", "attachments", "links"):
+            if getattr(self, name):
+                parts.append(name)
+        if self.contains:
+            parts.append(f"containing '{self.contains}'")
+        if self.pattern:
+            parts.append(f"matching `{self.pattern.pattern}`")
+        return ", ".join(parts) or "all messages"
+
+class ChannelProgress:
+    """Counters for one channel of a purge"""
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.scanned = 0
+        self.deleted = 0
+        self.failed = 0
+        self.old_pending = 0
+        self.done = False
+        self.error = None
+
+    def text(self):
+        line = f"{self.channel.mention}: {self.deleted} deleted, {self.scanned} scanned"
+        if self.old_pending:
+            line += f", {self.old_pending} old messages left"
+        if self.failed:
+            line += f", {self.failed} failed"
+        if self.error:
+            line += f" ({self.error})"
+        elif self.done:
+            line += " ✓"
+        return line
+
+class PurgeEngine:
+    """Streams channel history and deletes matching messages
+
+    Recent matches are bulk-deleted in batches of up to 100 as history is
+    read, so memory stays at one batch. History is newest first, so once a
+    message is too old for bulk delete every later one is as well; those are
+    collected and deleted one by one at a paced rate on the background
+    priority of the shared REST queue. Channels are purged concurrently.
+    """
+
+    def __init__(self, old_message_delay=1.0):
+        """Initialize the engine
+
+        Args:
+            old_message_delay: Seconds between deletes of messages too old for bulk delete
+        """
+        self.old_message_delay = old_message_delay
+
+    async def purge_channel(self, channel, limit, check, progress, before=None):
+        """Purge one channel
+
+        Args:
+            channel: Channel to purge
+            limit: Number of messages to scan
+            check: Callable deciding which messages are deleted
+            progress: ChannelProgress updated as the purge runs
+            before: Only scan messages before this message or time
+        """
+        cutoff = datetime.now(timezone.utc) - BULK_DELETE_AGE
+        batch = []
+        old = []
+        try:
+            async for message in channel.history(limit=limit, before=before):
+                progress.scanned += 1
+                if not check(message):
+                    continue
+                if message.created_at < cutoff:
+                    old.append(message)
+                    progress.old_pending += 1
+                    continue
+                batch.append(message)
+                if len(batch) >= BULK_DELETE_SIZE:
+                    await self._bulk_delete(channel, batch, progress)
+                    batch = []
+            if batch:
+                await self._bulk_delete(channel, batch, progress)
+
+            for message in old:
+                await self._delete_one(channel, message, progress)
+                progress.old_pending -= 1
+        except discord.HTTPException as e:
+            progress.error = str(e)
+            logger.error(f"Purge of channel {channel.id} stopped: {e}")
+        finally:
+            progress.done = True
+
+    async def _bulk_delete(self, channel, messages, progress):
+        try:
+            await rest_queue.run(
+                lambda: channel.delete_messages(messages),
+                channel.guild.id,
+                NORMAL,
+                bucket=f"channel:{channel.id}:bulk_delete"
+            )
+            progress.deleted += len(messages)
+        except discord.NotFound:
+            # Some were already gone; fall back to deleting what is left one by one
+            for message in messages:
+                await self._delete_one(channel, message, progress)
+        except discord.HTTPException:
+            progress.failed += len(messages)
+
+    async def _delete_one(self, channel, message, progress):
+        started = time.monotonic()
+        try:
+            await rest_queue.run(message.delete, channel.guild.id, BACKGROUND, bucket=f"channel:{channel.id}:delete")
+            progress.deleted += 1
+        except discord.NotFound:
+            pass
+        except discord.HTTPException:
+            progress.failed += 1
+        await asyncio.sleep(max(0, self.old_message_delay - (time.monotonic() - started)))
+
+    def start(self, channels, limit, check, before=None):
+        """Start purging several channels at once
+
+        Returns:
+            tuple: (list of ChannelProgress, asyncio.Task finishing when all channels are done)
+        """
+        progress = [ChannelProgress(channel) for channel in channels]
+        task = asyncio.gather(*(
+            self.purge_channel(
+                item.channel, limit, check, item,
+                before=before if before and item.channel.id == before.channel.id else None
+            )
+            for item in progress
+        ))
+        return progress, task
+
+    async def run_command(self, ctx, amount, filters):
+        """Validate a purge command's amount, filters and channels, then run it"""
+        max_amount = CONFIG['purge']['max_amount']
+        
+        # Check amount
+        if amount < 1 or amount > max_amount:
+            embed = discord.Embed(
+                title="❌ Invalid Amount",
+                description=f"You can only scan between 1 and {max_amount} messages at a time.",
+                color=CONFIG['colors']['error']
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        # Compile the filters
+        try:
+            check = PurgeFilter.from_args(ctx.message, filters)
+        except ValueError as e:
+            embed = discord.Embed(
+                title="❌ Invalid Filter",
+                description=f"{e}\nFilters: `@member`, `#channel`, `bots`, `humans`, `attachments`, `links`, `contains:text`, `regex:pattern`",
+                color=CONFIG['colors']['error']
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        # Purge mentioned channels the moderator can manage, or this one
+        channels = ctx.message.channel_mentions[:CONFIG['purge']['max_channels']] or [ctx.channel]
+        channels = [
+            channel for channel in channels
+            if channel.permissions_for(ctx.author).manage_messages and channel.permissions_for(ctx.guild.me).manage_messages
+        ]
+        if not channels:
+            embed = discord.Embed(
+                title="❌ Permission Error",
+                description="You can't manage messages in any of those channels.",
+                color=CONFIG['colors']['error']
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        await self.run(ctx, channels, amount, check)
+
+    async def run(self, ctx, channels, limit, check, interval=3):
+        """Purge channels for a command, keeping one status message updated"""
+        progress, task = self.start(channels, limit, check, before=ctx.message)
+
+        def status_embed(finished):
+            description = f"Filter: {check.describe()}\n\n" + "\n".join(item.text() for item in progress)
+            if finished:
+                return EmbedCreator.create_success_embed("🧹 Purge Finished", description)
+            return EmbedCreator.create_loading_embed("Purging Messages", description)
+
+        status = await ctx.send(embed=status_embed(False))
+        while not task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(task), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await status.edit(embed=status_embed(task.done()))
+            except discord.HTTPException:
+                # Status message was deleted, the purge keeps running regardless
+                break
+
+        await task
+        try:
+            await ctx.message.delete()
+        except discord.HTTPException:
+            pass
+        return progress
+
+# Create a global purge engine instance
+purge_engine = PurgeEngine(old_message_delay=CONFIG['purge']['old_message_delay'])
@@ -0,0 +1,254 @@
+import asyncio
+import collections
+import logging
+import time
+
+import discord
+
+from config import CONFIG
+from utils.embed_creator import EmbedCreator
+from utils.rest_queue import rest_queue, INTERACTIVE, BACKGROUND
+
+logger = logging.getLogger('discord_bot')
+
+class GuildRaidState:
+    """Join window and raid mode state of one guild"""
+
+    def __init__(self):
+        # (monotonic time, member_id, is_new_account) of joins inside the window
+        self.joins = collections.deque()
+        self.member_ids = set()
+        self.new_accounts = 0
+        self.raid_since = None
+        self.last_trip = 0
+        self.raid_joins = 0
+        # [(member_id, role_id)] autoroles held back until raid mode ends
+        self.deferred_roles = []
+        # kind -> [member] waiting for the next aggregated flush
+        self.pending = {}
+        self.previous_verification = None
+
+    @property
+    def in_raid(self):
+        return self.raid_since is not None
+
+class RaidGuard:
+    """Per-guild sliding-window join-rate detector
+
+    Every join-handling cog calls `observe(member)`; the first call per join
+    records it, so the order listeners run in does not matter. Too many joins,
+    or too many new accounts, inside the window switch the guild into raid
+    mode. In raid mode cogs hand their per-join work to the guard instead:
+    autoroles are held back and assigned in the background once the raid is
+    over (to members still in the guild), and welcome and log messages are
+    collected and flushed as one message per interval. Raid mode ends after
+    `cooldown` seconds without a trip, and can optionally raise the guild's
+    verification level for its duration.
+    """
+
+    def __init__(self, join_threshold=10, new_account_threshold=5, window_seconds=10,
+                 new_account_days=7, cooldown=120, batch_interval=10, lockdown=False):
+        """Initialize the guard
+
+        Args:
+            join_threshold: Joins inside the window that trip raid mode
+            new_account_threshold: Joins of new accounts inside the window that trip raid mode
+            window_seconds: Length of the sliding join window
+            new_account_days: Accounts younger than this count as new
+            cooldown: Seconds without a trip before raid mode ends
+            batch_interval: Seconds between aggregated flushes
+            lockdown: Raise the verification level while in raid mode
+        """
+        self.join_threshold = join_threshold
+        self.new_account_threshold = new_account_threshold
+        self.window_seconds = window_seconds
+        self.new_account_days = new_account_days
+        self.cooldown = cooldown
+        self.batch_interval = batch_interval
+        self.lockdown = lockdown
+
+        # guild_id -> GuildRaidState
+        self.guilds = {}
+        # kind -> async callback(guild, members)
+        self.flush_handlers = {}
+        self.bot = None
+        self._task = None
+
+    def attach(self, bot):
+        """Start the flush loop once; safe to call from every join-handling cog"""
+        if self.bot is bot:
+            return
+        self.bot = bot
+        self._task = bot.loop.create_task(self._flush_loop())
+
+    def register_flush(self, kind, handler):
+        """Set the coroutine that receives aggregated members of a kind"""
+        self.flush_handlers[kind] = handler
+
+    def state(self, guild_id):
+        if guild_id not in self.guilds:
+            self.guilds[guild_id] = GuildRaidState()
+        return self.guilds[guild_id]
+
+    def is_new_account(self, member):
+        return (discord.utils.utcnow() - member.created_at).days < self.new_account_days
+
+    def observe(self, member):
+        """Record a join once and check if the guild is in raid mode
+
+        Returns:
+            bool: True if per-join work should be deferred or aggregated
+        """
+        state = self.state(member.guild.id)
+        if member.id in state.member_ids:
+            return state.in_raid
+
+        now = time.monotonic()
+        is_new = self.is_new_account(member)
+        state.joins.append((now, member.id, is_new))
+        state.member_ids.add(member.id)
+        state.new_accounts += is_new
+        if state.in_raid:
+            state.raid_joins += 1
+
+        # Slide the window
+        while state.joins and state.joins[0][0] < now - self.window_seconds:
+            _, old_id, old_new = state.joins.popleft()
+            state.member_ids.discard(old_id)
+            state.new_accounts -= old_new
+
+        if len(state.joins) >= self.join_threshold or state.new_accounts >= self.new_account_threshold:
+            state.last_trip = now
+            if not state.in_raid:
+                self.start_raid(member.guild)
+        return state.in_raid
+
+    def start_raid(self, guild):
+        """Switch a guild into raid mode"""
+        state = self.state(guild.id)
+        if state.in_raid:
+            return
+        state.raid_since = time.monotonic()
+        state.last_trip = state.raid_since
+        state.raid_joins = len(state.joins)
+        logger.warning(f"Raid mode enabled in guild {guild.id} ({len(state.joins)} joins in {self.window_seconds}s)")
+
+        if self.lockdown and guild.verification_level < discord.VerificationLevel.highest:
+            state.previous_verification = guild.verification_level
+            rest_queue.fire(
+                lambda: guild.edit(verification_level=discord.VerificationLevel.highest, reason="Raid mode"),
+                guild.id,
+                INTERACTIVE
+            )
+        if self.bot:
+            self.bot.dispatch("raid_start", guild, state)
+
+    async def end_raid(self, guild):
+        """Leave raid mode, flush what was aggregated and assign the held-back autoroles"""
+        state = self.state(guild.id)
+        if not state.in_raid:
+            return
+        await self._flush_guild(guild, state)
+        state.raid_since = None
+        logger.info(f"Raid mode ended in guild {guild.id} after {state.raid_joins} joins")
+
+        if state.previous_verification is not None:
+            previous, state.previous_verification = state.previous_verification, None
+            rest_queue.fire(
+                lambda: guild.edit(verification_level=previous, reason="Raid mode ended"),
+                guild.id,
+                INTERACTIVE
+            )
+
+        deferred, state.deferred_roles = state.deferred_roles, []
+        for member_id, role_id in deferred:
+            member = guild.get_member(member_id)
+            role = guild.get_role(role_id)
+            # Members banned or gone during the raid are skipped
+            if member is None or role is None or role in member.roles:
+                continue
+            rest_queue.fire(
+                lambda member=member, role=role: member.add_roles(role, reason="Autorole (after raid mode)"),
+                guild.id,
+                BACKGROUND,
+                bucket=f"guild:{guild.id}:member_roles"
+            )
+        if self.bot:
+            self.bot.dispatch("raid_end", guild, state)
+
+    def status_embed(self, guild_id):
+        """Embed describing a guild's raid mode state"""
+        state = self.state(guild_id)
+        if state.in_raid:
+            embed = EmbedCreator.create_warning_embed(
+                "🚨 Raid Mode On",
+                f"{state.raid_joins} joins so far, {len(state.deferred_roles)} autoroles held back. "
+                f"Ends after {self.cooldown} seconds without a join spike."
+            )
+        else:
+            embed = EmbedCreator.create_info_embed(
+                "Raid Mode Off",
+                f"Raid mode starts at {self.join_threshold} joins or "
+                f"{self.new_account_threshold} new accounts within {self.window_seconds} seconds."
+            )
+        return embed
+
+    async def run_command(self, ctx, mode=None):
+        """Show raid mode status, or turn it on or off for a raidmode command"""
+        if mode is not None and mode.lower() == "on":
+            self.start_raid(ctx.guild)
+        elif mode is not None and mode.lower() == "off":
+            await self.end_raid(ctx.guild)
+        elif mode is not None:
+            await ctx.send(embed=EmbedCreator.create_error_embed(
+                "Invalid Mode",
+                f"Use `{CONFIG['prefix']}raidmode on` or `{CONFIG['prefix']}raidmode off`."
+            ))
+            return
+        
+        await ctx.send(embed=self.status_embed(ctx.guild.id))
+
+    def defer_role(self, member, role):
+        """Hold an autorole back until raid mode ends"""
+        self.state(member.guild.id).deferred_roles.append((member.id, role.id))
+
+    def aggregate(self, kind, member):
+        """Add a member to the next aggregated flush of a kind, e.g. one welcome message"""
+        self.state(member.guild.id).pending.setdefault(kind, []).append(member)
+
+    async def _flush_guild(self, guild, state):
+        pending, state.pending = state.pending, {}
+        for kind, members in pending.items():
+            handler = self.flush_handlers.get(kind)
+            if handler is None or not members:
+                continue
+            try:
+                await handler(guild, members)
+            except Exception as e:
+                logger.error(f"Error flushing {kind} for guild {guild.id}: {e}")
+
+    async def _flush_loop(self):
+        await self.bot.wait_until_ready()
+        while not self.bot.is_closed():
+            await asyncio.sleep(self.batch_interval)
+            now = time.monotonic()
+            for guild_id, state in list(self.guilds.items()):
+                guild = self.bot.get_guild(guild_id)
+                if guild is None:
+                    self.guilds.pop(guild_id)
+                    continue
+                if state.in_raid and now - state.last_trip >= self.cooldown:
+                    await self.end_raid(guild)
+                elif state.pending:
+                    await self._flush_guild(guild, state)
+
+# Create a global raid guard instance
+raid_guard = RaidGuard(
+    join_threshold=CONFIG['raid']['join_threshold'],
+    new_account_threshold=CONFIG['raid']['new_account_threshold'],
+    window_seconds=CONFIG['raid']['window_seconds'],
+    new_account_days=CONFIG['raid']['new_account_days'],
+    cooldown=CONFIG['raid']['cooldown'],
+    batch_interval=CONFIG['raid']['batch_interval'],
+    lockdown=CONFIG['raid']['lockdown']
+)
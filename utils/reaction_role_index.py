@@ -0,0 +1,193 @@
+import asyncio
+import logging
+
+import discord
+
+from utils.database import db
+from utils.reaction_targets import reaction_targets
+from utils.rest_queue import rest_queue, BACKGROUND
+
+logger = logging.getLogger('discord_bot')
+
+# channel_id of entries whose message could not be found in any channel
+MISSING_CHANNEL = 0
+
+class ReactionRoleEntry:
+    """Location and emoji to role mapping of one reaction role message"""
+
+    __slots__ = ("guild_id", "message_id", "channel_id", "roles")
+
+    def __init__(self, guild_id, message_id, channel_id, roles):
+        self.guild_id = guild_id
+        self.message_id = message_id
+        # None until resolved, MISSING_CHANNEL if the message is gone
+        self.channel_id = channel_id
+        # emoji string -> role_id
+        self.roles = roles
+
+    def to_dict(self):
+        return {
+            "channel_id": str(self.channel_id) if self.channel_id is not None else None,
+            "roles": {emoji: str(role_id) for emoji, role_id in self.roles.items()}
+        }
+
+class ReactionRoleIndex:
+    """In-memory message_id -> (channel_id, emoji -> role) index of reaction roles
+
+    Records are stored in the database's reaction_roles section, keyed by
+    guild and message, and now carry their channel_id. Older records without
+    one are resolved by a one-time background job, or for free as soon as
+    someone reacts to the message, since the reaction event says where the
+    message is.
+    """
+
+    def __init__(self, save_delay=5):
+        """Initialize the index
+
+        Args:
+            save_delay: Seconds to wait before writing changes, so bursts are saved once
+        """
+        self.save_delay = save_delay
+        # message_id -> ReactionRoleEntry
+        self.entries = {}
+        # guild_id -> set of message IDs
+        self.by_guild = {}
+        self.bot = None
+        self._save_task = None
+        self._resolver_task = None
+        self.load()
+
+    def load(self):
+        """Build the index from the database, reading old and new record formats"""
+        self.entries = {}
+        self.by_guild = {}
+        for guild_id, messages in db.data.get("reaction_roles", {}).items():
+            for message_id, record in messages.items():
+                if isinstance(record, dict) and "roles" in record:
+                    channel_id = int(record["channel_id"]) if record.get("channel_id") is not None else None
+                    roles = record["roles"]
+                else:
+                    # Old format: the record is the emoji -> role mapping itself
+                    channel_id = None
+                    roles = record if isinstance(record, dict) else {}
+                self._index(ReactionRoleEntry(
+                    int(guild_id),
+                    int(message_id),
+                    channel_id,
+                    {emoji: int(role_id) for emoji, role_id in roles.items()}
+                ))
+        reaction_targets.replace("reaction_roles", self.entries)
+
+    def _index(self, entry):
+        self.entries[entry.message_id] = entry
+        self.by_guild.setdefault(entry.guild_id, set()).add(entry.message_id)
+        reaction_targets.track("reaction_roles", entry.message_id)
+
+    def attach(self, bot):
+        """Start the resolver for records without a channel once; safe to call repeatedly"""
+        if self.bot is bot:
+            return
+        self.bot = bot
+        if any(entry.channel_id is None for entry in self.entries.values()):
+            self._resolver_task = bot.loop.create_task(self._resolve_all())
+
+    def get(self, message_id):
+        return self.entries.get(int(message_id))
+
+    def for_guild(self, guild_id):
+        """Get a guild's entries, newest message first"""
+        return [self.entries[message_id] for message_id in sorted(self.by_guild.get(guild_id, ()), reverse=True)]
+
+    def add(self, guild_id, channel_id, message_id, emoji=None, role_id=None):
+        """Track a reaction role message, mapping an emoji on it to a role if given"""
+        entry = self.entries.get(message_id)
+        if entry is None:
+            entry = ReactionRoleEntry(guild_id, message_id, channel_id, {})
+            self._index(entry)
+        entry.channel_id = channel_id
+        if emoji is not None:
+            entry.roles[str(emoji)] = role_id
+        self._schedule_save(entry)
+        return entry
+
+    def remove(self, message_id):
+        """Remove a message from the index and get its entry"""
+        entry = self.entries.pop(int(message_id), None)
+        if entry is None:
+            return None
+        self.by_guild.get(entry.guild_id, set()).discard(entry.message_id)
+        reaction_targets.untrack("reaction_roles", entry.message_id)
+        db.data.get("reaction_roles", {}).get(str(entry.guild_id), {}).pop(str(entry.message_id), None)
+        self._schedule_save()
+        return entry
+
+    def set_channel(self, message_id, channel_id):
+        """Record where a message is, e.g. from a reaction event"""
+        entry = self.entries.get(message_id)
+        if entry is None or entry.channel_id == channel_id:
+            return
+        entry.channel_id = channel_id
+        self._schedule_save(entry)
+
+    def _schedule_save(self, entry=None):
+        if entry is not None:
+            db.data.setdefault("reaction_roles", {}).setdefault(str(entry.guild_id), {})[str(entry.message_id)] = entry.to_dict()
+        if self._save_task and not self._save_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            db._save_data()
+            return
+        self._save_task = loop.create_task(self._save_later())
+
+    async def _save_later(self):
+        await asyncio.sleep(self.save_delay)
+        db._save_data()
+
+    async def _resolve_all(self):
+        await self.bot.wait_until_ready()
+        pending = [entry for entry in self.entries.values() if entry.channel_id is None]
+        logger.info(f"Resolving channels of {len(pending)} reaction role messages")
+        for entry in pending:
+            # A reaction may have resolved it in the meantime
+            if entry.channel_id is not None:
+                continue
+            guild = self.bot.get_guild(entry.guild_id)
+            if guild is None:
+                continue
+            channel_id = await self.find_channel(guild, entry)
+            self.set_channel(entry.message_id, channel_id if channel_id is not None else MISSING_CHANNEL)
+        logger.info("Finished resolving reaction role channels")
+
+    async def find_channel(self, guild, entry):
+        """Find the channel of an entry's message, trying the most likely channels first"""
+        # Channels that already hold this guild's reaction roles come first
+        known = {
+            other.channel_id for other in self.for_guild(guild.id)
+            if other.channel_id not in (None, MISSING_CHANNEL)
+        }
+        channels = sorted(guild.text_channels, key=lambda channel: channel.id not in known)
+        for channel in channels:
+            # Snowflakes are time ordered: a channel cannot hold messages older than
+            # itself or newer than its last message
+            if channel.id > entry.message_id:
+                continue
+            if channel.last_message_id is not None and channel.last_message_id < entry.message_id:
+                continue
+            if not channel.permissions_for(guild.me).read_message_history:
+                continue
+            try:
+                await rest_queue.run(
+                    lambda channel=channel: channel.fetch_message(entry.message_id),
+                    guild.id,
+                    BACKGROUND,
+                    bucket=f"channel:{channel.id}:fetch"
+                )
+                return channel.id
+            except discord.HTTPException:
+                continue
+        return None
+
+# Create a global reaction role index instance
+reaction_role_index = ReactionRoleIndex()
@@ -0,0 +1,39 @@
+import logging
+
+logger = logging.getLogger('discord_bot')
+
+class ReactionTargets:
+    """Process-wide sets of the message IDs each reaction feature handles
+
+    Every raw reaction event reaches every reaction listener, and nearly all
+    of them are on messages no feature cares about. Listeners check `wants`
+    first, a set lookup, before touching any storage. Features keep their
+    set current as their messages are created and deleted.
+    """
+
+    def __init__(self):
+        # feature name -> set of message IDs
+        self.targets = {}
+
+    def track(self, feature, message_id):
+        """Mark a message as handled by a feature"""
+        self.targets.setdefault(feature, set()).add(int(message_id))
+
+    def untrack(self, feature, message_id):
+        """Stop handling a message for a feature"""
+        self.targets.get(feature, set()).discard(int(message_id))
+
+    def replace(self, feature, message_ids):
+        """Set all message IDs of a feature at once, e.g. after loading them"""
+        self.targets[feature] = {int(message_id) for message_id in message_ids}
+
+    def wants(self, feature, message_id):
+        """Check if a feature handles reactions on a message"""
+        return message_id in self.targets.get(feature, ())
+
+    def counts(self):
+        """Get how many messages each feature handles"""
+        return {feature: len(message_ids) for feature, message_ids in self.targets.items()}
+
+# Create a global reaction targets instance
+reaction_targets = ReactionTargets()
@@ -0,0 +1,212 @@
+import asyncio
+import collections
+import logging
+import time
+
+import discord
+
+logger = logging.getLogger('discord_bot')
+
+# Priority levels, lower runs first
+INTERACTIVE = 0
+NORMAL = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", NORMAL: "normal", BACKGROUND: "background"}
+
+class RestQueue:
+    """Shared outbound queue for bulk REST actions
+
+    Actions are queued per priority and per guild. Workers always take the
+    highest priority level that has work, and within a level they rotate
+    between guilds, so one guild's mass action only delays its own later
+    actions. Actions that share a route bucket (e.g. one channel's reactions)
+    run one at a time, and a bucket that hits a 429 is parked until its
+    retry_after has passed. The action goes back to the front of its queue
+    and the worker moves on, so a rate limit never holds a worker slot while
+    it waits. discord.py's own per-route handling still applies underneath;
+    this queue keeps bulk work from piling into it all at once.
+    """
+
+    def __init__(self, workers=4, max_attempts=3):
+        """Initialize the queue
+
+        Args:
+            workers: Maximum number of actions in flight
+            max_attempts: Tries per action on 429 and 5xx errors
+        """
+        self.workers = workers
+        self.max_attempts = max_attempts
+
+        # priority -> {guild_id: deque of jobs}
+        self.queues = {priority: {} for priority in PRIORITY_NAMES}
+        # priority -> deque of guild IDs with queued jobs, in round-robin order
+        self.rotation = {priority: collections.deque() for priority in PRIORITY_NAMES}
+        self.busy_buckets = set()
+        # bucket -> monotonic time it may be used again
+        self.bucket_resume = {}
+
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rate_limited = 0
+
+        self._ready = None
+        self._tasks = []
+
+    def _start(self):
+        if self._tasks and not all(task.done() for task in self._tasks):
+            return
+        self._ready = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, action, guild_id=None, priority=NORMAL, bucket=None):
+        """Queue an action and get a future for its result
+
+        Args:
+            action: Zero-argument callable returning an awaitable, called when the action runs
+            guild_id: Guild the action belongs to, used for fairness
+            priority: INTERACTIVE, NORMAL or BACKGROUND
+            bucket: Route bucket key, actions with the same key never run concurrently
+
+        Returns:
+            asyncio.Future: Resolves to the action's result or raises its error
+        """
+        self._start()
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue((action, guild_id, priority, bucket, future, 0))
+        return future
+
+    def _enqueue(self, job, front=False):
+        """Add a job to its guild's queue, at the front when it is being retried"""
+        guild_id, priority = job[1], job[2]
+        guilds = self.queues[priority]
+        if guild_id not in guilds:
+            guilds[guild_id] = collections.deque()
+            self.rotation[priority].append(guild_id)
+        if front:
+            guilds[guild_id].appendleft(job)
+        else:
+            guilds[guild_id].append(job)
+        self._ready.set()
+
+    async def run(self, action, guild_id=None, priority=NORMAL, bucket=None):
+        """Queue an action and wait for it"""
+        return await self.submit(action, guild_id, priority, bucket)
+
+    def fire(self, action, guild_id=None, priority=BACKGROUND, bucket=None):
+        """Queue an action nobody waits for; failures are logged"""
+        future = self.submit(action, guild_id, priority, bucket)
+        future.add_done_callback(self._log_failure)
+        return future
+
+    @staticmethod
+    def _log_failure(future):
+        if not future.cancelled() and future.exception():
+            logger.error(f"Queued REST action failed: {future.exception()}")
+
+    def _bucket_free(self, bucket, now):
+        if bucket is None:
+            return True
+        if bucket in self.busy_buckets:
+            return False
+        return self.bucket_resume.get(bucket, 0) <= now
+
+    def _next_job(self):
+        """Take the next runnable job, or None if every queued job's bucket is busy"""
+        now = time.monotonic()
+        for priority in PRIORITY_NAMES:
+            rotation = self.rotation[priority]
+            guilds = self.queues[priority]
+            for _ in range(len(rotation)):
+                guild_id = rotation[0]
+                rotation.rotate(-1)
+                queue = guilds[guild_id]
+                if not self._bucket_free(queue[0][3], now):
+                    continue
+                job = queue.popleft()
+                if not queue:
+                    del guilds[guild_id]
+                    rotation.remove(guild_id)
+                return job
+        return None
+
+    def _wait_time(self):
+        """Seconds until a parked bucket frees up, or None to wait for new work"""
+        if not self.bucket_resume:
+            return None
+        now = time.monotonic()
+        self.bucket_resume = {bucket: at for bucket, at in self.bucket_resume.items() if at > now}
+        if not self.bucket_resume:
+            return 0
+        return min(self.bucket_resume.values()) - now
+
+    async def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                self._ready.clear()
+                try:
+                    await asyncio.wait_for(self._ready.wait(), self._wait_time())
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            action, guild_id, priority, bucket, future, attempt = job
+            if bucket is not None:
+                self.busy_buckets.add(bucket)
+            self.in_flight += 1
+            try:
+                result = await action()
+                if not future.done():
+                    future.set_result(result)
+                self.completed += 1
+            except discord.HTTPException as e:
+                if attempt + 1 < self.max_attempts and (e.status == 429 or e.status >= 500):
+                    self._retry_later(job, e)
+                else:
+                    if not future.done():
+                        future.set_exception(e)
+                    self.failed += 1
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                self.failed += 1
+            finally:
+                self.in_flight -= 1
+                self.busy_buckets.discard(bucket)
+                # A freed bucket may unblock jobs other workers skipped
+                self._ready.set()
+
+    def _retry_later(self, job, error):
+        """Park a failed job's bucket and put the job back at the front of its queue"""
+        action, guild_id, priority, bucket, future, attempt = job
+        if error.status == 429:
+            self.rate_limited += 1
+        retry_after = getattr(error, "retry_after", None) or 2 ** attempt
+        # An action without a bucket is parked under its own future, which is unique to it
+        if bucket is None:
+            bucket = future
+        self.bucket_resume[bucket] = time.monotonic() + retry_after
+        self._enqueue((action, guild_id, priority, bucket, future, attempt + 1), front=True)
+
+    def metrics(self):
+        """Get queue depth per priority and per guild plus counters"""
+        return {
+            "depth": {
+                PRIORITY_NAMES[priority]: sum(len(queue) for queue in guilds.values())
+                for priority, guilds in self.queues.items()
+            },
+            "guilds": {
+                PRIORITY_NAMES[priority]: {guild_id: len(queue) for guild_id, queue in guilds.items()}
+                for priority, guilds in self.queues.items()
+            },
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            "parked_buckets": len(self.bucket_resume)
+        }
+
+# Create a global REST queue instance
+rest_queue = RestQueue()
@@ -0,0 +1,188 @@
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+import uuid
+
+logger = logging.getLogger('discord_bot')
+
+class Scheduler:
+    """Persistent timer service for delayed jobs
+
+    Jobs are plain data: a handler name, a due time and a JSON payload. They
+    are kept in a heap and saved to disk, and a single task sleeps until the
+    earliest one is due. Cogs register async handlers by name; jobs whose
+    handler is not registered yet wait until it is, so jobs that came due
+    while the bot was offline run once their cog loads.
+    """
+
+    def __init__(self, data_file="data/scheduled_jobs.json", save_delay=2):
+        """Initialize the scheduler
+
+        Args:
+            data_file: JSON file pending jobs are saved to
+            save_delay: Seconds to batch job changes before saving
+        """
+        self.data_file = data_file
+        self.save_delay = save_delay
+
+        self.bot = None
+        self.handlers = {}
+        # job_id -> {"id", "handler", "due", "payload", "key"}
+        self.jobs = {}
+        # key -> job_id, so a job can be replaced or cancelled by a stable name
+        self.keys = {}
+        # (due, job_id); cancelled jobs are skipped when popped
+        self.heap = []
+        # handler name -> [job_id] for due jobs waiting for their handler
+        self.waiting = {}
+
+        self._wake = asyncio.Event()
+        self._task = None
+        self._save_task = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.data_file):
+            return
+        try:
+            with open(self.data_file, "r") as f:
+                jobs = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading scheduled jobs: {e}")
+            return
+
+        for job in jobs:
+            self._add(job)
+        logger.info(f"Loaded {len(self.jobs)} scheduled jobs")
+
+    def save(self):
+        """Write all pending jobs to disk"""
+        try:
+            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+            with open(self.data_file, "w") as f:
+                json.dump(list(self.jobs.values()), f)
+        except Exception as e:
+            logger.error(f"Error saving scheduled jobs: {e}")
+
+    def _schedule_save(self):
+        if self._save_task is None or self._save_task.done():
+            try:
+                self._save_task = asyncio.get_running_loop().create_task(self._save_later())
+            except RuntimeError:
+                self.save()
+
+    async def _save_later(self):
+        await asyncio.sleep(self.save_delay)
+        self.save()
+
+    def attach(self, bot):
+        """Start the wake-up task once; safe to call from every cog that schedules jobs"""
+        if self.bot is bot and self._task and not self._task.done():
+            return
+        self.bot = bot
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def register(self, name, handler):
+        """Register an async handler(payload) for jobs with this handler name"""
+        self.handlers[name] = handler
+        # Requeue jobs that came due before the handler existed
+        for job_id in self.waiting.pop(name, []):
+            job = self.jobs.get(job_id)
+            if job:
+                heapq.heappush(self.heap, (job["due"], job_id))
+        self._wake.set()
+
+    def _add(self, job):
+        self.jobs[job["id"]] = job
+        if job.get("key"):
+            self.keys[job["key"]] = job["id"]
+        heapq.heappush(self.heap, (job["due"], job["id"]))
+
+    def schedule(self, handler, payload=None, delay=None, at=None, key=None):
+        """Schedule a job
+
+        Args:
+            handler: Name of the registered handler to run
+            payload: JSON-serializable data passed to the handler
+            delay: Seconds from now until the job is due
+            at: Unix timestamp the job is due, used instead of delay
+            key: Optional stable name; scheduling the same key replaces the old job
+
+        Returns:
+            str: The job ID
+        """
+        if key:
+            self.cancel(key=key)
+
+        due = at if at is not None else time.time() + (delay or 0)
+        job = {
+            "id": uuid.uuid4().hex,
+            "handler": handler,
+            "due": due,
+            "payload": payload or {},
+            "key": key
+        }
+        self._add(job)
+        self._schedule_save()
+
+        # Only wake the runner if this job is now the earliest
+        if self.heap[0][1] == job["id"]:
+            self._wake.set()
+        return job["id"]
+
+    def cancel(self, job_id=None, key=None):
+        """Cancel a job by ID or key, returns True if a job was removed"""
+        if key is not None:
+            job_id = self.keys.get(key)
+        job = self.jobs.pop(job_id, None)
+        if job is None:
+            return False
+        if job.get("key"):
+            self.keys.pop(job["key"], None)
+        self._schedule_save()
+        return True
+
+    def get(self, key):
+        """Get a pending job by key"""
+        return self.jobs.get(self.keys.get(key))
+
+    def pending(self, handler=None):
+        """Get pending jobs, optionally only those for one handler"""
+        return [job for job in self.jobs.values() if handler is None or job["handler"] == handler]
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            self._wake.clear()
+            now = time.time()
+
+            # Run everything that is due, including jobs missed while offline
+            while self.heap and self.heap[0][0] <= now:
+                due, job_id = heapq.heappop(self.heap)
+                job = self.jobs.get(job_id)
+                if job is None or job["due"] != due:
+                    # Cancelled or replaced
+                    continue
+                if job["handler"] not in self.handlers:
+                    self.waiting.setdefault(job["handler"], []).append(job_id)
+                    continue
+                self.cancel(job_id)
+                asyncio.get_running_loop().create_task(self._execute(job))
+
+            timeout = self.heap[0][0] - now if self.heap else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _execute(self, job):
+        try:
+            await self.handlers[job["handler"]](job["payload"])
+        except Exception as e:
+            logger.error(f"Scheduled job {job['handler']} ({job['id']}) failed: {e}")
+
+# Create a global scheduler instance
+scheduler = Scheduler()
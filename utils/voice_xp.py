@@ -0,0 +1,86 @@
+import logging
+import time
+
+logger = logging.getLogger('discord_bot')
+
+class VoiceXPTracker:
+    """Event-driven voice XP accrual
+
+    Only members currently earning voice XP are stored, as
+    (guild_id, user_id) -> monotonic start time. Work happens on voice state
+    changes; there is no periodic scan over voice channels.
+    """
+
+    def __init__(self, engine, xp_per_minute=5, min_seconds=60):
+        """Initialize the tracker
+
+        Args:
+            engine: The XP engine that credits the accrued XP
+            xp_per_minute: XP earned for each minute of eligible voice time
+            min_seconds: Sessions shorter than this earn nothing
+        """
+        self.engine = engine
+        self.xp_per_minute = xp_per_minute
+        self.min_seconds = min_seconds
+        self.sessions = {}
+
+    @staticmethod
+    def is_eligible(member, state):
+        """Check if a voice state earns XP: connected, not AFK, not muted or deafened"""
+        if member.bot or state is None or state.channel is None:
+            return False
+        if member.guild.afk_channel and state.channel.id == member.guild.afk_channel.id:
+            return False
+        return not (state.self_mute or state.self_deaf or state.mute or state.deaf)
+
+    def start(self, member):
+        self.sessions.setdefault((member.guild.id, member.id), time.monotonic())
+
+    def stop(self, member):
+        """End a member's session and credit the XP through the batched write path"""
+        started = self.sessions.pop((member.guild.id, member.id), None)
+        if started is None:
+            return None
+
+        elapsed = time.monotonic() - started
+        if elapsed < self.min_seconds:
+            return None
+        if not self.engine.get_settings(member.guild.id).get("enabled", True):
+            return None
+
+        amount = int(elapsed * self.xp_per_minute / 60)
+        if amount <= 0:
+            return None
+        return self.engine.award(member.guild, member, amount)
+
+    async def on_voice_state_update(self, member, before, after):
+        """Start or stop accrual when eligibility changes"""
+        was_eligible = self.is_eligible(member, before)
+        is_eligible = self.is_eligible(member, after)
+
+        if was_eligible and not is_eligible:
+            self.stop(member)
+        elif is_eligible and not was_eligible:
+            self.start(member)
+
+    def seed(self, guilds):
+        """Start sessions for members already in voice, used once the bot is ready"""
+        for guild in guilds:
+            for channel in guild.voice_channels:
+                for member in channel.members:
+                    if self.is_eligible(member, member.voice):
+                        self.start(member)
+
+    def stop_all(self, guild_lookup):
+        """Credit every open session, used on shutdown
+
+        Args:
+            guild_lookup: Callable returning a guild for a guild ID
+        """
+        for guild_id, user_id in list(self.sessions):
+            guild = guild_lookup(guild_id)
+            member = guild.get_member(user_id) if guild else None
+            if member:
+                self.stop(member)
+            else:
+                self.sessions.pop((guild_id, user_id), None)
@@ -0,0 +1,318 @@
+import asyncio
+import glob
+import heapq
+import json
+import logging
+import os
+import random
+import re
+import time
+
+from utils.db_manager import db
+from utils.announcements import level_up_announcer
+from utils.flood import flood_detector
+from utils.helpers import Helpers
+from utils.voice_xp import VoiceXPTracker
+from config import CONFIG
+
+logger = logging.getLogger('discord_bot')
+
+# Per-guild level files written by the old SimpleLevels cog
+LEGACY_LEVEL_FILES = "data/guild_*_levels.json"
+LEGACY_GUILD_ID = re.compile(r"guild_(\d+)_levels\.json$")
+
+class XPEngine:
+    """Single owner of XP awards, cooldowns, storage and level up events
+
+    Every leveling cog is a command front-end over the shared `xp_engine` instance.
+    The engine registers one on_message listener no matter how many of those cogs
+    are loaded, keeps running totals in memory and writes accumulated deltas with
+    one backend call per guild on each flush.
+    """
+
+    def __init__(self, database, xp_per_message=15, xp_randomizer=5, cooldown=60,
+                 flush_interval=15, settings_ttl=60, voice_xp_per_minute=5):
+        """Initialize the engine
+
+        Args:
+            database: The active storage backend
+            xp_per_message: Base XP for a message
+            xp_randomizer: Random bonus XP (0 to this value)
+            cooldown: Seconds between message XP awards per member
+            flush_interval: Seconds between batched writes
+            settings_ttl: Seconds guild level settings are cached
+            voice_xp_per_minute: XP per minute in voice, 0 disables voice XP
+        """
+        self.db = database
+        self.xp_per_message = xp_per_message
+        self.xp_randomizer = xp_randomizer
+        self.cooldown = cooldown
+        self.flush_interval = flush_interval
+        self.settings_ttl = settings_ttl
+
+        self.bot = None
+        # (guild_id, user_id) -> {"xp", "level", "messages", "seen"}
+        self.totals = {}
+        # guild_id -> {user_id: {"xp": delta, "messages": delta}}
+        self.pending = {}
+        # (guild_id, user_id) -> monotonic time of the last message XP award
+        self.cooldowns = {}
+        self._settings = {}
+        self._flush_task = None
+        self._flush_lock = asyncio.Lock()
+        self.voice = VoiceXPTracker(self, xp_per_minute=voice_xp_per_minute) if voice_xp_per_minute else None
+
+    def attach(self, bot):
+        """Hook the engine into the bot once; safe to call from every leveling cog"""
+        if self.bot is bot:
+            return
+        self.bot = bot
+        self.migrate_legacy_files()
+        bot.add_listener(self.on_message, "on_message")
+        if self.voice:
+            bot.add_listener(self.voice.on_voice_state_update, "on_voice_state_update")
+            if bot.is_ready():
+                self.voice.seed(bot.guilds)
+            else:
+                bot.add_listener(self._seed_voice, "on_ready")
+        self._start_flush_loop()
+
+    def migrate_legacy_files(self, pattern=LEGACY_LEVEL_FILES):
+        """Move level data from old per-guild JSON files into the database once
+
+        Members may have earned XP in the database since those files stopped
+        being read, so the file values are added to what is stored rather than
+        replacing it. A migrated file is renamed to `.migrated` so it is never
+        imported twice.
+        """
+        for path in glob.glob(pattern):
+            match = LEGACY_GUILD_ID.search(path)
+            if not match:
+                continue
+            guild_id = int(match.group(1))
+            try:
+                with open(path, "r") as f:
+                    records = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not read legacy level file {path}: {e}")
+                continue
+
+            rows = []
+            for user_id, record in records.items():
+                stored = self.db.get_xp(user_id, guild_id)
+                xp = stored.get("xp", 0) + record.get("xp", 0)
+                rows.append({
+                    "user_id": str(user_id),
+                    "xp": xp,
+                    "level": Helpers.get_level_from_xp(xp),
+                    "messages": self.db.get_message_count(guild_id, user_id) + record.get("messages", 0)
+                })
+
+            if rows and not self.db.bulk_set_levels(guild_id, rows):
+                logger.error(f"Could not save level data from {path}, it will be retried on the next start")
+                continue
+            self.totals = {key: value for key, value in self.totals.items() if key[0] != guild_id}
+            os.rename(path, path + ".migrated")
+            logger.info(f"Migrated {len(rows)} members from {path}")
+
+    async def _seed_voice(self):
+        self.voice.seed(self.bot.guilds)
+
+    def _start_flush_loop(self):
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+            except RuntimeError:
+                # No running loop yet, the first award starts it
+                self._flush_task = None
+
+    # Settings
+    def get_settings(self, guild_id):
+        """Get level settings for a guild, cached for a short time"""
+        now = time.monotonic()
+        cached = self._settings.get(guild_id)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        settings = self.db.get_level_settings(guild_id)
+        self._settings[guild_id] = (now + self.settings_ttl, settings)
+        return settings
+
+    def set_settings(self, guild_id, **kwargs):
+        """Update level settings and drop the cached copy"""
+        self._settings.pop(guild_id, None)
+        return self.db.set_level_settings(guild_id, **kwargs)
+
+    # Reads
+    def _load(self, guild_id, user_id):
+        key = (guild_id, user_id)
+        entry = self.totals.get(key)
+        if entry is None:
+            stored = self.db.get_xp(user_id, guild_id)
+            entry = {
+                "xp": stored.get("xp", 0),
+                "level": stored.get("level", 0),
+                "messages": self.db.get_message_count(guild_id, user_id),
+                "seen": time.monotonic()
+            }
+            self.totals[key] = entry
+        return entry
+
+    def get_user(self, guild_id, user_id):
+        """Get {"xp", "level", "messages"} for a member including unflushed XP"""
+        entry = self._load(guild_id, user_id)
+        return {"xp": entry["xp"], "level": entry["level"], "messages": entry["messages"]}
+
+    async def leaderboard(self, guild_id, key="xp", limit=10):
+        """Get the top members by "xp", "level" or "messages" without sorting the whole guild"""
+        await self.flush(guild_id)
+        sort_key = (lambda row: (row["level"], row["xp"])) if key == "level" else (lambda row: row[key])
+
+        top = []
+        for batch in self.db.iter_guild_levels(guild_id):
+            top = heapq.nlargest(limit, top + batch, key=sort_key)
+        return top
+
+    # Writes
+    def _queue(self, guild_id, user_id, xp=0, messages=0):
+        """Add to the cached totals and the pending deltas of the next flush"""
+        entry = self._load(guild_id, user_id)
+        entry["seen"] = time.monotonic()
+        entry["xp"] += xp
+        entry["messages"] += messages
+
+        delta = self.pending.setdefault(guild_id, {}).setdefault(user_id, {"xp": 0, "messages": 0})
+        delta["xp"] += xp
+        delta["messages"] += messages
+
+        self._start_flush_loop()
+        return entry
+
+    def award(self, guild, member, amount, channel=None, count_message=False):
+        """Credit XP to a member; the write happens on the next flush
+
+        Returns:
+            int: The new level if the member leveled up, otherwise None
+        """
+        entry = self._queue(guild.id, member.id, xp=amount, messages=1 if count_message else 0)
+
+        old_level = entry["level"]
+        entry["level"] = Helpers.get_level_from_xp(entry["xp"])
+        if entry["level"] <= old_level:
+            return None
+
+        self._level_up(guild, member, entry["level"], channel)
+        return entry["level"]
+
+    def _level_up(self, guild, member, level, channel):
+        settings = self.get_settings(guild.id)
+        level_up_channel = None
+        if settings.get("channel_id"):
+            level_up_channel = guild.get_channel(int(settings["channel_id"]))
+
+        target = level_up_channel or channel
+        if target:
+            level_up_announcer.announce(target, member, level)
+
+        if self.bot:
+            self.bot.dispatch("level_up", member, level)
+
+    def reset(self, guild_id, user_id=None):
+        """Reset stored and cached XP for one member or a whole guild"""
+        if user_id is None:
+            self.pending.pop(guild_id, None)
+            self.totals = {key: value for key, value in self.totals.items() if key[0] != guild_id}
+        else:
+            self.pending.get(guild_id, {}).pop(user_id, None)
+            self.totals.pop((guild_id, user_id), None)
+        return self.db.reset_levels(guild_id, user_id)
+
+    async def import_levels(self, guild_id, rows):
+        """Overwrite stored XP for a batch of members, e.g. from another bot
+
+        Pending deltas are written first so they land under the imported values
+        rather than on top of them later, and the members' cached totals are
+        dropped so the next read sees the import. The write runs in a worker
+        thread so a large batch does not block the event loop.
+
+        Returns:
+            bool: Whether the batch was saved
+        """
+        await self.flush(guild_id)
+        saved = await asyncio.to_thread(self.db.bulk_set_levels, guild_id, rows)
+        for row in rows:
+            self.totals.pop((guild_id, int(row["user_id"])), None)
+        return saved
+
+    async def on_message(self, message):
+        """Count the message and award XP once per cooldown"""
+        if message.author.bot or not message.guild:
+            return
+
+        if not self.get_settings(message.guild.id).get("enabled", True):
+            return
+
+        # Duplicate messages and floods earn nothing
+        if flood_detector.observe(message) is not None:
+            return
+
+        key = (message.guild.id, message.author.id)
+        now = time.monotonic()
+        if key in self.cooldowns and now - self.cooldowns[key] < self.cooldown:
+            # Still count the message, it is written with the next flush
+            self._queue(*key, messages=1)
+            return
+
+        self.cooldowns[key] = now
+        amount = self.xp_per_message + random.randint(0, self.xp_randomizer)
+        self.award(message.guild, message.author, amount, channel=message.channel, count_message=True)
+
+    async def flush(self, guild_id=None):
+        """Write pending deltas with one backend call per guild"""
+        async with self._flush_lock:
+            guild_ids = [guild_id] if guild_id is not None else list(self.pending)
+            for gid in guild_ids:
+                updates = self.pending.pop(gid, None)
+                if not updates:
+                    continue
+                if not self.db.bulk_add_xp(gid, updates):
+                    # Keep the deltas so the next flush retries them
+                    retry = self.pending.setdefault(gid, {})
+                    for user_id, delta in updates.items():
+                        merged = retry.setdefault(user_id, {"xp": 0, "messages": 0})
+                        merged["xp"] += delta["xp"]
+                        merged["messages"] += delta["messages"]
+            self._evict()
+
+    async def close(self):
+        """Credit open voice sessions and write everything pending"""
+        if self.voice and self.bot:
+            self.voice.stop_all(self.bot.get_guild)
+        await self.flush()
+
+    def _evict(self, idle=3600):
+        """Drop cached totals and cooldowns of members idle for an hour"""
+        cutoff = time.monotonic() - idle
+        self.totals = {
+            key: entry for key, entry in self.totals.items()
+            if entry["seen"] > cutoff or key[1] in self.pending.get(key[0], {})
+        }
+        cooldown_cutoff = time.monotonic() - self.cooldown
+        self.cooldowns = {key: stamp for key, stamp in self.cooldowns.items() if stamp > cooldown_cutoff}
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush XP: {e}")
+
+# Create a global XP engine instance
+xp_engine = XPEngine(
+    db,
+    xp_per_message=CONFIG['levels']['xp_per_message'],
+    xp_randomizer=CONFIG['levels']['xp_randomizer'],
+    cooldown=CONFIG['levels']['xp_cooldown'],
+    voice_xp_per_minute=CONFIG['levels'].get('voice_xp_per_minute', 5)
+)
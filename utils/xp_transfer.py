@@ -0,0 +1,173 @@
+"""Streaming XP import/export for migrating guilds between leveling bots
+
+Usage:
+    python -m utils.xp_transfer export GUILD_ID levels.csv
+    python -m utils.xp_transfer import GUILD_ID levels.ndjson --batch-size 500
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+
+from utils.helpers import Helpers
+
+logger = logging.getLogger('discord_bot')
+
+FORMATS = ("csv", "ndjson")
+FIELDS = ["user_id", "xp", "level", "messages"]
+
+# Column names used by other leveling bots, mapped to ours
+COLUMN_ALIASES = {
+    "user_id": ("user_id", "userid", "id", "user", "member_id", "discord_id"),
+    "xp": ("xp", "exp", "total_xp", "totalxp", "experience", "points"),
+    "level": ("level", "lvl", "rank_level"),
+    "messages": ("messages", "message_count", "messages_count", "msg_count", "all_time")
+}
+
+def detect_format(path, fmt=None):
+    """Pick csv or ndjson from an explicit format or the file extension"""
+    if fmt:
+        fmt = fmt.lower()
+    else:
+        ext = os.path.splitext(path)[1].lower().lstrip(".")
+        fmt = "ndjson" if ext in ("ndjson", "jsonl", "json") else "csv"
+
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}', expected one of: {', '.join(FORMATS)}")
+    return fmt
+
+def _lookup(record, field):
+    """Find a field in a record using the known column aliases"""
+    lowered = {str(key).strip().lower(): value for key, value in record.items()}
+    for alias in COLUMN_ALIASES[field]:
+        value = lowered.get(alias)
+        if value not in (None, ""):
+            return value
+    return None
+
+def normalize_row(record):
+    """Convert a raw record into a row with the level recomputed from the shared curve
+
+    Returns None for records without a usable user ID.
+    """
+    user_id = _lookup(record, "user_id")
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    xp = _lookup(record, "xp")
+    level = _lookup(record, "level")
+    messages = _lookup(record, "messages")
+
+    if xp is not None:
+        xp = max(0, int(float(xp)))
+    elif level is not None:
+        # Level-only exports start the user at the bottom of their level
+        xp = Helpers.get_xp_for_level(int(float(level)))
+    else:
+        xp = 0
+
+    return {
+        "user_id": str(user_id),
+        "xp": xp,
+        "level": Helpers.get_level_from_xp(xp),
+        "messages": max(0, int(float(messages))) if messages is not None else None
+    }
+
+def read_rows(fp, fmt):
+    """Yield normalized rows from an open text file one record at a time"""
+    if fmt == "csv":
+        records = csv.DictReader(fp)
+    else:
+        records = (json.loads(line) for line in fp if line.strip())
+
+    for line_number, record in enumerate(records, 1):
+        try:
+            row = normalize_row(record)
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Skipping invalid XP record {line_number}: {e}")
+            continue
+        if row:
+            yield row
+
+def write_rows(fp, fmt, batches):
+    """Write batches of rows to an open text file, returns the row count"""
+    count = 0
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(fp, fieldnames=FIELDS, extrasaction="ignore")
+        writer.writeheader()
+
+    for batch in batches:
+        for row in batch:
+            if writer:
+                writer.writerow(row)
+            else:
+                fp.write(json.dumps({field: row.get(field) for field in FIELDS}) + "\n")
+        count += len(batch)
+
+    return count
+
+def export_guild(database, guild_id, path, fmt=None, batch_size=1000):
+    """Stream a guild's XP, levels and message counts to a file"""
+    fmt = detect_format(path, fmt)
+    with open(path, "w", encoding="utf-8", newline="") as fp:
+        count = write_rows(fp, fmt, database.iter_guild_levels(int(guild_id), batch_size))
+    logger.info(f"Exported {count} XP rows for guild {guild_id} to {path}")
+    return count
+
+def iter_import_batches(path, fmt=None, batch_size=500):
+    """Yield batches of normalized rows without loading the whole file"""
+    fmt = detect_format(path, fmt)
+    with open(path, "r", encoding="utf-8-sig", newline="") as fp:
+        batch = []
+        for row in read_rows(fp, fmt):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+def import_guild(database, guild_id, path, fmt=None, batch_size=500):
+    """Import a file into the active backend batch by batch
+
+    Returns:
+        tuple: (imported_rows, failed_batches)
+    """
+    imported = 0
+    failed = 0
+    for batch in iter_import_batches(path, fmt, batch_size):
+        if database.bulk_set_levels(int(guild_id), batch):
+            imported += len(batch)
+        else:
+            failed += 1
+    logger.info(f"Imported {imported} XP rows for guild {guild_id} from {path} ({failed} failed batches)")
+    return imported, failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import or export guild XP data")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("guild_id", type=int)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, default=None)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    # Imported here so the active backend is only initialized when the CLI runs
+    from utils.db_manager import db
+
+    if args.action == "export":
+        count = export_guild(db, args.guild_id, args.path, args.format, args.batch_size)
+        print(f"Exported {count} rows to {args.path}")
+    else:
+        imported, failed = import_guild(db, args.guild_id, args.path, args.format, args.batch_size)
+        print(f"Imported {imported} rows from {args.path} ({failed} failed batches)")
+
+if __name__ == "__main__":
+    main()